@@ -0,0 +1,222 @@
+# alert_log.py
+"""
+Índice clave→valor persistido como log append-only (una línea JSON por escritura).
+
+- Lecturas O(1) desde un dict en memoria.
+- Cada escritura es un único append pequeño (sin reescribir el archivo).
+- Compactación periódica: cuando el log acumula demasiadas líneas obsoletas
+  se reescribe con solo la última entrada por clave, podando por edad y tamaño.
+- Multi-proceso: las escrituras van bajo un lock de archivo y cada proceso
+  lee incrementalmente lo que otros añadieron (o recarga si hubo compactación).
+"""
+from __future__ import annotations
+import json, os, threading, time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import fcntl  # POSIX
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore
+try:
+    import msvcrt  # Windows
+except ImportError:
+    msvcrt = None  # type: ignore
+
+COMPACT_MIN_LINES = 500  # no compactar logs pequeños
+
+
+@contextmanager
+def _file_lock(path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = open(path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        yield
+    finally:
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            f.close()
+
+
+class AlertLog:
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        max_entries: int = 5000,
+        max_age_s: float = 14 * 86400,
+        legacy_json: str | Path | None = None,
+    ):
+        self.path = Path(path)
+        self.lock_path = self.path.with_suffix(self.path.suffix + ".lock")
+        self.max_entries = max_entries
+        self.max_age_s = max_age_s
+        self.legacy_json = Path(legacy_json) if legacy_json else None
+        self._index: Dict[str, Tuple[Any, float]] = {}  # key -> (valor, ts_escritura)
+        self._lines = 0
+        self._offset = 0        # bytes del log ya aplicados al índice
+        self._ino: Optional[int] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    # ---------- carga / sincronización ----------
+    def _load(self, *, have_lock: bool = False):
+        if self._loaded:
+            self._sync()
+            return
+        if not have_lock:
+            with _file_lock(self.lock_path):
+                return self._load(have_lock=True)
+        self._loaded = True
+        if self.path.exists():
+            self._sync()
+            if self._needs_compact():
+                self._compact()
+        elif self.legacy_json is not None and self.legacy_json.exists():
+            self._import_legacy()
+
+    def _sync(self):
+        """Aplica al índice lo que otros procesos hayan añadido desde la última lectura."""
+        try:
+            st = self.path.stat()
+        except OSError:
+            return
+        if self._ino is not None and (st.st_ino != self._ino or st.st_size < self._offset):
+            # El archivo fue compactado/reemplazado: recarga completa
+            self._index.clear()
+            self._lines = 0
+            self._offset = 0
+        self._ino = st.st_ino
+        if st.st_size == self._offset:
+            return
+        with self.path.open("rb") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1  # solo líneas completas
+        for line in chunk[:end].splitlines():
+            self._apply_line(line)
+        self._offset += end
+
+    def _apply_line(self, line: bytes):
+        line = line.strip()
+        if not line:
+            return
+        try:
+            rec = json.loads(line)
+            self._index[rec["k"]] = (rec.get("v"), float(rec.get("t", 0)))
+            self._lines += 1
+        except Exception:
+            pass  # línea truncada (crash a mitad de append): se descarta
+
+    def _import_legacy(self):
+        # Migra el JSON antiguo {key: value} al formato log
+        try:
+            data = json.loads(self.legacy_json.read_text(encoding="utf-8"))  # type: ignore[union-attr]
+        except Exception:
+            return
+        now = time.time()
+        for k, v in (data or {}).items():
+            self._index[str(k)] = (v, now)
+        self._compact()
+
+    # ---------- API ----------
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            self._load()
+            hit = self._index.get(key)
+            return hit[0] if hit else None
+
+    def last(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(valor, timestamp wall-clock de la escritura) o None."""
+        with self._lock:
+            self._load()
+            return self._index.get(key)
+
+    def put(self, key: str, value: Any):
+        with self._lock, _file_lock(self.lock_path):
+            self._load(have_lock=True)
+            self._put_locked(key, value)
+
+    def claim(self, key: str, value: Any, *, cooldown_s: float = 0) -> bool:
+        """
+        Reserva atómica (entre hilos y procesos): devuelve True y registra `value`
+        solo si la clave no tenía ya ese valor y pasó `cooldown_s` desde la última escritura.
+        """
+        with self._lock, _file_lock(self.lock_path):
+            self._load(have_lock=True)
+            hit = self._index.get(key)
+            if hit is not None:
+                last_value, last_ts = hit
+                if last_value == value:
+                    return False
+                if cooldown_s and (time.time() - last_ts) < cooldown_s:
+                    return False
+            self._put_locked(key, value)
+            return True
+
+    def seen(self, key: str, value: Any) -> bool:
+        """True si `key` ya tenía `value`; si no, lo registra y devuelve False."""
+        return not self.claim(key, value)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._index)
+
+    # ---------- escritura / compactación (requieren el lock de archivo) ----------
+    def _put_locked(self, key: str, value: Any):
+        now = time.time()
+        rec = json.dumps({"k": key, "v": value, "t": round(now, 3)}, ensure_ascii=False)
+        data = (rec + "\n").encode("utf-8")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("ab") as f:
+                f.write(data)
+            self._offset += len(data)
+            self._lines += 1
+            if self._ino is None:
+                self._ino = self.path.stat().st_ino
+        except Exception as e:
+            print(f"⚠️ AlertLog: no pude escribir en {self.path.name}: {e}")
+        self._index[key] = (value, now)
+        if self._needs_compact():
+            self._compact()
+
+    def _needs_compact(self) -> bool:
+        if len(self._index) > self.max_entries:
+            return True
+        return self._lines > max(COMPACT_MIN_LINES, 2 * len(self._index))
+
+    def _compact(self):
+        cutoff = time.time() - self.max_age_s
+        items = [(k, v, t) for k, (v, t) in self._index.items() if t >= cutoff]
+        items.sort(key=lambda it: it[2])
+        items = items[-self.max_entries:]
+        self._index = {k: (v, t) for k, v, t in items}
+
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            body = "".join(
+                json.dumps({"k": k, "v": v, "t": round(t, 3)}, ensure_ascii=False) + "\n"
+                for k, v, t in items
+            ).encode("utf-8")
+            with tmp.open("wb") as f:
+                f.write(body)
+            os.replace(tmp, self.path)
+            st = self.path.stat()
+            self._ino, self._offset = st.st_ino, st.st_size
+            self._lines = len(items)
+        except Exception as e:
+            print(f"⚠️ AlertLog: compactación fallida ({self.path.name}): {e}")
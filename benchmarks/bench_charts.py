@@ -0,0 +1,90 @@
+# benchmarks/bench_charts.py
+"""
+Compara el renderer rápido (fastchart, NumPy + PIL) contra matplotlib en las
+dos gráficas del bot: /grafica (close) y rally_watch (close + EMAs + RSI);
+también mide el modo velas + volumen de /grafica con 500 velas.
+
+    python benchmarks/bench_charts.py [--n 10] [--bars 200]
+
+Mide la mediana de ms (render + codificación) y el pico de memoria Python
+(tracemalloc) por render. No usa chart_cache.
+"""
+from __future__ import annotations
+import argparse, math, os, statistics, sys, time, tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+import fastchart  # noqa: E402
+
+
+def _ohlcv(bars: int) -> pd.DataFrame:
+    ts = pd.date_range("2024-01-01", periods=bars, freq="4h", tz="UTC")
+    close = [100 + 10 * math.sin(i / 15) + i * 0.05 for i in range(bars)]
+    opens = [close[0]] + close[:-1]
+    return pd.DataFrame({
+        "open": opens,
+        "high": [max(o, c) * 1.01 for o, c in zip(opens, close)],
+        "low": [min(o, c) * 0.99 for o, c in zip(opens, close)],
+        "close": close,
+        "volume": [1000 + 500 * math.cos(i / 7) for i in range(bars)],
+    }, index=ts)
+
+
+def _bench(fn, n: int):
+    fn()  # warm-up (fuentes, imports de matplotlib)
+    ms, peak, size = [], 0, 0
+    for _ in range(n):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        enc = fn()
+        ms.append((time.perf_counter() - t0) * 1000.0)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        size = enc.size
+    return statistics.median(ms), peak / (1024 * 1024), size
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=10)
+    ap.add_argument("--bars", type=int, default=200)
+    args = ap.parse_args()
+
+    from comandos.grafica import render as G
+    from comandos.rally_watch import plotter as R
+
+    df = _ohlcv(args.bars)
+    rdf = df.reset_index().rename(columns={"index": "timestamp"})
+    title = "BTC/USDT @ BINANCE  •  4H"
+    candles = _ohlcv(500)
+
+    def using(renderer: str, fn):
+        def _run():
+            fastchart.CHART_RENDERER = renderer
+            return fn()
+        return _run
+
+    cases = [
+        ("grafica fast", using("fast", lambda: G._render_line(df, title))),
+        ("grafica mpl", using("mpl", lambda: G._render_line(df, title))),
+        ("rally fast", using("fast", lambda: R._render(rdf, "BTC-USD", "4h"))),
+        ("rally mpl", using("mpl", lambda: R._render(rdf, "BTC-USD", "4h"))),
+        ("velas+vol 500", lambda: G._render_candles(candles, title)),
+    ]
+    print(f"{args.bars} velas, n={args.n}")
+    for name, fn in cases:
+        try:
+            med, peak, size = _bench(fn, args.n)
+        except Exception as e:
+            print(f"  {name:<14} no disponible ({e})")
+            continue
+        print(f"  {name:<14} {med:7.1f} ms  pico {peak:6.1f} MB  {size / 1024:6.0f} KB")
+    fastchart.CHART_RENDERER = "fast"
+
+
+if __name__ == "__main__":
+    main()
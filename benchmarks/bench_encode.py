@@ -0,0 +1,95 @@
+# benchmarks/bench_encode.py
+"""
+Compara perfiles de codificación (ms y KB) sobre el panel y una gráfica sintética.
+
+    python benchmarks/bench_encode.py [--n 10]
+
+Sirve para elegir IMG_ENCODE_PANEL / IMG_ENCODE_CHART (ver image_encode.py).
+"""
+from __future__ import annotations
+import argparse, io, os, statistics, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from PIL import Image  # noqa: E402
+
+import image_encode  # noqa: E402
+
+CANDIDATES = [
+    ("png optimize (antes)", None),
+    ("png level 6", {"format": "png", "quantize": 0, "level": 6}),
+    ("png level 1", {"format": "png", "quantize": 0, "level": 1}),
+    ("paleta 256 level 6", {"format": "png", "quantize": 256, "level": 6}),
+    ("paleta 64 level 6", {"format": "png", "quantize": 64, "level": 6}),
+    ("webp q90", {"format": "webp", "quality": 90, "method": 4}),
+    ("webp lossless", {"format": "webp", "lossless": True, "method": 4}),
+]
+
+
+def _panel_image() -> Image.Image:
+    from comandos.panel import panel as P
+    layout = P._load_layout()
+    blocks = P._load_blocks(layout)
+    ctx = {"guild_id": 0, "channel_id": 0, "theme": "dark", "borders": True,
+           "cfg": {"symbol": "BTC/USDT", "exchange": "binance"}}
+    ctx["data"] = {k: None for k in P._collect_needs(blocks, ctx)}
+    P._draw_panel(layout, blocks, ctx)
+    return Image.open(io.BytesIO(ctx["encoded"].data)).convert("RGB")
+
+
+def _chart_image() -> Image.Image:
+    import math
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    xs = list(range(300))
+    ys = [100 + 10 * math.sin(i / 15) + i * 0.05 for i in xs]
+    fig = plt.figure(figsize=(8.5, 4.8), dpi=130)
+    ax = fig.add_subplot(111)
+    ax.plot(xs, ys)
+    ax.set_title("sintética")
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    plt.close(fig)
+    buf.seek(0)
+    return Image.open(buf).convert("RGB")
+
+
+def _bench(img: Image.Image, opts, n: int):
+    ms, size = [], 0
+    for _ in range(n):
+        t0 = time.perf_counter()
+        if opts is None:
+            buf = io.BytesIO()
+            img.save(buf, format="PNG", optimize=True)
+            size = buf.tell()
+        else:
+            image_encode.set_profile("bench", **opts)
+            size = image_encode.encode(img, "bench").size
+        ms.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(ms), size
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=10)
+    args = ap.parse_args()
+
+    for label, make in (("panel", _panel_image), ("gráfica", _chart_image)):
+        try:
+            img = make()
+        except Exception as e:
+            print(f"{label}: no disponible ({e})")
+            continue
+        print(f"\n{label} {img.size[0]}x{img.size[1]} (webp {'sí' if image_encode.WEBP_OK else 'no'})")
+        for name, opts in CANDIDATES:
+            if opts and opts["format"] == "webp" and not image_encode.WEBP_OK:
+                continue
+            med, size = _bench(img, opts, args.n)
+            print(f"  {name:<22} {med:7.1f} ms  {size / 1024:7.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_panel.py
+"""
+Benchmark del dibujo del panel (sin red).
+
+    python benchmarks/bench_panel.py [--n 30] [--theme dark] [--no-borders]
+
+Mide el coste por render de la fase de dibujo con y sin la capa estática
+cacheada. Los datos de mercado se sustituyen por None (los bloques dibujan N/A),
+así que solo cuenta la CPU de dibujo + codificación.
+"""
+from __future__ import annotations
+import argparse, os, statistics, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from comandos.panel import panel as P  # noqa: E402
+
+
+def _context(theme: str, borders: bool, blocks) -> dict:
+    ctx = {
+        "guild_id": 0,
+        "channel_id": 0,
+        "theme": theme,
+        "borders": borders,
+        "cfg": {"symbol": "BTC/USDT", "exchange": "binance"},
+    }
+    # Todas las necesidades resueltas a None: nada sale a la red
+    ctx["data"] = {k: None for k in P._collect_needs(blocks, ctx)}
+    return ctx
+
+
+def _bench(n: int, fn) -> list[float]:
+    fn()  # calentamiento (fuentes, módulos, capa estática)
+    out = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000.0)
+    return out
+
+
+def _report(label: str, xs: list[float]):
+    xs = sorted(xs)
+    p95 = xs[max(0, int(len(xs) * 0.95) - 1)]
+    print(f"{label:<22} media {statistics.mean(xs):7.1f} ms • p50 {statistics.median(xs):7.1f} ms • p95 {p95:7.1f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=30)
+    ap.add_argument("--theme", default="dark", choices=sorted(P.THEMES))
+    ap.add_argument("--no-borders", action="store_true")
+    args = ap.parse_args()
+
+    borders = not args.no_borders
+    layout = P._load_layout()
+    blocks = P._load_blocks(layout)
+    ctx = _context(args.theme, borders, blocks)
+
+    print(f"Panel {tuple(layout.get('size', P.DEFAULT_LAYOUT['size']))} • tema {args.theme} • bordes {'on' if borders else 'off'} • n={args.n}")
+    _report("sin capa estática", _bench(args.n, lambda: P._draw_panel(layout, blocks, ctx, use_static_cache=False)))
+    _report("con capa estática", _bench(args.n, lambda: P._draw_panel(layout, blocks, ctx, use_static_cache=True)))
+    _report("  solo fondo (draw)", _bench(args.n, lambda: P._draw_static(layout, args.theme, borders)))
+    _report("  solo fondo (copy)", _bench(args.n, lambda: P._static_base(layout, args.theme, borders)))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ from discord.ext import commands
 from command_ids import set_guild_command_id
 from dotenv import load_dotenv
 from comandos import setup_commands
+import monitor
 import inspect  # <-- para detectar si copy_global_to es coroutine o no
 
 load_dotenv()
@@ -11,6 +12,7 @@ TOKEN = os.getenv('TOKEN') or os.getenv('DISCORD_TOKEN')
 
 intents = discord.Intents.default()
 bot = commands.Bot(command_prefix='!', intents=intents)
+monitor.init(bot)  # el loop de escaneo necesita el bot para resolver canales
 
 async def _safe_copy_global_to(tree: discord.app_commands.CommandTree, guild: discord.Guild):
     """
@@ -0,0 +1,123 @@
+# chart_cache.py
+"""
+Cache de gráficas ya codificadas (/grafica y rally_watch).
+
+- Clave = quién/qué se dibuja + estado de la serie: (tipo, símbolo, exchange,
+  tf, estilo, perfil de codificación, n velas, ts y close de la última vela).
+  Mismas velas => mismos bytes; el nombre de archivo (con timestamp) no entra
+  en la clave, se arma aparte con `Encoded.filename`.
+- LRU con presupuesto de bytes (CHART_CACHE_MAX_BYTES) y tope de entradas.
+- `get_or_render` de-duplica renders concurrentes de la misma clave (dos clicks
+  seguidos en el mismo botón = un solo render).
+"""
+from __future__ import annotations
+import os, threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import image_encode
+from image_encode import Encoded
+
+CHART_CACHE_MAX_BYTES = int(os.getenv("CHART_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CHART_CACHE_MAX_ENTRIES = 256
+
+_lock = threading.Lock()
+_mem: "OrderedDict[Hashable, Encoded]" = OrderedDict()
+_bytes = 0
+_inflight: Dict[Hashable, threading.Event] = {}
+_stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+
+def series_state(df, col: str = "close") -> Tuple[Any, ...]:
+    """(n, ts última vela, último close): cambia con cada vela nueva o tick de la vela en curso."""
+    if df is None or len(df) == 0:
+        return (0, None, None)
+    if "timestamp" in getattr(df, "columns", ()):
+        last_ts = df["timestamp"].iloc[-1]
+    else:
+        last_ts = df.index[-1]
+    try:
+        last = float(df[col].iloc[-1])
+    except Exception:
+        last = None
+    return (len(df), str(last_ts), last)
+
+
+def make_key(kind: str, symbol: str, exchange: Optional[str], tf: str, df, *, style: str = "line",
+             profile: str = "chart", extra: Hashable = None) -> Hashable:
+    p = image_encode.profile(profile)
+    return (kind, symbol, (exchange or "").lower(), tf.lower(), style,
+            tuple(sorted(p.items())), extra) + series_state(df)
+
+
+# ---------- API ----------
+def get(key: Hashable) -> Optional[Encoded]:
+    with _lock:
+        enc = _mem.get(key)
+        if enc is not None:
+            _mem.move_to_end(key)
+        return enc
+
+
+def put(key: Hashable, enc: Encoded):
+    global _bytes
+    if enc.size > CHART_CACHE_MAX_BYTES:
+        return
+    with _lock:
+        old = _mem.pop(key, None)
+        if old is not None:
+            _bytes -= old.size
+        _mem[key] = enc
+        _bytes += enc.size
+        while _mem and (_bytes > CHART_CACHE_MAX_BYTES or len(_mem) > CHART_CACHE_MAX_ENTRIES):
+            _, ev = _mem.popitem(last=False)
+            _bytes -= ev.size
+            _stats["evicted"] += 1
+
+
+def get_or_render(key: Hashable, render: Callable[[], Encoded]) -> Encoded:
+    """Bytes cacheados o `render()` (bloqueante; llamar desde un hilo). Un solo render por clave."""
+    while True:
+        with _lock:
+            enc = _mem.get(key)
+            if enc is not None:
+                _mem.move_to_end(key)
+                _stats["hits"] += 1
+                return enc
+            ev = _inflight.get(key)
+            if ev is None:
+                ev = _inflight[key] = threading.Event()
+                _stats["misses"] += 1
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            ev.wait()
+            with _lock:
+                if key in _mem:
+                    continue
+            # el render del otro hilo falló: probamos nosotros
+            with _lock:
+                if _inflight.get(key) is ev:
+                    _inflight.pop(key, None)
+            continue
+        try:
+            enc = render()
+            put(key, enc)
+            return enc
+        finally:
+            with _lock:
+                _inflight.pop(key, None)
+            ev.set()
+
+
+def clear():
+    global _bytes
+    with _lock:
+        _mem.clear()
+        _bytes = 0
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return dict(_stats, entries=len(_mem), bytes=_bytes)
@@ -0,0 +1,219 @@
+# coingecko.py
+"""
+Cliente CoinGecko compartido (panel, rally_watch, …).
+
+- Un único requests.Session con pool de conexiones (keep-alive).
+- Presupuesto de peticiones compartido por todos los callers (token bucket):
+  CG_RATE_PER_MIN por minuto (free tier ≈ 10-30/min). Un 429 pausa el bucket
+  el tiempo de Retry-After para TODOS, en vez de que cada caller duerma y reintente.
+- Cache LRU acotada de respuestas (clave = ruta + params) con TTL por llamada.
+- Mapa persistente símbolo -> coin id (COINGECKO_IDS_PATH), semillado con los
+  pares más comunes y completado con /search (match exacto de símbolo).
+"""
+from __future__ import annotations
+import json, os, threading, time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+try:
+    import requests  # type: ignore
+    from requests.adapters import HTTPAdapter  # type: ignore
+    AVAILABLE = True
+except Exception:  # pragma: no cover
+    requests = None  # type: ignore
+    HTTPAdapter = None  # type: ignore
+    AVAILABLE = False
+
+API_BASE = os.getenv("COINGECKO_API_BASE", "https://api.coingecko.com/api/v3")
+RATE_PER_MIN = float(os.getenv("CG_RATE_PER_MIN", "10"))
+MAX_WAIT_S = float(os.getenv("CG_MAX_WAIT_S", "20"))     # espera máxima por presupuesto
+TIMEOUT_S = float(os.getenv("CG_HTTP_TIMEOUT_S", os.getenv("RALLY_HTTP_TIMEOUT_S", "8")))
+CACHE_MAX = 256
+DEFAULT_TTL = 60.0
+COINGECKO_IDS_PATH = Path("coingecko_ids.json")
+
+# Semilla: símbolos ambiguos en /search o muy usados en los canales
+SEED_IDS = {
+    "BTC": "bitcoin", "ETH": "ethereum", "SOL": "solana", "XRP": "ripple",
+    "DOGE": "dogecoin", "ADA": "cardano", "BNB": "binancecoin", "WIF": "dogwifcoin",
+    "BONK": "bonk", "PEPE": "pepe", "SHIB": "shiba-inu", "AVAX": "avalanche-2",
+    "LINK": "chainlink", "DOT": "polkadot", "MATIC": "matic-network", "USDT": "tether",
+    "USDC": "usd-coin", "LTC": "litecoin", "TRX": "tron", "SUI": "sui",
+}
+
+
+class RateBudgetExceeded(RuntimeError):
+    """No hubo presupuesto de peticiones dentro de la espera máxima."""
+
+
+# ---------- presupuesto compartido ----------
+class _Bucket:
+    def __init__(self, rate_per_min: float):
+        self.capacity = max(1.0, rate_per_min / 6.0)  # ráfaga ≈ 10 s de presupuesto
+        self.rate = rate_per_min / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait: float):
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                wait = max(0.0, self.blocked_until - now)
+                if wait == 0.0:
+                    if self.tokens >= 1.0:
+                        self.tokens -= 1.0
+                        return
+                    wait = (1.0 - self.tokens) / self.rate
+            if time.monotonic() + wait > deadline:
+                raise RateBudgetExceeded(f"CoinGecko: sin presupuesto (espera {wait:.0f}s)")
+            time.sleep(min(wait, 1.0))
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+_bucket = _Bucket(RATE_PER_MIN)
+
+# ---------- sesión ----------
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()  # type: ignore[union-attr]
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)  # type: ignore[misc]
+            s.mount("https://", adapter)
+            s.headers.update({"accept": "application/json", "User-Agent": "Mozilla/5.0 RallyWatch/1.0"})
+            api_key = os.getenv("COINGECKO_API_KEY") or os.getenv("CG_API_KEY")
+            if api_key:
+                s.headers["x-cg-pro-api-key"] = api_key
+            _session = s
+        return _session
+
+
+# ---------- cache LRU ----------
+_cache_lock = threading.Lock()
+_cache: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+
+def _cache_key(path: str, params: Optional[Dict[str, Any]]) -> Hashable:
+    return (path, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+
+
+def _cache_get(key: Hashable, ttl: float):
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is None:
+            return None
+        if time.time() - hit[0] > ttl:
+            _cache.pop(key, None)
+            return None
+        _cache.move_to_end(key)
+        return hit[1]
+
+
+def _cache_put(key: Hashable, value: Any):
+    with _cache_lock:
+        _cache[key] = (time.time(), value)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX:
+            _cache.popitem(last=False)
+
+
+# ---------- API ----------
+def get(path: str, params: Optional[Dict[str, Any]] = None, *, ttl: float = DEFAULT_TTL, max_wait: float = MAX_WAIT_S) -> Any:
+    """GET `path` (p. ej. "/search") con cache, presupuesto compartido y sesión pooled."""
+    if not AVAILABLE:
+        raise RuntimeError("CoinGecko: requests no está instalado")
+    key = _cache_key(path, params)
+    cached = _cache_get(key, ttl)
+    if cached is not None:
+        return cached
+
+    _bucket.acquire(max_wait)
+    r = _get_session().get(f"{API_BASE}{path}", params=params, timeout=TIMEOUT_S)
+    if r.status_code == 429:
+        try:
+            retry = float(r.headers.get("Retry-After", "60"))
+        except ValueError:
+            retry = 60.0
+        _bucket.pause(retry)
+    r.raise_for_status()
+    data = r.json()
+    _cache_put(key, data)
+    return data
+
+
+# ---------- mapa símbolo -> coin id ----------
+_ids_lock = threading.Lock()
+_ids: Optional[Dict[str, str]] = None
+
+
+def _load_ids() -> Dict[str, str]:
+    global _ids
+    if _ids is None:
+        ids = dict(SEED_IDS)
+        try:
+            ids.update(json.loads(COINGECKO_IDS_PATH.read_text(encoding="utf-8")))
+        except Exception:
+            pass
+        _ids = ids
+    return _ids
+
+
+def _save_ids():
+    try:
+        tmp = COINGECKO_IDS_PATH.with_suffix(".tmp")
+        tmp.write_text(json.dumps(_load_ids(), indent=2, sort_keys=True), encoding="utf-8")
+        tmp.replace(COINGECKO_IDS_PATH)
+    except Exception as e:
+        print(f"⚠️ coingecko: no pude guardar ids: {e}")
+
+
+def set_coin_id(symbol: str, coin_id: str):
+    with _ids_lock:
+        _load_ids()[symbol.strip().upper()] = coin_id
+        _save_ids()
+
+
+def coin_id(symbol: str) -> Optional[str]:
+    """Coin id de CoinGecko para un símbolo (WIF -> dogwifcoin). Persistido tras resolverlo."""
+    sym = symbol.strip().upper()
+    with _ids_lock:
+        hit = _load_ids().get(sym)
+    if hit:
+        return hit
+    try:
+        data = get("/search", {"query": sym}, ttl=24 * 3600) or {}
+    except Exception:
+        return None
+    coins = data.get("coins") or []
+    # /search viene ordenado por relevancia/market cap: primer match exacto de símbolo
+    best = next((c.get("id") for c in coins if (c.get("symbol") or "").upper() == sym and c.get("id")), None)
+    if not best:
+        best = next((c.get("id") for c in coins if (c.get("name") or "").lower().startswith(sym.lower()) and c.get("id")), None)
+    if best:
+        set_coin_id(sym, best)
+    return best
+
+
+def market_chart(cid: str, vs: str, days, *, interval: Optional[str] = None, ttl: float = DEFAULT_TTL) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"vs_currency": vs, "days": days}
+    if interval:
+        params["interval"] = interval
+    return get(f"/coins/{cid}/market_chart", params, ttl=ttl) or {}
+
+
+def ohlc(cid: str, vs: str, days, *, ttl: float = DEFAULT_TTL) -> list:
+    return get(f"/coins/{cid}/ohlc", {"vs_currency": vs, "days": days}, ttl=ttl) or []
@@ -1,15 +1,16 @@
 # comandos/grafica/__init__.py
 from discord import app_commands, Interaction, File, Embed
 from data_store import load_db, get_cfg
-from .render import fetch_ohlcv_df, render_png, get_last_price, get_change_24h_pct
-from .view import GraficaView
-from .utils import fmt_price, fmt_pct, color_pct, trend_emoji_from  # ← import utilidades
+from .view import GraficaView, build_chart_embed, load_chart, load_grid, revalidate_chart
+from .render import chart_ext
 import io, time
-from datetime import datetime, timezone
+import executors
 
 def setup(bot):
     @bot.tree.command(name="grafica", description="Muestra una gráfica del símbolo activo con botones de timeframes.")
-    async def grafica(interaction: Interaction):
+    @app_commands.describe(multi="Una imagen con todos los timeframes del canal")
+    async def grafica(interaction: Interaction, multi: bool = False):
+        executors.mark_interactive()
         db = load_db()
         cfg = get_cfg(db, interaction.guild_id, interaction.channel_id)
         symbol = cfg.get("symbol")
@@ -25,27 +26,30 @@ def setup(bot):
         await interaction.response.defer()  # evita 10062
 
         start_tf = cfg_tfs[0] if cfg_tfs else "4h"
+        view = GraficaView(symbol=symbol, exchange=exchange, timeframes=cfg_tfs, current_tf=start_tf)
 
         try:
-            df = fetch_ohlcv_df(exchange, symbol, start_tf, limit=200)
-            png = render_png(df, title=f"{symbol} @ {exchange.upper()}  •  {start_tf.upper()}")
+            if multi:
+                df, png, last, pct24, age = await load_grid(symbol, exchange, view.timeframes)
+                tf_label = " · ".join(t.upper() for t in view.timeframes)
+            else:
+                df, png, last, pct24, age = await load_chart(symbol, exchange, start_tf)
+                tf_label = start_tf
         except Exception as e:
             return await interaction.followup.send(f"⚠️ No pude generar la gráfica: `{e}`", ephemeral=True)
 
-        last = get_last_price(exchange, symbol)
-        pct24 = get_change_24h_pct(exchange, symbol)
-
-        fname = f"chart_{int(time.time())}.png"
+        fname = f"chart_{int(time.time())}.{chart_ext()}"
         file = File(io.BytesIO(png), filename=fname)
 
-        emb = Embed(title="📈 Gráfica", color=color_pct(pct24))
-        emb.description = (
-            f"**{symbol}** en **{exchange}**  •  TF **{start_tf.upper()}**\n"
-            f"**Precio:** {fmt_price(last)}   •   **24H:** {fmt_pct(pct24)}"
-        )
-        emb.set_image(url=f"attachment://{fname}")
-        emb.timestamp = datetime.now(timezone.utc)
-        emb.set_footer(text=f"{trend_emoji_from(pct24, df)} • actualizado")
-
-        view = GraficaView(symbol=symbol, exchange=exchange, timeframes=cfg_tfs, current_tf=start_tf)
-        await interaction.followup.send(embed=emb, file=file, view=view)
+        emb = build_chart_embed(Embed(title="📈 Gráfica"), symbol=symbol, exchange=exchange, tf=tf_label,
+                                df=df, last=last, pct24=pct24, age=age, fname=fname,
+                                refresh_tf=None if multi else start_tf)
+
+        if multi:
+            view.grid = True
+            view._rebuild_buttons()
+        msg = await interaction.followup.send(embed=emb, file=file, view=view)
+        if multi:
+            return
+        view.prefetch_siblings()  # los demás timeframes quedan listos en cache
+        await revalidate_chart(msg, view, view.current_tf)
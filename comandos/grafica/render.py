@@ -1,12 +1,65 @@
 # comandos/grafica/render.py
 import ccxt, pandas as pd
+import threading, time
 from datetime import datetime, timezone
+from swr_cache import SWRCache
+import image_encode
+import chart_cache
+import fastchart
+import downsample
+import executors
+
+# Markets cargados una vez por exchange (load_markets es la llamada más cara).
+# Las instancias ccxt no son thread-safe (sesión, rate limit, nonce): cada hilo
+# del pool tiene la suya, inicializada con los markets compartidos.
+MARKETS_TTL = 3600
+_MARKETS: dict = {}          # nombre -> (ts, markets, currencies)
+_EX_LOCK = threading.Lock()
+_LOAD_LOCKS: dict = {}
+_local = threading.local()
+
+def _markets_cached(name: str):
+    """(markets, currencies) si están cargados y vigentes; no llama al exchange."""
+    with _EX_LOCK:
+        hit = _MARKETS.get(name)
+    if hit and time.time() - hit[0] < MARKETS_TTL:
+        return hit[1], hit[2]
+    return None
+
+def _markets_of(name: str):
+    hit = _markets_cached(name)
+    if hit:
+        return hit
+    with _EX_LOCK:
+        lk = _LOAD_LOCKS.setdefault(name, threading.Lock())
+    with lk:  # un solo load_markets por exchange aunque lo pidan varios hilos
+        hit = _markets_cached(name)
+        if hit:
+            return hit
+        ex = getattr(ccxt, name)()
+        ex.load_markets()
+        with _EX_LOCK:
+            _MARKETS[name] = (time.time(), ex.markets, ex.currencies)
+        return ex.markets, ex.currencies
 
 def _exchange_of(name: str):
+    markets, currencies = _markets_of(name)
+    mine = getattr(_local, "ex", None)
+    if mine is None:
+        mine = _local.ex = {}
+    hit = mine.get(name)
+    if hit is not None and hit[0] is markets:
+        return hit[1]
     ex = getattr(ccxt, name)()
-    ex.load_markets()
+    ex.set_markets(markets, currencies)
+    mine[name] = (markets, ex)
     return ex
 
+# Caches stale-while-revalidate para comandos interactivos (límites duros por tipo)
+TICKERS = SWRCache("tickers", fresh_ttl=15, max_stale=300)
+OHLCV = SWRCache("ohlcv", fresh_ttl=60, max_stale=900, max_entries=128)
+METRICS = SWRCache("metrics", fresh_ttl=60, max_stale=600)
+
 def fetch_ohlcv_df(exchange_name: str, symbol: str, timeframe: str, limit: int = 200) -> pd.DataFrame:
     ex = _exchange_of(exchange_name)
     if symbol not in ex.markets:
@@ -65,26 +118,123 @@ def get_day_open_utc(exchange_name: str, symbol: str) -> float | None:
     except Exception:
         return None
 
-def render_png(df: pd.DataFrame, title: str) -> bytes:
+def chart_ext() -> str:
+    """Extensión de los archivos de gráfica según el perfil "chart" de image_encode."""
+    return image_encode.ext_for("chart")
+
+def line_image(df: pd.DataFrame, title: str, size=(1105, 624), xlabel: str = "Tiempo (UTC)"):
+    """PIL.Image de la línea de close (renderer rápido)."""
+    return fastchart.render(
+        [fastchart.Pane([fastchart.Series(df["close"].to_numpy(), "Close")], ylabel="Precio")],
+        n=len(df), title=title, xlabel=xlabel,
+        xticks=fastchart.time_ticks(df.index, "%m-%d %H:%M", count=6 if size[0] > 700 else 3), size=size,
+    )
+
+def _render_line(df: pd.DataFrame, title: str) -> image_encode.Encoded:
+    if fastchart.use_fast():
+        return image_encode.encode(line_image(df, title), "chart")
+    return _render_line_mpl(df, title)
+
+def _render_line_mpl(df: pd.DataFrame, title: str) -> image_encode.Encoded:
     try:
-        import matplotlib
-        matplotlib.use("Agg")
-        import matplotlib.pyplot as plt
-    except Exception as e:
+        import mpl_templates
+        with mpl_templates.checkout("line") as t:
+            mpl_templates.update_line(t, df.index, df["close"], title=title)
+            return image_encode.encode_figure(t.fig, "chart")
+    except ImportError as e:
         raise RuntimeError("Se requiere matplotlib para renderizar la gráfica (pip install matplotlib)") from e
 
-    fig = plt.figure(figsize=(8.5, 4.8), dpi=130)
-    ax = fig.add_subplot(111)
-
-    ax.plot(df.index, df["close"])
-    ax.set_title(title)
-    ax.set_xlabel("Tiempo (UTC)")
-    ax.set_ylabel("Precio")
-    fig.autofmt_xdate()
-
-    import io
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png", bbox_inches="tight")
-    plt.close(fig)
-    buf.seek(0)
-    return buf.read()
+def candles_image(df: pd.DataFrame, title: str, size=(1105, 680), xlabel: str = "Tiempo (UTC)"):
+    """PIL.Image de velas + volumen (coordenadas NumPy, primitivas PIL)."""
+    # ≥ 3 px por vela: con series largas se agrupan velas contiguas
+    o, h, l, c, v, starts = downsample.ohlc_buckets(df["open"], df["high"], df["low"], df["close"],
+                                                   df["volume"], max(10, (size[0] - 100) // 3))
+    stamps = df.index[starts]
+    img = fastchart.render(
+        [
+            fastchart.Pane([], weight=3, ylabel="Precio", ohlc=(o, h, l, c)),
+            fastchart.Pane([], weight=1, ylabel="Volumen", bars=v, bar_up=(c >= o)),
+        ],
+        n=len(c), title=title, xlabel=xlabel,
+        xticks=fastchart.time_ticks(stamps, "%m-%d %H:%M", count=6 if size[0] > 700 else 3), size=size,
+    )
+    return img
+
+def _render_candles(df: pd.DataFrame, title: str) -> image_encode.Encoded:
+    return image_encode.encode(candles_image(df, title), "chart")
+
+# Estilos de /grafica -> renderer
+STYLES = {
+    "line": _render_line,
+    "candles": _render_candles,
+}
+
+def render_png(df: pd.DataFrame, title: str, *, symbol: str | None = None, exchange: str | None = None,
+               tf: str | None = None, style: str = "line") -> bytes:
+    """
+    Bytes de la gráfica. Con symbol/exchange/tf se sirve de chart_cache si las
+    velas no cambiaron (mismo botón dos veces = un solo render).
+    style: "line" (close) | "candles" (velas + volumen, siempre camino rápido).
+    """
+    render = STYLES.get(style, _render_line)
+    if not (symbol and exchange and tf):
+        return render(df, title).data
+    extra = (title, float(df["volume"].iloc[-1])) if style == "candles" and len(df) else title  # la vela en curso suma volumen
+    key = chart_cache.make_key("grafica", symbol, exchange, tf, df, style=f"{style}:{fastchart.CHART_RENDERER}", extra=extra)
+    return chart_cache.get_or_render(key, lambda: render(df, title)).data
+
+# ---------- Grid multi-timeframe ----------
+GRID_COLS = 2
+GRID_CELL = (620, 380)          # px por timeframe
+
+def _grid_image(frames: list, title: str, style: str) -> image_encode.Encoded:
+    from PIL import Image, ImageDraw
+    draw_one = candles_image if style == "candles" else line_image
+    # Un panel por timeframe, dibujados en paralelo en el pool "cpu" (este hilo ya es
+    # del pool "render": no se encola en el mismo pool para no bloquearlo)
+    futs = [executors.submit(executors.CPU, draw_one, df, tf.upper(), GRID_CELL, "") for tf, df in frames]
+    cells = [f.result() for f in futs]
+
+    cols = min(GRID_COLS, len(cells)) or 1
+    rows = (len(cells) + cols - 1) // cols
+    head = 36
+    grid = Image.new("RGB", (cols * GRID_CELL[0], head + rows * GRID_CELL[1]), fastchart.STYLE["bg"])
+    d = ImageDraw.Draw(grid)
+    f = fastchart._font(16)
+    tw = d.textbbox((0, 0), title, font=f)[2]
+    d.text(((grid.width - tw) // 2, 9), title, fill=fastchart.STYLE["fg"], font=f)
+    for i, cell in enumerate(cells):
+        grid.paste(cell, ((i % cols) * GRID_CELL[0], head + (i // cols) * GRID_CELL[1]))
+    return image_encode.encode(grid, "chart")
+
+def render_grid_png(frames: list, title: str, *, symbol: str, exchange: str, style: str = "line") -> bytes:
+    """
+    Una imagen con un panel por timeframe. frames: [(tf, df)] en orden.
+    Siempre con el renderer rápido; cacheada por el estado de todas las series.
+    """
+    tfs = "+".join(tf for tf, _ in frames)
+    states = tuple(chart_cache.series_state(df) for _, df in frames)
+    key = chart_cache.make_key("grafica_grid", symbol, exchange, tfs, None, style=style, extra=(title, states))
+    return chart_cache.get_or_render(key, lambda: _grid_image(frames, title, style)).data
+
+# ---------- Accesos cacheados (async, stale-while-revalidate) ----------
+async def last_price_swr(exchange_name: str, symbol: str, *, wait_timeout: float | None = None):
+    """(precio, edad_s). Refresca en segundo plano si está viejo."""
+    return await TICKERS.get(("last", exchange_name, symbol), lambda: get_last_price(exchange_name, symbol), wait_timeout=wait_timeout)
+
+async def change_24h_swr(exchange_name: str, symbol: str, *, wait_timeout: float | None = None):
+    return await METRICS.get(("pct24", exchange_name, symbol), lambda: get_change_24h_pct(exchange_name, symbol), wait_timeout=wait_timeout)
+
+async def ohlcv_swr(exchange_name: str, symbol: str, timeframe: str, limit: int = 200, *, wait_timeout: float | None = None):
+    return await OHLCV.get(
+        ("ohlcv", exchange_name, symbol, timeframe, limit),
+        lambda: fetch_ohlcv_df(exchange_name, symbol, timeframe, limit=limit),
+        wait_timeout=wait_timeout,
+    )
+
+def pending_refreshes(exchange_name: str, symbol: str, timeframe: str | None = None, limit: int = 200) -> list:
+    """Tareas de refresco en curso para este par (para re-editar el mensaje al terminar)."""
+    keys = [(TICKERS, ("last", exchange_name, symbol)), (METRICS, ("pct24", exchange_name, symbol))]
+    if timeframe:
+        keys.append((OHLCV, ("ohlcv", exchange_name, symbol, timeframe, limit)))
+    return [t for t in (c.inflight(k) for c, k in keys) if t is not None]
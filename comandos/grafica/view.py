@@ -1,16 +1,122 @@
 
 # comandos/grafica/view.py
-import io, time, traceback
+import asyncio, io, time, traceback
 import discord
 from discord import File, Embed, Interaction
 from discord.ui import View
 from datetime import datetime, timezone
-from .render import fetch_ohlcv_df, render_png, get_last_price, get_change_24h_pct
+from swr_cache import fmt_age
+import executors
+from .render import render_png, render_grid_png, chart_ext, ohlcv_swr, last_price_swr, change_24h_swr, pending_refreshes
 from .utils import fmt_price, fmt_pct, color_pct, trend_emoji_from  # ← utilidades
 
+CHART_LIMIT = 200
+PREFETCH_CONCURRENCY = 2   # fetch+render de timeframes vecinos en paralelo (global)
+PREFETCH_TTL = 60          # s; no se repite el prefetch de un (tf, estilo) antes (= fresh_ttl de OHLCV)
+
+_prefetch_sem: asyncio.Semaphore | None = None
+
+async def _or_none(coro):
+    try:
+        return await coro
+    except Exception:
+        return (None, None)
+
+STYLE_LABELS = {"line": "📈 Línea", "candles": "🕯️ Velas"}
+
+async def load_chart(symbol: str, exchange: str, tf: str, style: str = "line"):
+    """
+    Baja (o toma de la cache SWR) velas, precio y 24H en paralelo y renderiza.
+    Devuelve (df, png, last, pct24, edad_de_las_velas).
+    """
+    (df, age), (last, _), (pct24, _) = await asyncio.gather(
+        ohlcv_swr(exchange, symbol, tf, CHART_LIMIT),
+        _or_none(last_price_swr(exchange, symbol)),
+        _or_none(change_24h_swr(exchange, symbol)),
+    )
+    png = await executors.run(executors.RENDER, render_png, df, f"{symbol} @ {exchange.upper()}  •  {tf.upper()}",
+                                symbol=symbol, exchange=exchange, tf=tf, style=style)
+    return df, png, last, pct24, age
+
+async def load_grid(symbol: str, exchange: str, tfs: list[str], style: str = "line"):
+    """
+    Multi-timeframe: todas las velas a la vez (SWR), un panel por tf dibujado en
+    paralelo y compuesto en una imagen. Devuelve (df_del_primer_tf, png, last, pct24, edad_max).
+    """
+    results = await asyncio.gather(
+        *(ohlcv_swr(exchange, symbol, tf, CHART_LIMIT) for tf in tfs),
+        _or_none(last_price_swr(exchange, symbol)),
+        _or_none(change_24h_swr(exchange, symbol)),
+        return_exceptions=True,
+    )
+    *frames_raw, (last, _), (pct24, _) = results
+    frames, ages = [], []
+    for tf, r in zip(tfs, frames_raw):
+        if isinstance(r, BaseException) or r[0] is None or len(r[0]) == 0:
+            continue
+        frames.append((tf, r[0]))
+        ages.append(r[1] or 0)
+    if not frames:
+        raise RuntimeError("sin velas para ningún timeframe")
+    png = await executors.run(executors.RENDER, render_grid_png, frames, f"{symbol} @ {exchange.upper()}",
+                                  symbol=symbol, exchange=exchange, style=style)
+    return frames[0][1], png, last, pct24, max(ages)
+
+def build_chart_embed(emb: Embed, *, symbol: str, exchange: str, tf: str, df, last, pct24, age, fname: str,
+                      refresh_tf: str | None = None) -> Embed:
+    """`refresh_tf`: timeframe cuyo refresco en curso se anuncia en el footer (None en grids)."""
+    emb.color = color_pct(pct24)
+    emb.description = (
+        f"**{symbol}** en **{exchange}**  •  TF **{tf.upper()}**\n"
+        f"**Precio:** {fmt_price(last)}   •   **24H:** {fmt_pct(pct24)}"
+    )
+    emb.set_image(url=f"attachment://{fname}")
+    emb.timestamp = datetime.now(timezone.utc)
+    footer = f"{trend_emoji_from(pct24, df)} • actualizado"
+    if age is not None and age >= 1:
+        footer += f" • datos de hace {fmt_age(age)}"
+        if refresh_tf and pending_refreshes(exchange, symbol, refresh_tf, CHART_LIMIT):
+            footer += " (refrescando…)"
+    emb.set_footer(text=footer)
+    return emb
+
+async def revalidate_chart(message: discord.Message, view: "GraficaView", tf: str):
+    """Si quedaron refrescos en segundo plano, re-edita el mensaje con datos nuevos."""
+    pending = pending_refreshes(view.exchange, view.symbol, tf, CHART_LIMIT)
+    if not pending:
+        return
+    await asyncio.gather(*pending, return_exceptions=True)
+    if view.current_tf != tf:
+        return  # el usuario ya cambió de timeframe
+    try:
+        df, png, last, pct24, age = await load_chart(view.symbol, view.exchange, tf, view.style)
+        fname = f"chart_{int(time.time())}.{chart_ext()}"
+        emb = message.embeds[0] if message.embeds else Embed(title="📈 Gráfica")
+        emb = build_chart_embed(emb, symbol=view.symbol, exchange=view.exchange, tf=tf,
+                                df=df, last=last, pct24=pct24, age=age, fname=fname, refresh_tf=tf)
+        await message.edit(embed=emb, attachments=[File(io.BytesIO(png), filename=fname)], view=view)
+    except Exception as e:
+        print(f"[grafica view] revalidate error: {e}")
+
+async def _prefetch_one(symbol: str, exchange: str, tf: str, style: str):
+    """Deja velas, tickers y PNG en las caches (SWR + chart_cache) para que el botón sea instantáneo."""
+    global _prefetch_sem
+    if _prefetch_sem is None:
+        _prefetch_sem = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+    executors.mark_background()  # la tarea nace dentro de un handler interactivo
+    async with _prefetch_sem:
+        t0 = time.perf_counter()
+        try:
+            await load_chart(symbol, exchange, tf, style)
+            print(f"[grafica view] prefetch {symbol} {tf} {style} en {(time.perf_counter() - t0) * 1000:.0f} ms")
+        except Exception as e:
+            print(f"[grafica view] prefetch {symbol} {tf} falló: {e}")
+
 class GraficaView(View):
-    def __init__(self, symbol: str, exchange: str, timeframes: list[str], current_tf: str):
+    def __init__(self, symbol: str, exchange: str, timeframes: list[str], current_tf: str, style: str = "line"):
         super().__init__(timeout=600)
+        self.style = style if style in STYLE_LABELS else "line"
+        self.grid = False  # True = una imagen con todos los timeframes
         self.symbol = symbol
         self.exchange = exchange
         seen = set()
@@ -18,8 +124,26 @@ class GraficaView(View):
         if not self.timeframes:
             self.timeframes = ["4h", "1d", "1w"]
         self.current_tf = (current_tf or self.timeframes[0]).lower()
+        self._prefetch: dict = {}  # (tf, estilo) -> (task, iniciado)
         self._rebuild_buttons()
 
+    def prefetch_siblings(self):
+        """Tras enviar/editar: fetch + render en segundo plano de los otros timeframes."""
+        now = time.time()
+        for tf in self.timeframes:
+            if tf == self.current_tf:
+                continue
+            key = (tf, self.style)
+            prev = self._prefetch.get(key)
+            if prev is not None and (not prev[0].done() or now - prev[1] < PREFETCH_TTL):
+                continue
+            self._prefetch[key] = (asyncio.create_task(_prefetch_one(self.symbol, self.exchange, tf, self.style)), now)
+
+    async def on_timeout(self):
+        for task, _ in self._prefetch.values():
+            task.cancel()
+        self._prefetch.clear()
+
     def _rebuild_buttons(self):
         self.clear_items()
         for tf in self.timeframes:
@@ -32,37 +156,58 @@ class GraficaView(View):
             btn.callback = _cb
             self.add_item(btn)
 
-    async def _refresh_chart(self, interaction: Interaction, tf: str):
+        # Alterna línea <-> velas (el label muestra el modo al que se cambia)
+        other = "candles" if self.style == "line" else "line"
+        mode_btn = discord.ui.Button(label=STYLE_LABELS[other], style=discord.ButtonStyle.success, row=1)
+
+        async def _mode_cb(interaction: Interaction, _style=other):
+            self.style = _style
+            await self._refresh_chart(interaction, self.current_tf, grid=self.grid)
+
+        mode_btn.callback = _mode_cb
+        self.add_item(mode_btn)
+
+        grid_btn = discord.ui.Button(label="🖼️ Una TF" if self.grid else "🧩 Multi-TF",
+                                     style=discord.ButtonStyle.success, row=1)
+
+        async def _grid_cb(interaction: Interaction):
+            await self._refresh_chart(interaction, self.current_tf, grid=not self.grid)
+
+        grid_btn.callback = _grid_cb
+        self.add_item(grid_btn)
+
+    async def _refresh_chart(self, interaction: Interaction, tf: str, grid: bool = False):
+        executors.mark_interactive()
         try:
             await interaction.response.defer()
 
-            df = fetch_ohlcv_df(self.exchange, self.symbol, tf, limit=200)
-            png = render_png(df, title=f"{self.symbol} @ {self.exchange.upper()}  •  {tf.upper()}")
-            fname = f"chart_{int(time.time())}.png"
+            if grid:
+                df, png, last, pct24, age = await load_grid(self.symbol, self.exchange, self.timeframes, self.style)
+                tf_label = " · ".join(t.upper() for t in self.timeframes)
+            else:
+                df, png, last, pct24, age = await load_chart(self.symbol, self.exchange, tf, self.style)
+                tf_label = tf
+            fname = f"chart_{int(time.time())}.{chart_ext()}"
             file = File(io.BytesIO(png), filename=fname)
 
-            last = get_last_price(self.exchange, self.symbol)
-            pct24 = get_change_24h_pct(self.exchange, self.symbol)
-
             emb = interaction.message.embeds[0] if interaction.message.embeds else Embed(title="📈 Gráfica")
-            emb.color = color_pct(pct24)
-            emb.description = (
-                f"**{self.symbol}** en **{self.exchange}**  •  TF **{tf.upper()}**\n"
-                f"**Precio:** {fmt_price(last)}   •   **24H:** {fmt_pct(pct24)}"
-            )
-            emb.set_image(url=f"attachment://{fname}")
-            emb.timestamp = datetime.now(timezone.utc)
-            emb.set_footer(text=f"{trend_emoji_from(pct24, df)} • actualizado")
+            emb = build_chart_embed(emb, symbol=self.symbol, exchange=self.exchange, tf=tf_label,
+                                    df=df, last=last, pct24=pct24, age=age, fname=fname,
+                                    refresh_tf=None if grid else tf)
 
             self.current_tf = tf.lower()
+            self.grid = grid
             self._rebuild_buttons()
 
-            await interaction.followup.edit_message(
+            msg = await interaction.followup.edit_message(
                 message_id=interaction.message.id,
                 embed=emb,
                 attachments=[file],
                 view=self
             )
+            if not grid:
+                self.prefetch_siblings()
+                await revalidate_chart(msg, self, self.current_tf)
         except Exception as e:
             print(f"[grafica view] error: {e}\n{traceback.format_exc()}")
             try:
@@ -4,6 +4,7 @@ from data_store import load_db, get_cfg
 from comandos.grafica.render import fetch_ohlcv_df  # reutilizamos tu fetch
 from comandos.grafica.utils import fmt_price, fmt_pct, color_pct  # formateadores
 from indicadores.core import compute_all_indicators, latest_values
+import snapshots
 from datetime import datetime, timezone
 
 MAX_TFS = 5  # por si el canal tiene muchos timeframes
@@ -31,9 +32,13 @@ def setup(bot):
         embeds = []
         for tf in tfs:
             try:
-                df = fetch_ohlcv_df(exchange, symbol, tf, limit=300)
-                df = compute_all_indicators(df)
-                vals = latest_values(df)
+                # Snapshot del scanner si está fresco; si no, cálculo en el momento
+                vals = snapshots.latest(exchange, symbol, tf)
+                snap_age = snapshots.age(exchange, symbol, tf) if vals else None
+                if vals is None:
+                    df = fetch_ohlcv_df(exchange, symbol, tf, limit=300)
+                    df = compute_all_indicators(df)
+                    vals = latest_values(df)
 
                 emb = Embed(
                     title=f"📊 Indicadores — {tf.upper()}",
@@ -61,7 +66,7 @@ def setup(bot):
                 )
                 emb.add_field(name="📉 MACD (12,26,9)", value=macd_txt, inline=False)
 
-                emb.set_footer(text="Actualizado")
+                emb.set_footer(text=f"Snapshot del scanner (hace {int(snap_age)}s)" if snap_age is not None else "Actualizado")
                 emb.timestamp = datetime.now(timezone.utc)
                 embeds.append(emb)
             except Exception as e:
@@ -1,11 +1,23 @@
 # comandos/info/__init__.py
 from discord import app_commands, Interaction, Embed
 from data_store import load_db, get_cfg
-from comandos.grafica.render import get_last_price, get_change_24h_pct
+import asyncio
+from comandos.grafica.render import METRICS, change_24h_swr, last_price_swr
 from comandos.grafica.utils import fmt_price, fmt_pct, color_pct
 from .view import InfoView
 from .metrics import compute_volatility_24h, refine_params_by_vol
 from datetime import datetime, timezone
+import snapshots
+
+async def _swr_or_none(src, default=None):
+    """Normaliza a (valor, edad): acepta una tupla ya resuelta o una corrutina SWR."""
+    if isinstance(src, tuple):
+        return src
+    try:
+        value, age = await src
+        return (default if value is None else value), age
+    except Exception:
+        return default, None
 
 def _recommend_by_price(last_price: float | None) -> tuple[float, float, str]:
     if last_price is None:
@@ -36,10 +48,16 @@ def setup(bot):
 
         await interaction.response.defer()
 
-        # Datos de mercado
-        last = get_last_price(exchange, symbol)
-        pct24 = get_change_24h_pct(exchange, symbol)
-        sigma24, range24 = compute_volatility_24h(exchange, symbol)
+        # Datos de mercado: en paralelo y desde cache SWR (precio del scanner si existe)
+        snap = snapshots.latest_price(exchange, symbol)
+        (last, _), (pct24, _), ((sigma24, range24), _) = await asyncio.gather(
+            _swr_or_none(snap) if snap else _swr_or_none(last_price_swr(exchange, symbol)),
+            _swr_or_none(change_24h_swr(exchange, symbol)),
+            _swr_or_none(
+                METRICS.get(("vol24", exchange, symbol), lambda: compute_volatility_24h(exchange, symbol)),
+                default=(None, None),
+            ),
+        )
 
         # Base por precio y refinamiento por volatilidad
         base_zz, base_tol, tier = _recommend_by_price(last)
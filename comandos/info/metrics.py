@@ -3,6 +3,7 @@ from __future__ import annotations
 import math
 import pandas as pd
 from comandos.grafica.render import fetch_ohlcv_df
+import snapshots
 
 def compute_volatility_24h(exchange: str, symbol: str) -> tuple[float | None, float | None]:
     """
@@ -11,7 +12,10 @@ def compute_volatility_24h(exchange: str, symbol: str) -> tuple[float | None, fl
       - range_pct: (max_high - min_low) / mid * 100 en 24h
     """
     try:
-        df1h = fetch_ohlcv_df(exchange, symbol, "1h", limit=28)  # un poco más que 24
+        # 1h del scanner si el canal lo monitorea; si no, bajamos velas
+        df1h = snapshots.frame(exchange, symbol, "1h", min_rows=25)
+        if df1h is None:
+            df1h = fetch_ohlcv_df(exchange, symbol, "1h", limit=28)  # un poco más que 24
         if len(df1h) < 25:
             return (None, None)
 
@@ -4,13 +4,23 @@ import io
 import discord
 from discord import app_commands, Interaction, Embed, File
 from datetime import datetime, timezone
-from data_store import load_db, get_cfg, set_channel_param
-from .panel import render_panel_image
+from data_store import load_db, get_cfg
+import monitor
+import executors
+from swr_cache import fmt_age
+from .panel import fmt_timings
+from . import cache as panel_cache
+from . import live as panel_live
 from .view import PanelView
 
 def setup(bot):
+    # Pre-render en cada vela nueva que vea el scanner
+    monitor.on_new_candle(panel_cache.on_new_candle)
+    monitor.on_new_candle(panel_live.on_new_candle)
+
     @bot.tree.command(name="panel", description="Muestra el panel visual del canal (imagen con bloques).")
     async def panel(interaction: Interaction):
+        executors.mark_interactive()
         db = load_db()
         cfg = get_cfg(db, interaction.guild_id, interaction.channel_id)
         theme = cfg.get("panel_theme", "dark")  # 'dark' | 'light'
@@ -28,9 +38,11 @@ def setup(bot):
             pass
 
         try:
-            img_bytes = render_panel_image(interaction.guild_id, interaction.channel_id, theme=theme, borders=borders)
-            filename = f"panel_{interaction.channel_id}_{theme}_{'b' if borders else 'nb'}.png"
-            file = File(io.BytesIO(img_bytes), filename=filename)
+            entry, hit = await panel_cache.render_cached(interaction.guild_id, interaction.channel_id, theme=theme, borders=borders)
+            if not hit:
+                print(f"🖼️ /panel {interaction.channel_id}: {fmt_timings(entry.timings)}")
+            filename = f"panel_{interaction.channel_id}_{theme}_{'b' if borders else 'nb'}.{entry.ext}"
+            file = File(io.BytesIO(entry.data), filename=filename)
 
             emb = Embed(
                 title="📊 Panel",
@@ -39,6 +51,7 @@ def setup(bot):
                 timestamp=datetime.now(timezone.utc),
             )
             emb.set_image(url=f"attachment://{filename}")
+            emb.set_footer(text=f"Pre-renderizado hace {fmt_age(entry.age)}" if hit else fmt_timings(entry.timings))
             view = PanelView(theme=theme, borders=borders)
 
             await interaction.followup.send(embed=emb, file=file, view=view)
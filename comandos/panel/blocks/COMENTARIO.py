@@ -1,11 +1,10 @@
 # comandos/panel/blocks/COMENTARIO.py
-from PIL import ImageDraw, ImageFont
+from PIL import ImageDraw
+from comandos.panel.fonts import font as _font
 
-def _font(size=18):
-    try:
-        return ImageFont.truetype("DejaVuSans.ttf", size)
-    except:
-        return ImageFont.load_default()
+def content_key(context):
+    # Solo título fijo: el tile no cambia entre renders
+    return "static"
 
 def render(draw: ImageDraw.ImageDraw, rect, theme, context):
     x, y, w, h = rect
@@ -5,9 +5,12 @@ from typing import Optional
 
 from PIL import ImageDraw, ImageFont
 
-from comandos.grafica.render import get_change_24h_pct, get_last_price
+from comandos.grafica.render import METRICS, TICKERS, get_change_24h_pct, get_last_price
 from comandos.grafica.utils import fmt_pct, fmt_price
-from data_store import get_cfg, load_db
+from data_store import read_cfg
+import snapshots
+from comandos.panel.prefetch import prefetched
+from comandos.panel import fonts
 
 # ================== CONFIGURABLE (edita a tu gusto) ==================
 TITLE = {
@@ -40,30 +43,15 @@ RIGHT = {
 
 
 def _font(size=18):
-    # Usa DejaVu (incluida con Pillow) para que escale bien. Fallbacks si no está.
-    try:
-        return ImageFont.truetype("DejaVuSans.ttf", size)
-    except Exception:
-        for name in ("arial.ttf", "SegoeUI.ttf", "Arial.ttf"):
-            try:
-                return ImageFont.truetype(name, size)
-            except Exception:
-                continue
-        return ImageFont.load_default()
+    return fonts.font(size)
 
 
 def _font_italic(size=18):
-    for name in ("DejaVuSans-Oblique.ttf", "ariali.ttf", "Arial Italic"):
-        try:
-            return ImageFont.truetype(name, size)
-        except Exception:
-            continue
-    return _font(size)
+    return fonts.font(size, "italic")
 
 
 def _text_size(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont):
-    box = draw.textbbox((0, 0), text, font=font)
-    return (box[2] - box[0], box[3] - box[1])
+    return fonts.text_size(text, font)
 
 
 def _fmt_pct_str(pct: Optional[float]) -> str:
@@ -92,14 +80,66 @@ def _derive_name(symbol: str) -> str:
     return symbol
 
 
+def _cfg_of(context) -> dict:
+    if "cfg" in context:
+        return context.get("cfg") or {}
+    return read_cfg(context.get("guild_id"), context.get("channel_id")) or {}
+
+
+def _load_last(exchange: str, symbol: str) -> Optional[float]:
+    # Snapshot del scanner primero; si no, el mismo ticker cacheado que /grafica
+    # (misma clave que last_price_swr; el fetch cae a exchange en minúsculas)
+    snap = snapshots.latest_price(exchange, symbol)
+    if snap is not None:
+        return snap[0]
+
+    def _fetch():
+        try:
+            return get_last_price(exchange, symbol)
+        except Exception:
+            return get_last_price(str(exchange).lower(), symbol)
+
+    return TICKERS.get_blocking(("last", exchange, symbol), _fetch)
+
+
+def _load_pct24(exchange: str, symbol: str) -> Optional[float]:
+    # Misma clave y cache que change_24h_swr
+    def _fetch():
+        try:
+            return get_change_24h_pct(exchange, symbol)
+        except Exception:
+            return get_change_24h_pct(str(exchange).lower(), symbol)
+
+    return METRICS.get_blocking(("pct24", exchange, symbol), _fetch)
+
+
+def _market(context):
+    cfg = _cfg_of(context)
+    return cfg.get("symbol", "SYMBOL"), cfg.get("exchange") or "EXCHANGE"
+
+
+def needs(context):
+    symbol, exchange = _market(context)
+    return {
+        f"last_price:{exchange}:{symbol}": lambda: _load_last(exchange, symbol),
+        f"pct24:{exchange}:{symbol}": lambda: _load_pct24(exchange, symbol),
+    }
+
+
+def content_key(context):
+    # Lo que se ve: nombre/símbolo y precio/% ya formateados a la precisión mostrada
+    cfg = _cfg_of(context)
+    symbol, exchange = _market(context)
+    name = cfg.get("display_name") or cfg.get("symbol_name") or _derive_name(symbol)
+    last = prefetched(context, f"last_price:{exchange}:{symbol}", lambda: _load_last(exchange, symbol))
+    pct24 = prefetched(context, f"pct24:{exchange}:{symbol}", lambda: _load_pct24(exchange, symbol))
+    return (name, symbol, exchange, _fmt_price_str(last), _fmt_pct_str(pct24))
+
+
 def render(draw: ImageDraw.ImageDraw, rect, theme, context):
     x, y, w, h = rect
 
-    guild_id = context.get("guild_id")
-    channel_id = context.get("channel_id")
-
-    db = load_db()
-    cfg = get_cfg(db, guild_id, channel_id)
+    cfg = _cfg_of(context)
 
     symbol = (cfg or {}).get("symbol", "SYMBOL")
     exchange = (cfg or {}).get("exchange") or "EXCHANGE"
@@ -110,23 +150,9 @@ def render(draw: ImageDraw.ImageDraw, rect, theme, context):
     )
     display_name = name.upper() if TITLE.get("uppercase", False) else name
 
-    # Datos de mercado (con fallback a exchange en minúsculas si aplica)
-    last = None
-    pct24 = None
-    try:
-        last = get_last_price(exchange, symbol)
-    except Exception:
-        try:
-            last = get_last_price(str(exchange).lower(), symbol)
-        except Exception:
-            last = None
-    try:
-        pct24 = get_change_24h_pct(exchange, symbol)
-    except Exception:
-        try:
-            pct24 = get_change_24h_pct(str(exchange).lower(), symbol)
-        except Exception:
-            pct24 = None
+    # Datos de mercado (prefetcheados por el panel si hubo fase de datos)
+    last = prefetched(context, f"last_price:{exchange}:{symbol}", lambda: _load_last(exchange, symbol))
+    pct24 = prefetched(context, f"pct24:{exchange}:{symbol}", lambda: _load_pct24(exchange, symbol))
 
     # Colores
     text_col = theme["text"]
@@ -1,9 +1,11 @@
 # comandos/panel/blocks/SIETE_DIAS.py  (v4 — lista vertical simple, sin tiles ni sparkline)
 from __future__ import annotations
-from typing import Any, Iterable, List, Optional, Tuple
+from typing import List, Optional, Tuple
 from PIL import ImageDraw, ImageFont
 
-from data_store import load_db, get_cfg
+from data_store import read_cfg
+from comandos.panel.prefetch import prefetched
+from comandos.panel import fonts
 
 # === CONFIG ===
 CFG = {
@@ -38,62 +40,28 @@ CFG = {
 }
 
 # === Helpers de fuentes y dibujo ===
-def _font(size=18):
-    try:
-        return ImageFont.truetype("DejaVuSans.ttf", size)
-    except Exception:
-        return ImageFont.load_default()
-
 _FONT_REG = [
     "C:/Windows/Fonts/arial.ttf",
     "C:/Windows/Fonts/segoeui.ttf",
     "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
     "DejaVuSans.ttf",
 ]
-_FONT_BOLD = [
-    "C:/Windows/Fonts/arialbd.ttf",
-    "C:/Windows/Fonts/seguisb.ttf",  # Segoe UI Semibold
-    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-    "DejaVuSans-Bold.ttf",
-]
+fonts.register_family("siete_regular", _FONT_REG)
 
 
 def _font(size=18):
-    for p in _FONT_REG:
-        try:
-            return ImageFont.truetype(p, size)
-        except Exception:
-            pass
-    return ImageFont.load_default()  # último recurso (fijo)
+    return fonts.font(size, "siete_regular")
 
 
 def _font_bold(size=18):
-    for p in _FONT_BOLD:
-        try:
-            return ImageFont.truetype(p, size)
-        except Exception:
-            pass
-    return _font(size)
+    return fonts.font(size, "bold")
 
 def _text_size(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont) -> Tuple[int,int]:
-    box = draw.textbbox((0,0), text, font=font)
-    return (box[2]-box[0], box[3]-box[1])
+    return fonts.text_size(text, font)
 
 def _font_fit(draw: ImageDraw.ImageDraw, text: str, max_w: int, max_h: int, base: int, *, bold: bool=False) -> ImageFont.ImageFont:
-    """Ajusta la fuente (binaria) para encajar en el rectángulo dado."""
-    ff = _font_bold if bold else _font
-    lo, hi = 8, 160
-    best = ff(base)
-    while lo <= hi:
-        mid = (lo + hi)//2
-        f = ff(mid)
-        tw, th = _text_size(draw, text, f)
-        if tw <= max_w and th <= max_h:
-            best = f
-            lo = mid + 1
-        else:
-            hi = mid - 1
-    return best
+    """Ajusta la fuente (binaria, con métricas cacheadas) para encajar en el rectángulo dado."""
+    return fonts.fit(text, max_w, max_h, base=base, family="bold" if bold else "siete_regular")
 
 def _draw_dashed(draw: ImageDraw.ImageDraw, x1: int, y: int, x2: int, color: Tuple[int,int,int], thickness: int, seg: int, gap: int):
     if x2 <= x1 + 1:
@@ -104,13 +72,12 @@ def _draw_dashed(draw: ImageDraw.ImageDraw, x1: int, y: int, x2: int, color: Tup
         draw.line([(x, y), (x_end, y)], fill=color, width=thickness)
         x = x_end + gap
 
-# === Data helpers (reutilizamos tu lógica de 7 días) ===
-try:
-    from comandos.panel.data_adapter import get_daily_closes_8 as _get8
-    ADAPTER_OK = True
-except Exception:
-    ADAPTER_OK = False
-    _get8 = None  # type: ignore
+# === Data helpers ===
+# Dónde está listado el par lo resuelve el índice persistido (symbol_index):
+# como mucho UN fetch de velas por render (cero si hay snapshot o cache).
+import snapshots
+from comandos.panel import symbol_index
+from comandos.grafica.render import OHLCV, fetch_ohlcv_df
 
 try:
     from comandos.panel.coingecko_adapter import get_daily_closes_8_cg as _get8_cg
@@ -119,18 +86,6 @@ except Exception:
     _CG_OK = False
     _get8_cg = None  # type: ignore
 
-try:
-    from comandos.grafica.render import get_ohlcv as _get_ohlcv_render  # type: ignore
-except Exception:
-    _get_ohlcv_render = None  # type: ignore
-try:
-    from comandos.grafica.data import get_ohlcv as _get_ohlcv_data  # type: ignore
-except Exception:
-    _get_ohlcv_data = None  # type: ignore
-
-AUTO_EX = ["BINANCE","KRAKEN","COINBASE","BYBIT","OKX","KUCOIN","BITSTAMP","GATE","BITGET","GEMINI","HUOBI"]
-AUTO_Q = ["USD","USDT","USDC"]
-
 def _split_symbol(sym: str) -> Tuple[str, Optional[str]]:
     if not sym:
         return ("SYMBOL", None)
@@ -144,92 +99,35 @@ def _split_symbol(sym: str) -> Tuple[str, Optional[str]]:
             return (up[:-len(q)], q)
     return (sym, None)
 
-def _mk_variants(base: str, quote: Optional[str]) -> List[str]:
-    base = base.strip().upper()
-    if quote:
-        return [f"{base}/{quote.strip().upper()}"]
-    return [f"{base}/{q}" for q in AUTO_Q]
-
-def _coerce_closes(raw: Iterable[Any]) -> List[float]:
-    xs: List[float] = []
-    for it in (raw or []):
-        if it is None:
-            continue
-        if isinstance(it, dict):
-            for k in ("close","c","Close","C","closing_price"):
-                if k in it:
-                    try:
-                        xs.append(float(it[k])); break
-                    except Exception: pass
-        elif isinstance(it,(list,tuple)):
-            try:
-                if len(it)>=5: xs.append(float(it[4]))
-                elif len(it)>=4: xs.append(float(it[3]))
-            except Exception: pass
-        else:
-            try: xs.append(float(it))
-            except Exception: pass
-    return xs
-
-def _try_ohlcv(fn, exchange: str, symbol: str, timeframe: str, limit: int):
-    for tf in {timeframe, timeframe.lower(), timeframe.upper(), timeframe.capitalize()}:
-        for ex in {exchange, exchange.lower(), exchange.upper()}:
-            try:
-                return fn(exchange=ex, symbol=symbol, timeframe=tf, limit=limit)  # type: ignore
-            except Exception:
-                try:
-                    return fn(ex, symbol, tf, limit)  # type: ignore
-                except Exception:
-                    pass
-    return None
-
-def _get8_fallback(exchange: str, symbol: str) -> Optional[List[float]]:
-    # 1d directo
-    for fn in (f for f in (_get_ohlcv_render, _get_ohlcv_data) if f):
-        raw = _try_ohlcv(fn, exchange, symbol, "1d", 9)
-        xs = _coerce_closes(raw)
-        if xs and len(xs)>=8: return xs[-8:]
-    # 4h -> 6 velas/día
-    for fn in (f for f in (_get_ohlcv_render, _get_ohlcv_data) if f):
-        raw = _try_ohlcv(fn, exchange, symbol, "4h", 48)
-        xs = _coerce_closes(raw)
-        if xs and len(xs)>=48:
-            days=[]; 
-            for i in range(6, len(xs)+1, 6):
-                days.append(xs[i-1])
-                if len(days)>=8: break
-            if len(days)>=8: return days[-8:]
-    # 1h -> 24 velas/día
-    for fn in (f for f in (_get_ohlcv_render, _get_ohlcv_data) if f):
-        raw = _try_ohlcv(fn, exchange, symbol, "1h", 192)
-        xs = _coerce_closes(raw)
-        if xs and len(xs)>=192:
-            days=[]
-            for i in range(24, len(xs)+1, 24):
-                days.append(xs[i-1])
-                if len(days)>=8: break
-            if len(days)>=8: return days[-8:]
-    return None
-
-def _get8_any(exchange: str, symbol: str) -> Optional[List[float]]:
-    if ADAPTER_OK and _get8:
-        xs = _get8(exchange, symbol)
-        if xs and len(xs)>=8: return xs[-8:]
-    return _get8_fallback(exchange, symbol)
+def _closes_1d(exchange: str, market: str) -> Optional[List[float]]:
+    # 1d limit=9 -> 8 cierres (7 retornos), vía la cache OHLCV compartida con /grafica
+    df = OHLCV.get_blocking(
+        ("ohlcv", exchange, market, "1d", 9),
+        lambda: fetch_ohlcv_df(exchange, market, "1d", limit=9),
+    )
+    xs = [float(v) for v in df["close"].tolist()] if df is not None else []
+    return xs[-8:] if len(xs) >= 8 else None
 
 def _autodiscover(symbol: str, exchange_hint: Optional[str]) -> Optional[List[float]]:
     base, quote = _split_symbol(symbol)
-    vars = _mk_variants(base, quote)
+
+    # 0) Snapshot del scanner (sin red)
     if exchange_hint:
-        for sym in [symbol]+vars:
-            xs = _get8_any(exchange_hint, sym)
-            if xs and len(xs)>=8: return xs[-8:]
-    for ex in AUTO_EX:
-        if exchange_hint and ex.upper()==str(exchange_hint).upper():
-            continue
-        for sym in vars:
-            xs = _get8_any(ex, sym)
-            if xs and len(xs)>=8: return xs[-8:]
+        df = snapshots.frame(exchange_hint, symbol, "1d", min_rows=8)
+        if df is not None:
+            return [float(v) for v in df["close"].tolist()][-8:]
+
+    # 1) Índice (base, quote) -> exchange/mercado: un solo fetch
+    hit = symbol_index.first(base, quote, exchange_hint)
+    if hit is not None:
+        try:
+            xs = _closes_1d(*hit)
+            if xs:
+                return xs
+        except Exception:
+            symbol_index.forget(base, quote)  # deslistado o caído: re-resolver la próxima vez
+
+    # 2) CoinGecko (no listado en exchanges conocidos)
     try:
         if _CG_OK and _get8_cg:
             cg_closes, vs = _get8_cg(base, quote)
@@ -251,6 +149,21 @@ def _day_labels(today_first: bool) -> List[str]:
     labs = [names[d.weekday()] for d in days]
     return labs if today_first else list(reversed(labs))
 
+def _market(context) -> Tuple[str, Optional[str]]:
+    cfg = context["cfg"] if "cfg" in context else read_cfg(context.get("guild_id"), context.get("channel_id"))
+    return (cfg or {}).get("symbol", "SYMBOL"), ((cfg or {}).get("exchange") or None)
+
+def needs(context):
+    symbol_cfg, exchange_cfg = _market(context)
+    return {f"closes8:{exchange_cfg}:{symbol_cfg}": lambda: _autodiscover(symbol_cfg, exchange_cfg)}
+
+def content_key(context):
+    # Cambia solo con una vela diaria nueva (o al cambiar el día UTC de las etiquetas)
+    import datetime as _dt
+    symbol_cfg, exchange_cfg = _market(context)
+    closes = prefetched(context, f"closes8:{exchange_cfg}:{symbol_cfg}", lambda: _autodiscover(symbol_cfg, exchange_cfg)) or []
+    return (_dt.datetime.utcnow().date().isoformat(), tuple(round(c, 12) for c in closes[-8:]))
+
 # === RENDER ===
 def render(draw: ImageDraw.ImageDraw, rect, theme, context):
     x, y, w, h = rect
@@ -259,12 +172,8 @@ def render(draw: ImageDraw.ImageDraw, rect, theme, context):
     inner_y = y + pad
     inner_w = w - 2*pad
 
-    db = load_db()
-    cfg = get_cfg(db, context.get("guild_id"), context.get("channel_id"))
-    symbol_cfg = (cfg or {}).get("symbol", "SYMBOL")
-    exchange_cfg = ((cfg or {}).get("exchange") or None)
-
-    closes = _autodiscover(symbol_cfg, exchange_cfg) or []
+    symbol_cfg, exchange_cfg = _market(context)
+    closes = prefetched(context, f"closes8:{exchange_cfg}:{symbol_cfg}", lambda: _autodiscover(symbol_cfg, exchange_cfg)) or []
 
     if len(closes) < 8:
         # mensaje amigable si no hay datos
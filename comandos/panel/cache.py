@@ -0,0 +1,235 @@
+# comandos/panel/cache.py
+"""
+Cache de paneles ya renderizados.
+
+- El scanner avisa de vela nueva (monitor.on_new_candle) y aquí se re-renderiza
+  el panel del canal para ambos temas, en segundo plano.
+- /panel y "🔄 Actualizar" sirven la imagen cacheada; solo renderizan en el
+  momento si no hay entrada (o superó PANEL_CACHE_MAX_AGE).
+- Memoria: LRU acotado. Disco: PANEL_CACHE_DIR con como mucho
+  PANEL_CACHE_DISK_MAX archivos (sobrevive reinicios); lecturas y escrituras
+  de disco van al pool IO, nunca al event loop.
+- Un cambio de símbolo/exchange/bordes del canal invalida sus entradas.
+- Solo se pre-renderizan canales donde se usó el panel en las últimas
+  PANEL_ACTIVE_TTL s (en memoria: no se escribe nada en state.json).
+"""
+from __future__ import annotations
+import asyncio, re, threading, time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import executors
+from data_store import read_cfg, subscribe
+from .panel import THEMES, render_panel_image_async
+
+PANEL_CACHE_MAX = 64            # entradas en memoria
+PANEL_CACHE_DISK_MAX = 128      # archivos en disco
+PANEL_CACHE_MAX_AGE = 15 * 60   # s; más viejo = render en el momento
+PANEL_CACHE_DIR = Path("panel_cache")
+PANEL_ACTIVE_TTL = 24 * 3600    # s; canal sin /panel en este tiempo deja de pre-renderizarse
+
+# Claves de config que cambian lo que se dibuja (panel_theme va en la clave)
+_INVALIDATING = {"symbol", "exchange", "panel_borders", "display_name", "symbol_name"}
+
+Key = Tuple[int, int, str, bool]  # (guild, channel, theme, borders)
+
+
+class Entry:
+    __slots__ = ("data", "ext", "timings", "rendered_at")
+
+    def __init__(self, data: bytes, ext: str, timings: Dict[str, Any], rendered_at: float):
+        self.data = data
+        self.ext = ext
+        self.timings = timings
+        self.rendered_at = rendered_at
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.rendered_at
+
+
+_lock = threading.Lock()
+_mem: "OrderedDict[Key, Entry]" = OrderedDict()
+_inflight: Dict[Tuple[int, int], asyncio.Task] = {}
+_active: Dict[Tuple[int, int], float] = {}   # canal -> último uso del panel
+_gen: Dict[Tuple[int, int], int] = {}        # sube al invalidar: descarta escrituras viejas en vuelo
+_disk_lock = threading.Lock()
+
+
+def mark_active(guild_id: int, channel_id: int):
+    _active[(int(guild_id), int(channel_id))] = time.time()
+
+
+def is_active(guild_id: int, channel_id: int) -> bool:
+    t = _active.get((int(guild_id), int(channel_id)))
+    return t is not None and time.time() - t < PANEL_ACTIVE_TTL
+
+
+def _disk_path(key: Key, ext: str) -> Path:
+    g, c, theme, borders = key
+    return PANEL_CACHE_DIR / f"{g}_{c}_{theme}_{'b' if borders else 'nb'}.{ext}"
+
+
+def _disk_get(key: Key) -> Optional[Entry]:
+    g, c, theme, borders = key
+    if not PANEL_CACHE_DIR.exists():
+        return None
+    for p in PANEL_CACHE_DIR.glob(f"{g}_{c}_{theme}_{'b' if borders else 'nb'}.*"):
+        if p.suffix == ".tmp":
+            continue
+        try:
+            return Entry(p.read_bytes(), p.suffix.lstrip("."), {}, p.stat().st_mtime)
+        except OSError:
+            continue
+    return None
+
+
+def _disk_put(key: Key, e: Entry, gen: int):
+    with _disk_lock:
+        if _gen.get(key[:2], 0) != gen:
+            return  # el canal se invalidó después del render: no dejar la imagen vieja en disco
+        try:
+            PANEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            _disk_drop(key)
+            p = _disk_path(key, e.ext)
+            tmp = p.with_name(p.name + ".tmp")
+            tmp.write_bytes(e.data)
+            tmp.replace(p)
+            files = sorted((f for f in PANEL_CACHE_DIR.glob("*_*_*_*.*") if f.suffix != ".tmp"), key=lambda f: f.stat().st_mtime)
+            for old in files[:-PANEL_CACHE_DISK_MAX]:
+                old.unlink(missing_ok=True)
+        except Exception as ex:
+            print(f"⚠️ panel cache: no pude guardar en disco: {ex}")
+
+
+def _disk_drop_channel(guild_id: int, channel_id: int):
+    with _disk_lock:
+        for theme in THEMES:
+            for borders in (True, False):
+                _disk_drop((guild_id, channel_id, theme, borders))
+
+
+def _disk_drop(key: Key):
+    g, c, theme, borders = key
+    if PANEL_CACHE_DIR.exists():
+        for p in PANEL_CACHE_DIR.glob(f"{g}_{c}_{theme}_{'b' if borders else 'nb'}.*"):
+            if p.suffix != ".tmp":
+                p.unlink(missing_ok=True)
+
+
+# ---------- API ----------
+def get(guild_id: int, channel_id: int, theme: str, borders: bool, *,
+        max_age: float = PANEL_CACHE_MAX_AGE, disk: bool = True) -> Optional[Entry]:
+    """Entrada vigente; con disk=True (desde un hilo) mira también PANEL_CACHE_DIR."""
+    key: Key = (int(guild_id), int(channel_id), theme, bool(borders))
+    with _lock:
+        e = _mem.get(key)
+        if e is not None:
+            _mem.move_to_end(key)
+    if e is None and disk:
+        e = _disk_get(key)
+        if e is not None:
+            _put_mem(key, e)
+    if e is None or e.age > max_age:
+        return None
+    return e
+
+
+def _put_mem(key: Key, e: Entry):
+    with _lock:
+        _mem[key] = e
+        _mem.move_to_end(key)
+        while len(_mem) > PANEL_CACHE_MAX:
+            _mem.popitem(last=False)
+
+
+def generation(guild_id: int, channel_id: int) -> int:
+    with _lock:
+        return _gen.get((int(guild_id), int(channel_id)), 0)
+
+
+def put(guild_id: int, channel_id: int, theme: str, borders: bool, data: bytes, timings: Dict[str, Any],
+        *, gen: Optional[int] = None) -> Entry:
+    """
+    Guarda en memoria y encola la escritura a disco (pool IO). `gen`: generation()
+    tomada antes de renderizar; si el canal se invalidó entre medio no se guarda.
+    """
+    key: Key = (int(guild_id), int(channel_id), theme, bool(borders))
+    e = Entry(data, str(timings.get("ext", "png")), timings, time.time())
+    with _lock:
+        cur = _gen.get(key[:2], 0)
+    if gen is None:
+        gen = cur
+    if gen != cur:
+        return e
+    _put_mem(key, e)
+    executors.submit(executors.IO, _disk_put, key, e, gen, interactive=False)
+    return e
+
+
+def invalidate(guild_id: int, channel_id: int):
+    ck = (int(guild_id), int(channel_id))
+    with _lock:
+        _gen[ck] = _gen.get(ck, 0) + 1
+        keys = [k for k in _mem if k[:2] == ck]
+        for k in keys:
+            _mem.pop(k, None)
+    executors.submit(executors.IO, _disk_drop_channel, *ck, interactive=False)
+
+
+async def render_cached(guild_id: int, channel_id: int, *, theme: str, borders: bool) -> Tuple[Entry, bool]:
+    """(entrada, hit). En miss renderiza en el momento y guarda el resultado."""
+    mark_active(guild_id, channel_id)
+    e = get(guild_id, channel_id, theme, borders, disk=False)
+    if e is None:
+        e = await executors.run(executors.IO, get, guild_id, channel_id, theme, borders)
+    if e is not None:
+        return e, True
+    gen = generation(guild_id, channel_id)
+    data, timings = await render_panel_image_async(guild_id, channel_id, theme=theme, borders=borders)
+    return put(guild_id, channel_id, theme, borders, data, timings, gen=gen), False
+
+
+async def prerender(guild_id: int, channel_id: int):
+    """Re-renderiza ambos temas del canal (uno a la vez; de-duplicado por canal)."""
+    ck = (int(guild_id), int(channel_id))
+    t = _inflight.get(ck)
+    if t is not None and not t.done():
+        return await t
+
+    async def _run():
+        cfg = read_cfg(guild_id, channel_id)
+        borders = bool(cfg.get("panel_borders", True))
+        for theme in THEMES:
+            gen = generation(guild_id, channel_id)
+            data, timings = await render_panel_image_async(guild_id, channel_id, theme=theme, borders=borders)
+            put(guild_id, channel_id, theme, borders, data, timings, gen=gen)
+
+    t = asyncio.create_task(_run())
+    _inflight[ck] = t
+    try:
+        return await t
+    finally:
+        if _inflight.get(ck) is t:
+            _inflight.pop(ck, None)
+
+
+async def on_new_candle(guild_id: int, channel_id: int, cfg: dict, timeframes: List[str]):
+    # Solo canales donde se usa el panel (se marca al ejecutar /panel o Actualizar)
+    if not is_active(guild_id, channel_id):
+        return
+    t0 = time.perf_counter()
+    await prerender(guild_id, channel_id)
+    print(f"🖼️ panel pre-renderizado {guild_id}:{channel_id} ({', '.join(timeframes)}) en {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+
+def _on_cfg_change(ch_key: str, cfg: dict, changed: set):
+    if not (changed & _INVALIDATING):
+        return
+    m = re.fullmatch(r"(\d+):(\d+)", ch_key)
+    if m:
+        invalidate(int(m.group(1)), int(m.group(2)))
+
+
+subscribe(_on_cfg_change)
@@ -0,0 +1,188 @@
+# comandos/panel/fonts.py
+"""
+Fuentes y métricas de texto del panel, cacheadas en memoria.
+
+`ImageFont.truetype` abre y parsea el archivo en cada llamada; aquí cada
+(familia, tamaño) se carga una sola vez por proceso y la ruta que funcionó
+para cada familia también se recuerda (no se vuelven a probar los fallbacks).
+
+Las medidas (texto, fuente) -> bbox y los tamaños "best-fit" también se
+memorizan: los bloques vuelven a pedir los mismos textos en cada render.
+"""
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+from PIL import ImageFont
+
+# Candidatos por familia (primero el que exista)
+REGULAR: Tuple[str, ...] = (
+    "DejaVuSans.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+    "C:/Windows/Fonts/segoeui.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "arial.ttf",
+    "Arial.ttf",
+)
+BOLD: Tuple[str, ...] = (
+    "C:/Windows/Fonts/arialbd.ttf",
+    "C:/Windows/Fonts/seguisb.ttf",  # Segoe UI Semibold
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "DejaVuSans-Bold.ttf",
+)
+ITALIC: Tuple[str, ...] = (
+    "DejaVuSans-Oblique.ttf",
+    "ariali.ttf",
+    "Arial Italic",
+)
+UI: Tuple[str, ...] = ("Segoe UI", "Inter", "Arial", "DejaVuSans")
+
+FAMILIES: Dict[str, Tuple[str, ...]] = {
+    "regular": REGULAR,
+    "bold": BOLD,
+    "italic": ITALIC,
+    "ui": UI,
+}
+# Si una familia no tiene ningún archivo disponible, se usa esta
+_FALLBACK = {"bold": "regular", "italic": "regular", "ui": "regular"}
+
+_lock = threading.Lock()
+_fonts: Dict[Tuple[str, int], ImageFont.ImageFont] = {}
+_paths: Dict[str, Optional[str]] = {}  # familia -> ruta resuelta (None = ninguna)
+
+
+def _resolve(family: str, size: int) -> Tuple[Optional[str], ImageFont.ImageFont]:
+    if family in _paths:
+        path = _paths[family]
+        if path is not None:
+            return path, ImageFont.truetype(path, size)
+    else:
+        for cand in FAMILIES.get(family, REGULAR):
+            try:
+                f = ImageFont.truetype(cand, size)
+            except Exception:
+                continue
+            _paths[family] = cand
+            return cand, f
+        _paths[family] = None
+    nxt = _FALLBACK.get(family)
+    if nxt:
+        return _resolve(nxt, size)
+    return None, ImageFont.load_default()
+
+
+def font(size: int = 18, family: str = "regular") -> ImageFont.ImageFont:
+    """Fuente cacheada por (familia, tamaño)."""
+    key = (family, int(size))
+    f = _fonts.get(key)
+    if f is not None:
+        return f
+    with _lock:
+        f = _fonts.get(key)
+        if f is None:
+            _, f = _resolve(family, int(size))
+            _fonts[key] = f
+        return f
+
+
+def font_path(family: str = "regular") -> Optional[str]:
+    """Ruta del archivo que se usa para la familia (None si cae al bitmap por defecto)."""
+    font(18, family)
+    fam = family
+    while fam is not None:
+        p = _paths.get(fam)
+        if p is not None:
+            return p
+        fam = _FALLBACK.get(fam)
+    return None
+
+
+def register_family(name: str, candidates: Sequence[str]):
+    """Permite a un bloque declarar su propia familia (p. ej. una fuente mono)."""
+    with _lock:
+        FAMILIES[name] = tuple(candidates)
+        _paths.pop(name, None)
+        for k in [k for k in _fonts if k[0] == name]:
+            _fonts.pop(k, None)
+        # best-fit va por familia: puede cambiar con los nuevos candidatos
+        _fits.clear()
+
+
+def clear():
+    with _lock:
+        _fonts.clear()
+        _paths.clear()
+        _metrics.clear()
+        _fits.clear()
+
+
+# ===== Métricas de texto =====
+MAX_METRICS = 4096
+MAX_FITS = 1024
+
+BBox = Tuple[int, int, int, int]
+_metrics: "OrderedDict[Tuple[str, float, int, str], BBox]" = OrderedDict()
+_fits: "OrderedDict[Tuple, int]" = OrderedDict()
+
+
+def _font_key(f: ImageFont.ImageFont) -> Optional[Tuple[str, float, int]]:
+    """(ruta, tamaño, índice) de una fuente TrueType; None si no se puede identificar."""
+    path = getattr(f, "path", None)
+    if not isinstance(path, str):
+        return None  # bitmap por defecto o fuente cargada desde un buffer
+    return path, float(getattr(f, "size", 0)), int(getattr(f, "index", 0))
+
+
+def bbox(text: str, f: ImageFont.ImageFont) -> BBox:
+    """Igual que draw.textbbox((0, 0), text, font=f), memorizado por (archivo, tamaño, texto)."""
+    fk = _font_key(f)
+    if fk is None:
+        return tuple(int(v) for v in f.getbbox(text))  # type: ignore[return-value]
+    key = (*fk, text)
+    with _lock:
+        hit = _metrics.get(key)
+        if hit is not None:
+            _metrics.move_to_end(key)
+            return hit
+    box = tuple(int(v) for v in f.getbbox(text))  # type: ignore[assignment]
+    with _lock:
+        _metrics[key] = box  # type: ignore[assignment]
+        while len(_metrics) > MAX_METRICS:
+            _metrics.popitem(last=False)
+    return box  # type: ignore[return-value]
+
+
+def text_size(text: str, f: ImageFont.ImageFont) -> Tuple[int, int]:
+    b = bbox(text, f)
+    return (b[2] - b[0], b[3] - b[1])
+
+
+def fit_size(text: str, max_w: int, max_h: int, *, family: str = "regular", lo: int = 8, hi: int = 160) -> Optional[int]:
+    """Mayor tamaño en [lo, hi] con el que `text` cabe en max_w x max_h (None si ninguno)."""
+    key = (text, family, int(max_w), int(max_h), lo, hi)
+    with _lock:
+        if key in _fits:
+            _fits.move_to_end(key)
+            return _fits[key]
+    best: Optional[int] = None
+    a, b = lo, hi
+    while a <= b:
+        mid = (a + b) // 2
+        tw, th = text_size(text, font(mid, family))
+        if tw <= max_w and th <= max_h:
+            best = mid
+            a = mid + 1
+        else:
+            b = mid - 1
+    with _lock:
+        _fits[key] = best  # type: ignore[assignment]
+        while len(_fits) > MAX_FITS:
+            _fits.popitem(last=False)
+    return best
+
+
+def fit(text: str, max_w: int, max_h: int, *, base: int = 18, family: str = "regular", lo: int = 8, hi: int = 160) -> ImageFont.ImageFont:
+    """Fuente best-fit; si ni `lo` cabe, devuelve la de tamaño `base`."""
+    size = fit_size(text, max_w, max_h, family=family, lo=lo, hi=hi)
+    return font(size if size is not None else base, family)
@@ -0,0 +1,166 @@
+# comandos/panel/live.py
+"""
+Modo "live" del panel: el mensaje se edita solo, por timer o por vela nueva.
+
+- Un loop por canal. En cada tick se renderiza UNA vez por (tema, bordes) y esa
+  imagen se comparte con todos los mensajes live del canal con esa combinación
+  (también se guarda en la cache de /panel).
+- Se salta la edición si el hash de la imagen no cambió.
+- Throttle: cada mensaje se edita como mucho cada LIVE_MIN_EDIT_INTERVAL s, y
+  las ediciones dentro de un canal van espaciadas LIVE_EDIT_SPACING s
+  (Discord limita ~5 ediciones / 5 s por canal).
+- Un mensaje sale del modo live tras LIVE_MAX_AGE s, si lo borran o con el botón.
+"""
+from __future__ import annotations
+import asyncio, hashlib, io, time
+from typing import Dict, List, Optional, Tuple
+
+import discord
+
+from .panel import render_panel_image_async, fmt_timings
+from . import cache as panel_cache
+import executors
+
+LIVE_INTERVAL = 60              # s entre ticks (una vela nueva despierta antes)
+LIVE_MIN_EDIT_INTERVAL = 30     # s mínimos entre ediciones del mismo mensaje
+LIVE_EDIT_SPACING = 1.5         # s entre ediciones consecutivas en un canal
+LIVE_MAX_AGE = 3 * 3600         # s; luego el mensaje vuelve a modo manual
+
+ChannelKey = Tuple[int, int]
+
+
+class _LiveMsg:
+    __slots__ = ("message", "theme", "borders", "started", "last_hash", "last_edit")
+
+    def __init__(self, message: discord.Message, theme: str, borders: bool):
+        self.message = message
+        self.theme = theme
+        self.borders = borders
+        self.started = time.time()
+        self.last_hash: Optional[str] = None
+        self.last_edit = 0.0
+
+
+_groups: Dict[ChannelKey, Dict[int, _LiveMsg]] = {}
+_tasks: Dict[ChannelKey, asyncio.Task] = {}
+_wakeups: Dict[ChannelKey, asyncio.Event] = {}
+
+
+# ---------- registro ----------
+def is_live(message_id: Optional[int]) -> bool:
+    return message_id is not None and any(message_id in g for g in _groups.values())
+
+
+def start(message: discord.Message, guild_id: int, channel_id: int, *, theme: str, borders: bool):
+    ck = (int(guild_id), int(channel_id))
+    _groups.setdefault(ck, {})[message.id] = _LiveMsg(message, theme, borders)
+    _wakeups.setdefault(ck, asyncio.Event())
+    t = _tasks.get(ck)
+    if t is None or t.done():
+        _tasks[ck] = asyncio.create_task(_channel_loop(ck))
+
+
+def update(message_id: int, *, theme: str, borders: bool, image_hash: Optional[str] = None):
+    """El usuario cambió tema/bordes con los botones: el live sigue con lo nuevo."""
+    for g in _groups.values():
+        lm = g.get(message_id)
+        if lm is not None:
+            lm.theme, lm.borders = theme, borders
+            lm.last_hash = image_hash
+            lm.last_edit = time.time()
+
+
+def stop(message_id: int) -> bool:
+    for g in _groups.values():
+        if g.pop(message_id, None) is not None:
+            return True
+    return False
+
+
+async def on_new_candle(guild_id: int, channel_id: int, cfg: dict, timeframes: List[str]):
+    ev = _wakeups.get((int(guild_id), int(channel_id)))
+    if ev is not None:
+        ev.set()
+
+
+def image_hash(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+# ---------- loop por canal ----------
+async def _wait_tick(ck: ChannelKey):
+    ev = _wakeups.setdefault(ck, asyncio.Event())
+    try:
+        await asyncio.wait_for(ev.wait(), timeout=LIVE_INTERVAL)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        ev.clear()
+
+
+async def _edit(lm: _LiveMsg, data: bytes, ext: str, timings: dict, channel_id: int) -> bool:
+    """Edita el mensaje. False si ya no existe (sale del modo live)."""
+    from .view import PanelView, panel_embed  # import tardío: view importa este módulo
+
+    filename = f"panel_{channel_id}_{lm.theme}_{'b' if lm.borders else 'nb'}.{ext}"
+    base = lm.message.embeds[0] if lm.message.embeds else None
+    emb = panel_embed(base, theme=lm.theme, borders=lm.borders, filename=filename,
+                      footer=f"📡 Live • {fmt_timings(timings)}")
+    try:
+        edited = await lm.message.edit(
+            embed=emb,
+            attachments=[discord.File(io.BytesIO(data), filename=filename)],
+            view=PanelView(theme=lm.theme, borders=lm.borders, live=True),
+        )
+        if edited is not None:
+            lm.message = edited
+    except discord.NotFound:
+        return False
+    except discord.HTTPException as e:
+        print(f"⚠️ panel live: edición fallida ({lm.message.id}): {e}")
+    return True
+
+
+async def _channel_loop(ck: ChannelKey):
+    guild_id, channel_id = ck
+    executors.mark_background()  # el loop nace del botón (interactivo) pero vive en segundo plano
+    try:
+        while _groups.get(ck):
+            await _wait_tick(ck)
+            group = _groups.get(ck) or {}
+            now = time.time()
+            for mid in [m for m, lm in group.items() if now - lm.started > LIVE_MAX_AGE]:
+                group.pop(mid, None)
+            if not group:
+                break
+
+            # Una sola imagen por combinación (tema, bordes)
+            combos: Dict[Tuple[str, bool], List[_LiveMsg]] = {}
+            for lm in group.values():
+                combos.setdefault((lm.theme, lm.borders), []).append(lm)
+
+            for (theme, borders), msgs in combos.items():
+                due = [lm for lm in msgs if time.time() - lm.last_edit >= LIVE_MIN_EDIT_INTERVAL]
+                if not due:
+                    continue
+                try:
+                    data, timings = await render_panel_image_async(guild_id, channel_id, theme=theme, borders=borders)
+                except Exception as e:
+                    print(f"⚠️ panel live: render fallido {guild_id}:{channel_id}: {e}")
+                    continue
+                panel_cache.put(guild_id, channel_id, theme, borders, data, timings)
+                h = image_hash(data)
+
+                for lm in due:
+                    if lm.last_hash == h:
+                        continue  # misma imagen: no re-subir
+                    ok = await _edit(lm, data, str(timings.get("ext", "png")), timings, channel_id)
+                    if not ok:
+                        group.pop(lm.message.id, None)
+                        continue
+                    lm.last_hash, lm.last_edit = h, time.time()
+                    await asyncio.sleep(LIVE_EDIT_SPACING)
+    finally:
+        _tasks.pop(ck, None)
+        if not _groups.get(ck):
+            _groups.pop(ck, None)
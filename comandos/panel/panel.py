@@ -1,8 +1,14 @@
 # comandos/panel/panel.py
 from __future__ import annotations
-import io, os, importlib.util, json
-from typing import Dict, Any
-from PIL import Image, ImageDraw, ImageFont
+import os, importlib.util, itertools, json, threading, time
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
+from PIL import Image, ImageDraw
+from data_store import read_cfg
+import image_encode
+import executors
+from .prefetch import run_needs
+from . import fonts
 
 # ===== Theming (dark=negro, light=blanco) =====
 THEMES = {
@@ -54,22 +60,62 @@ BASE_DIR = os.path.dirname(__file__)
 BLOCKS_DIR = os.path.join(BASE_DIR, "blocks")
 LAYOUT_PATH = os.path.join(BASE_DIR, "layout.json")
 
+# ===== Runtime: layout y módulos de bloques cacheados por mtime =====
+_layout_cache: Tuple[int | None, Dict[str, Any]] | None = None
+_block_cache: Dict[str, Tuple[int, Any]] = {}  # nombre -> (mtime_ns, módulo)
+_block_seq = itertools.count(1)  # versión por carga de módulo (va en la clave de tiles)
+_rt_lock = threading.Lock()
+
+def _mtime(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
 def _load_layout() -> Dict[str, Any]:
-    if os.path.exists(LAYOUT_PATH):
-        with open(LAYOUT_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return DEFAULT_LAYOUT
+    global _layout_cache
+    mt = _mtime(LAYOUT_PATH)
+    cached = _layout_cache
+    if cached is not None and cached[0] == mt:
+        return cached[1]
+    layout = DEFAULT_LAYOUT
+    if mt is not None:
+        try:
+            with open(LAYOUT_PATH, "r", encoding="utf-8") as f:
+                layout = json.load(f)
+        except Exception as e:
+            # JSON a medio editar: se sigue con el último layout bueno
+            print(f"⚠️ panel: layout.json inválido: {e}")
+            if cached is not None:
+                return cached[1]
+    _layout_cache = (mt, layout)
+    return layout
 
-def _load_block_renderer(name: str):
+def _load_block(name: str):
     path = os.path.join(BLOCKS_DIR, f"{name}.py")
-    if not os.path.exists(path):
+    mt = _mtime(path)
+    if mt is None:
+        _block_cache.pop(name, None)
         return None
-    import importlib.util
-    spec = importlib.util.spec_from_file_location(f"panel_block_{name}", path)
-    mod = importlib.util.module_from_spec(spec)  # type: ignore
-    assert spec and spec.loader
-    spec.loader.exec_module(mod)  # type: ignore
-    return getattr(mod, "render", None)
+    hit = _block_cache.get(name)
+    if hit is not None and hit[0] == mt:
+        return hit[1]
+    with _rt_lock:
+        hit = _block_cache.get(name)
+        if hit is not None and hit[0] == mt:
+            return hit[1]
+        # Compila y ejecuta solo cuando el archivo cambió (hot-reload por mtime)
+        spec = importlib.util.spec_from_file_location(f"panel_block_{name}", path)
+        mod = importlib.util.module_from_spec(spec)  # type: ignore
+        assert spec and spec.loader
+        spec.loader.exec_module(mod)  # type: ignore
+        mod.__panel_version__ = next(_block_seq)
+        _block_cache[name] = (mt, mod)
+        return mod
+
+def _load_block_renderer(name: str):
+    mod = _load_block(name)
+    return getattr(mod, "render", None) if mod else None
 
 def _grid_to_px(area, size, padding, gap, grid_cols, grid_rows):
     W, H = size
@@ -97,24 +143,33 @@ def _inset_card(draw: ImageDraw.ImageDraw, xy, r, *, base_fill, hl, sh, outline=
     draw.rounded_rectangle([x+3, y+3, x+w-3, y+h-3], r-3, outline=sh, width=1)
 
 def _load_font(size=18):
-    for name in ["Segoe UI", "Inter", "Arial", "DejaVuSans"]:
-        try:
-            return ImageFont.truetype(name, size)
-        except:
-            continue
-    return ImageFont.load_default()
-
-def render_panel_image(guild_id: int, channel_id: int, *, theme: str = "dark", borders: bool = True) -> bytes:
-    theme = "dark" if theme not in THEMES else theme
-    cfg = THEMES[theme]
-    layout = _load_layout()
+    return fonts.font(size, "ui")
 
+def _layout_parts(layout: Dict[str, Any]):
     size = tuple(layout.get("size", DEFAULT_LAYOUT["size"]))  # type: ignore
     padding = layout.get("padding", DEFAULT_LAYOUT["padding"])
     gap = layout.get("gap", DEFAULT_LAYOUT["gap"])
     grid = layout.get("grid", DEFAULT_LAYOUT["grid"])
     areas = layout.get("areas", DEFAULT_LAYOUT["areas"])
     blocks_map = layout.get("blocks", DEFAULT_LAYOUT["blocks"])
+    return size, padding, gap, grid, areas, blocks_map
+
+def _make_context(guild_id: int, channel_id: int, theme: str, borders: bool) -> Dict[str, Any]:
+    return {
+        "guild_id": guild_id,
+        "channel_id": channel_id,
+        "theme": theme,
+        "borders": borders,
+        "cfg": read_cfg(guild_id, channel_id),  # una sola lectura para todos los bloques
+    }
+
+# ===== Capa estática (marco + tarjetas) cacheada por tema/bordes/layout =====
+STATIC_CACHE_MAX = 8
+_static_cache: "OrderedDict[Tuple[str, bool, str], Image.Image]" = OrderedDict()
+
+def _draw_static(layout: Dict[str, Any], theme: str, borders: bool) -> Image.Image:
+    cfg = THEMES[theme]
+    size, padding, gap, grid, areas, _ = _layout_parts(layout)
 
     img = Image.new("RGB", size, cfg["bg"])
     draw = ImageDraw.Draw(img)
@@ -125,15 +180,6 @@ def render_panel_image(guild_id: int, channel_id: int, *, theme: str = "dark", b
     else:
         _rounded_rect(draw, (12, 12, size[0]-24, size[1]-24), r=24, fill=cfg["panel"], outline=None, width=0)
 
-    # Shared context
-    context = {
-        "guild_id": guild_id,
-        "channel_id": channel_id,
-        "theme": theme,
-        "borders": borders,
-    }
-
-    # Render each area
     for area in areas:
         name = area[0]
         rect = _grid_to_px(area, size, padding, gap, grid["cols"], grid["rows"])
@@ -150,21 +196,182 @@ def render_panel_image(guild_id: int, channel_id: int, *, theme: str = "dark", b
         else:
             outline_w = 2 if theme == "light" else 1
             _rounded_rect(draw, rect, r=20, fill=cfg["panel"], outline=(cfg["grid"] if borders else None), width=(outline_w if borders else 0))
+    return img
+
+def _static_base(layout: Dict[str, Any], theme: str, borders: bool) -> Image.Image:
+    """Fondo estático rasterizado una vez por (tema, bordes, layout); devuelve una copia editable."""
+    key = (theme, bool(borders), json.dumps(layout, sort_keys=True))
+    with _rt_lock:
+        base = _static_cache.get(key)
+        if base is not None:
+            _static_cache.move_to_end(key)
+    if base is None:
+        base = _draw_static(layout, theme, borders)
+        with _rt_lock:
+            _static_cache[key] = base
+            while len(_static_cache) > STATIC_CACHE_MAX:
+                _static_cache.popitem(last=False)
+    return base.copy()
+
+# ===== Tiles por bloque (dirty tracking) =====
+# Un bloque puede exponer `content_key(context)` con lo que determina su dibujo
+# (p. ej. última vela cerrada, precio redondeado a la precisión mostrada).
+# Si la clave no cambió, se pega el tile ya dibujado en vez de redibujar.
+# Sin `content_key` (o si devuelve None) el bloque se redibuja siempre.
+TILE_CACHE_MAX = 256
+_tile_cache: "OrderedDict[Tuple, Image.Image]" = OrderedDict()
+
+def _tile_key(mod, area_name: str, block_name: str, rect, context: Dict[str, Any]):
+    fn = getattr(mod, "content_key", None)
+    if fn is None:
+        return None
+    try:
+        ck = fn(context)
+    except Exception as e:
+        print(f"⚠️ panel: content_key() de {block_name} falló: {e}")
+        return None
+    if ck is None:
+        return None
+    # El tile incluye el fondo estático: tema, bordes y rect forman parte de la clave;
+    # la versión de carga del módulo invalida los tiles al recargar el bloque
+    version = getattr(mod, "__panel_version__", 0)
+    return (block_name, area_name, tuple(rect), context["theme"], bool(context["borders"]), version, ck)
+
+def _tile_get(key):
+    with _rt_lock:
+        tile = _tile_cache.get(key)
+        if tile is not None:
+            _tile_cache.move_to_end(key)
+        return tile
+
+def _tile_put(key, tile: Image.Image):
+    with _rt_lock:
+        _tile_cache[key] = tile
+        while len(_tile_cache) > TILE_CACHE_MAX:
+            _tile_cache.popitem(last=False)
+
+def _draw_panel(layout: Dict[str, Any], blocks: Dict[str, Any], context: Dict[str, Any], *, use_static_cache: bool = True, use_tile_cache: bool = True) -> bytes:
+    """Dibujo puro (CPU): usa context["data"] si hubo fase de datos."""
+    theme = context["theme"]
+    borders = context["borders"]
+    cfg = THEMES[theme]
+    size, padding, gap, grid, areas, blocks_map = _layout_parts(layout)
+
+    if use_static_cache:
+        img = _static_base(layout, theme, borders)
+    else:
+        img = _draw_static(layout, theme, borders)
+    draw = ImageDraw.Draw(img)
+
+    stats = context.setdefault("tiles", {"hit": 0, "drawn": 0})
+
+    # Contenido dinámico de cada área
+    for area in areas:
+        name = area[0]
+        rect = _grid_to_px(area, size, padding, gap, grid["cols"], grid["rows"])
 
         block_name = blocks_map.get(name)
-        renderer = _load_block_renderer(block_name) if block_name else None
+        mod = blocks.get(block_name) if block_name else None
+        renderer = getattr(mod, "render", None) if mod else None
 
         if renderer is None:
             _render_placeholder(draw, rect, f"{name} • {block_name or 'N/A'}", cfg)
-        else:
-            try:
-                renderer(draw, rect, cfg, context)
-            except Exception as e:
-                _render_error(draw, rect, f"{name}: {block_name}\n{e}", cfg)
-
-    buf = io.BytesIO()
-    img.save(buf, format="PNG", optimize=True)
-    return buf.getvalue()
+            continue
+
+        tkey = _tile_key(mod, name, block_name, rect, context) if use_tile_cache else None
+        if tkey is not None:
+            tile = _tile_get(tkey)
+            if tile is not None:
+                img.paste(tile, (rect[0], rect[1]))
+                stats["hit"] += 1
+                continue
+
+        try:
+            renderer(draw, rect, cfg, context)
+        except Exception as e:
+            _render_error(draw, rect, f"{name}: {block_name}\n{e}", cfg)
+            tkey = None  # no cachear errores
+        stats["drawn"] += 1
+        if tkey is not None:
+            x, y, w, h = rect
+            _tile_put(tkey, img.crop((x, y, x + w + 1, y + h + 1)))
+
+    enc = image_encode.encode(img, "panel")
+    context["encoded"] = enc
+    return enc.data
+
+def _load_blocks(layout: Dict[str, Any]) -> Dict[str, Any]:
+    blocks_map = layout.get("blocks", DEFAULT_LAYOUT["blocks"])
+    out: Dict[str, Any] = {}
+    for block_name in set(blocks_map.values()):
+        try:
+            mod = _load_block(block_name)
+        except Exception as e:
+            print(f"⚠️ panel: no pude cargar bloque {block_name}: {e}")
+            mod = None
+        if mod is not None:
+            out[block_name] = mod
+    return out
+
+def _collect_needs(blocks: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    needs: Dict[str, Any] = {}
+    for name, mod in blocks.items():
+        fn = getattr(mod, "needs", None)
+        if fn is None:
+            continue
+        try:
+            for key, loader in (fn(context) or {}).items():
+                needs.setdefault(key, loader)  # de-dup entre bloques
+        except Exception as e:
+            print(f"⚠️ panel: needs() de {name} falló: {e}")
+    return needs
+
+def render_panel_image(guild_id: int, channel_id: int, *, theme: str = "dark", borders: bool = True) -> bytes:
+    """Render síncrono (sin fase de datos: cada bloque trae lo suyo)."""
+    theme = "dark" if theme not in THEMES else theme
+    layout = _load_layout()
+    context = _make_context(guild_id, channel_id, theme, borders)
+    return _draw_panel(layout, _load_blocks(layout), context)
+
+async def render_panel_image_async(guild_id: int, channel_id: int, *, theme: str = "dark", borders: bool = True) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    1) fase de datos: needs() de todos los bloques, en paralelo y de-duplicado
+    2) fase de dibujo: CPU pura en un executor (no bloquea el event loop);
+       solo se redibujan los bloques cuyo content_key cambió
+    Devuelve (bytes, {"fetch_ms", "draw_ms", "total_ms", "tiles_hit", "tiles_drawn",
+    "encode_ms", "bytes", "ext"}); el formato lo decide el perfil "panel" de image_encode.
+    """
+    theme = "dark" if theme not in THEMES else theme
+    layout = _load_layout()
+    blocks = _load_blocks(layout)
+    context = _make_context(guild_id, channel_id, theme, borders)
+
+    context["data"], fetch_ms = await run_needs(_collect_needs(blocks, context))
+
+    t0 = time.perf_counter()
+    png = await executors.run(executors.RENDER, _draw_panel, layout, blocks, context)
+    draw_ms = (time.perf_counter() - t0) * 1000.0
+    tiles = context.get("tiles", {})
+    enc = context.get("encoded")
+    return png, {
+        "fetch_ms": fetch_ms, "draw_ms": draw_ms, "total_ms": fetch_ms + draw_ms,
+        "tiles_hit": tiles.get("hit", 0), "tiles_drawn": tiles.get("drawn", 0),
+        "encode_ms": enc.ms if enc else 0.0,
+        "bytes": len(png),
+        "ext": enc.ext if enc else panel_ext(),
+    }
+
+def panel_ext() -> str:
+    """Extensión del archivo del panel según el perfil de codificación ("png" | "webp")."""
+    return image_encode.ext_for("panel")
+
+def fmt_timings(t: Dict[str, Any]) -> str:
+    txt = f"datos {t.get('fetch_ms', 0):.0f} ms + dibujo {t.get('draw_ms', 0):.0f} ms"
+    if "encode_ms" in t:
+        txt += f" (codificación {t['encode_ms']:.0f} ms, {t.get('bytes', 0) / 1024:.0f} KB)"
+    if "tiles_hit" in t:
+        txt += f" • bloques {t.get('tiles_drawn', 0)} redibujados / {t.get('tiles_hit', 0)} en caché"
+    return txt
 
 def _render_placeholder(draw, rect, text, cfg):
     x, y, w, h = rect
@@ -0,0 +1,52 @@
+# comandos/panel/prefetch.py
+"""
+Fase de datos del panel.
+
+Cada bloque puede declarar `needs(context) -> {clave: loader}` (loader = callable
+bloqueante sin argumentos). El panel junta las necesidades de todos los bloques,
+de-duplica por clave y las ejecuta en paralelo ANTES de dibujar; los resultados
+quedan en context["data"] y `render()` solo dibuja.
+"""
+from __future__ import annotations
+import asyncio, time
+from typing import Any, Callable, Dict, Tuple
+
+import executors
+
+Loader = Callable[[], Any]
+
+PREFETCH_TIMEOUT = 20.0  # s; lo que no llegue se dibuja como N/A
+
+
+async def run_needs(needs: Dict[str, Loader], *, timeout: float = PREFETCH_TIMEOUT) -> Tuple[Dict[str, Any], float]:
+    """Ejecuta los loaders en hilos, en paralelo. Devuelve (data, fetch_ms)."""
+    t0 = time.perf_counter()
+    keys = list(needs)
+
+    async def _one(k: str):
+        try:
+            return await executors.run(executors.IO, needs[k])
+        except Exception as e:
+            print(f"⚠️ panel prefetch {k}: {e}")
+            return None
+
+    data: Dict[str, Any] = {}
+    if keys:
+        tasks = [asyncio.create_task(_one(k)) for k in keys]
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for t in pending:
+            t.cancel()
+        for k, t in zip(keys, tasks):
+            data[k] = t.result() if t in done else None
+    return data, (time.perf_counter() - t0) * 1000.0
+
+
+def prefetched(context: Dict[str, Any], key: str, loader: Loader) -> Any:
+    """Valor ya prefetcheado para `key`; si no hubo fase de datos, lo carga en el momento."""
+    data = context.get("data")
+    if isinstance(data, dict) and key in data:
+        return data[key]
+    try:
+        return loader()
+    except Exception:
+        return None
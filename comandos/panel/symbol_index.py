@@ -0,0 +1,160 @@
+# comandos/panel/symbol_index.py
+"""
+Índice persistido (base, quote) -> [(exchange, mercado)] para el autodiscovery
+de bloques como SIETE_DIAS.
+
+Se construye con la metadata de mercados (ccxt load_markets; solo se guarda la
+lista de símbolos, la instancia se descarta) y se persiste en disco: tras la
+primera resolución un par cuesta 0 llamadas para saber dónde está listado, y el
+bloque hace como mucho UN fetch de velas. `first()` revisa primero el exchange
+sugerido y se detiene en el primer acierto, así que una búsqueda en frío carga
+los mercados de un solo exchange en el caso habitual.
+
+Archivo: SYMBOL_INDEX_PATH
+    {"markets": {ex: {"t": ts, "symbols": [...]}},
+     "pairs":   {"BASE/QUOTE|hint": {"t": ts, "hits": [[ex, market], ...], "full": bool}}}
+"""
+from __future__ import annotations
+import json, threading, time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SYMBOL_INDEX_PATH = Path("symbol_index.json")
+MARKETS_TTL = 24 * 3600     # s; listado de mercados por exchange
+PAIR_TTL = 24 * 3600        # s; resolución (base, quote) (incluye "no listado")
+FAIL_TTL = 300              # s; exchange cuyo load_markets falló (red, geobloqueo, rate limit)
+
+AUTO_EX = ["binance", "kraken", "coinbase", "bybit", "okx", "kucoin", "bitstamp", "gate", "bitget", "gemini", "huobi"]
+AUTO_Q = ["USD", "USDT", "USDC"]
+
+Hit = Tuple[str, str]  # (exchange ccxt id, símbolo de mercado)
+
+_lock = threading.RLock()
+_data: Optional[Dict[str, Dict]] = None
+_ex_locks: Dict[str, threading.Lock] = {}
+_failed: Dict[str, float] = {}  # exchange -> ts del último load_markets fallido (solo en memoria)
+
+
+def _load() -> Dict[str, Dict]:
+    global _data
+    if _data is None:
+        try:
+            raw = json.loads(SYMBOL_INDEX_PATH.read_text(encoding="utf-8"))
+            _data = {"markets": dict(raw.get("markets") or {}), "pairs": dict(raw.get("pairs") or {})}
+        except Exception:
+            _data = {"markets": {}, "pairs": {}}
+    return _data
+
+
+def _save():
+    try:
+        tmp = SYMBOL_INDEX_PATH.with_suffix(".tmp")
+        tmp.write_text(json.dumps(_load(), separators=(",", ":")), encoding="utf-8")
+        tmp.replace(SYMBOL_INDEX_PATH)
+    except Exception as e:
+        print(f"⚠️ symbol_index: no pude guardar: {e}")
+
+
+def _load_markets(ex: str):
+    """Mercados del exchange sin retener la instancia ccxt (reusa los de /grafica si ya están)."""
+    from comandos.grafica import render
+    hit = render._markets_cached(ex)
+    if hit:
+        return hit[0]
+    import ccxt
+    return getattr(ccxt, ex)().load_markets()
+
+
+def _markets_of(exchange: str) -> Optional[List[str]]:
+    """
+    Símbolos spot del exchange (persistidos; load_markets solo si caducaron).
+    None si no se pudieron cargar: el fallo no se persiste y se reintenta pasado FAIL_TTL.
+    """
+    ex = exchange.lower()
+    with _lock:
+        if time.time() - _failed.get(ex, 0.0) < FAIL_TTL:
+            return None
+        m = _load()["markets"].get(ex)
+        if m and time.time() - float(m.get("t", 0)) < MARKETS_TTL:
+            return m.get("symbols") or []
+        lk = _ex_locks.setdefault(ex, threading.Lock())
+    with lk:  # un solo load_markets por exchange aunque haya varios renders
+        with _lock:
+            m = _load()["markets"].get(ex)
+            if m and time.time() - float(m.get("t", 0)) < MARKETS_TTL:
+                return m.get("symbols") or []
+        try:
+            symbols = sorted(s for s in _load_markets(ex) if ":" not in s)
+        except Exception as e:
+            print(f"⚠️ symbol_index: sin mercados de {ex}: {e}")
+            with _lock:
+                _failed[ex] = time.time()
+            return None
+        with _lock:
+            _failed.pop(ex, None)
+            _load()["markets"][ex] = {"t": time.time(), "symbols": symbols}
+            _save()
+        return symbols
+
+
+def _quotes(quote: Optional[str]) -> List[str]:
+    return [quote.strip().upper()] if quote else list(AUTO_Q)
+
+
+def resolve(base: str, quote: Optional[str], exchange_hint: Optional[str] = None,
+            max_hits: Optional[int] = None) -> List[Hit]:
+    """
+    Lista ordenada de (exchange, mercado) donde está listado el par; el exchange
+    sugerido va primero. [] = no listado en ningún exchange de AUTO_EX.
+    Con `max_hits` se detiene al llegar a esa cantidad (no carga el resto de exchanges).
+    """
+    base = base.strip().upper()
+    hint = (exchange_hint or "").lower()
+    key = f"{base}/{quote.strip().upper() if quote else '*'}|{hint}"
+    with _lock:
+        p = _load()["pairs"].get(key)
+        if p and time.time() - float(p.get("t", 0)) < PAIR_TTL:
+            hits = [tuple(h) for h in p.get("hits") or []]
+            if p.get("full", True) or (max_hits and len(hits) >= max_hits):
+                return hits[:max_hits] if max_hits else hits  # type: ignore[return-value]
+
+    order = ([hint] if hint else []) + [e for e in AUTO_EX if e != hint]
+    wanted = [f"{base}/{q}" for q in _quotes(quote)]
+    hits: List[Hit] = []
+    full = True
+    failed = False
+    for ex in order:
+        symbols = _markets_of(ex)
+        if symbols is None:
+            failed = True  # no se sabe si está listado ahí
+            continue
+        listed = set(symbols)
+        for sym in wanted:
+            if sym in listed:
+                hits.append((ex, sym))
+                break  # un mercado por exchange (el primer quote preferido)
+        if max_hits and len(hits) >= max_hits:
+            full = ex == order[-1]
+            break
+
+    # Con algún exchange caído la resolución es provisional: caduca en FAIL_TTL
+    t = time.time() - (PAIR_TTL - FAIL_TTL if failed else 0)
+    with _lock:
+        _load()["pairs"][key] = {"t": t, "hits": [list(h) for h in hits], "full": full}
+        _save()
+    return hits
+
+
+def first(base: str, quote: Optional[str], exchange_hint: Optional[str] = None) -> Optional[Hit]:
+    hits = resolve(base, quote, exchange_hint, max_hits=1)
+    return hits[0] if hits else None
+
+
+def forget(base: str, quote: Optional[str] = None):
+    """Olvida las resoluciones de un par (p. ej. si el fetch falló: el mercado se deslistó)."""
+    prefix = f"{base.strip().upper()}/{quote.strip().upper() if quote else '*'}|"
+    with _lock:
+        pairs = _load()["pairs"]
+        for k in [k for k in pairs if k.startswith(prefix)]:
+            pairs.pop(k, None)
+        _save()
@@ -2,13 +2,29 @@
 from __future__ import annotations
 import io
 import discord
+from datetime import datetime, timezone
 from discord.ui import View
 from discord import Interaction, File
 from data_store import load_db, get_cfg, set_channel_param
-from .panel import render_panel_image
+from swr_cache import fmt_age
+import executors
+from .panel import fmt_timings
+from . import cache as panel_cache
+from . import live as panel_live
+
+def panel_embed(base: discord.Embed | None, *, theme: str, borders: bool, filename: str, footer: str) -> discord.Embed:
+    """Embed del panel (reutiliza el del mensaje si existe)."""
+    emb = base or discord.Embed(title="📊 Panel")
+    emb.description = f"Tema: **{theme.capitalize()}** • Bordes: **{'On' if borders else 'Off'}**"
+    emb.set_image(url=f"attachment://{filename}")
+    emb.color = discord.Color.dark_embed() if theme == "dark" else discord.Color.light_grey()
+    emb.timestamp = datetime.now(timezone.utc)
+    emb.set_footer(text=footer)
+    return emb
 
 async def _ack(interaction: Interaction, *, ephemeral: bool = False) -> bool:
     """Defer seguro para evitar Unknown interaction (10062)."""
+    executors.mark_interactive()  # todos los botones pasan por aquí
     try:
         if not interaction.response.is_done():
             await interaction.response.defer(ephemeral=ephemeral)
@@ -37,10 +53,12 @@ async def _safe_edit_or_send(interaction: Interaction, *, embed: discord.Embed,
         pass
 
 class PanelView(View):
-    def __init__(self, theme: str, borders: bool):
-        super().__init__(timeout=900)
+    def __init__(self, theme: str, borders: bool, live: bool = False):
+        # En live la view debe sobrevivir mientras el loop siga editando el mensaje
+        super().__init__(timeout=(panel_live.LIVE_MAX_AGE + 900) if live else 900)
         self.theme = theme
         self.borders = borders
+        self.live = live
 
         # 1) Refresh button (verde) - primero a la izquierda
         self.btn_refresh = discord.ui.Button(
@@ -64,20 +82,33 @@ class PanelView(View):
         self.btn_borders.callback = self._on_toggle_borders
         self.add_item(self.btn_borders)
 
+        # 4) Live toggle (auto-actualización compartida)
+        live_label = "⏹️ Detener live" if live else "📡 Live"
+        live_style = discord.ButtonStyle.danger if live else discord.ButtonStyle.secondary
+        self.btn_live = discord.ui.Button(label=live_label, style=live_style)
+        self.btn_live.callback = self._on_toggle_live
+        self.add_item(self.btn_live)
+
     async def _update_message(self, interaction: Interaction, *, theme: str, borders: bool):
-        # Render nuevo
-        img_bytes = render_panel_image(interaction.guild_id, interaction.channel_id, theme=theme, borders=borders)  # type: ignore
-        filename = f"panel_{interaction.channel_id}_{theme}_{'b' if borders else 'nb'}.png"
-        file = File(io.BytesIO(img_bytes), filename=filename)
+        # Imagen pre-renderizada si la hay; si no, render en el momento
+        entry, hit = await panel_cache.render_cached(interaction.guild_id, interaction.channel_id, theme=theme, borders=borders)  # type: ignore
+        if not hit:
+            print(f"🖼️ panel {interaction.channel_id}: {fmt_timings(entry.timings)}")
+        filename = f"panel_{interaction.channel_id}_{theme}_{'b' if borders else 'nb'}.{entry.ext}"
+        file = File(io.BytesIO(entry.data), filename=filename)
+
+        live = panel_live.is_live(interaction.message.id if interaction.message else None)
+        footer = f"Pre-renderizado hace {fmt_age(entry.age)}" if hit else fmt_timings(entry.timings)
+        if live:
+            footer = f"📡 Live • {footer}"
+            panel_live.update(interaction.message.id, theme=theme, borders=borders, image_hash=panel_live.image_hash(entry.data))  # type: ignore
 
         # Actualizar embed
-        emb = interaction.message.embeds[0] if interaction.message and interaction.message.embeds else discord.Embed(title="📊 Panel")
-        emb.description = f"Tema: **{theme.capitalize()}** • Bordes: **{'On' if borders else 'Off'}**"
-        emb.set_image(url=f"attachment://{filename}")
-        emb.color = discord.Color.dark_embed() if theme == "dark" else discord.Color.light_grey()
+        base = interaction.message.embeds[0] if interaction.message and interaction.message.embeds else None
+        emb = panel_embed(base, theme=theme, borders=borders, filename=filename, footer=footer)
 
         # Nueva view para refrescar labels/estilos
-        new_view = PanelView(theme=theme, borders=borders)
+        new_view = PanelView(theme=theme, borders=borders, live=live)
 
         # Edita o envía nuevo si el original ya no existe
         await _safe_edit_or_send(interaction, embed=emb, file=file, view=new_view)
@@ -112,6 +143,18 @@ class PanelView(View):
         set_channel_param(db, interaction.guild_id, interaction.channel_id, "panel_borders", new_borders)  # type: ignore
         await self._update_message(interaction, theme=self.theme, borders=new_borders)
 
+    async def _on_toggle_live(self, interaction: Interaction):
+        if not await _ack(interaction):
+            return
+        msg = interaction.message
+        if msg is None:
+            return
+        if panel_live.is_live(msg.id):
+            panel_live.stop(msg.id)
+        else:
+            panel_live.start(msg, interaction.guild_id, interaction.channel_id, theme=self.theme, borders=self.borders)  # type: ignore
+        await self._update_message(interaction, theme=self.theme, borders=self.borders)
+
     async def on_error(self, error: Exception, item: discord.ui.Item, interaction: Interaction) -> None:
         # Captura de errores en callbacks; evita romper la View
         try:
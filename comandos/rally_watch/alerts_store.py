@@ -0,0 +1,19 @@
+# comandos/rally_watch/alerts_store.py
+from pathlib import Path
+from alert_log import AlertLog
+
+# Dedupe de alertas: key "<channel>:<symbol>:<tf>:<IGN|KILL>" -> bar_ts ya alertado.
+# El JSON antiguo se migra automáticamente la primera vez.
+_LOG = AlertLog(
+    Path(__file__).with_name("rally_watch_alerts.log"),
+    max_entries=5000,
+    max_age_s=30 * 86400,
+    legacy_json=Path(__file__).with_name("rally_watch_alerts.json"),
+)
+
+def seen(key: str, bar_ts: str) -> bool:
+    return _LOG.seen(key, bar_ts)
+
+def claim(key: str, bar_ts: str, cooldown_s: float = 0) -> bool:
+    """Variante atómica (multi-proceso) con cooldown opcional en segundos."""
+    return _LOG.claim(key, bar_ts, cooldown_s=cooldown_s)
@@ -0,0 +1,110 @@
+# comandos/rally_watch/chart_archive.py
+from __future__ import annotations
+import asyncio
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import executors
+
+# Las gráficas se generan en memoria y se mandan a Discord como bytes.
+# Opcionalmente se archiva una copia en disco, acotada por tamaño, cantidad y edad.
+DIR = Path(__file__).with_name("_charts")
+ENABLED = os.getenv("RALLY_CHART_ARCHIVE", "0") == "1"
+MAX_BYTES = int(os.getenv("RALLY_CHART_ARCHIVE_MAX_MB", "200")) * 1024 * 1024
+MAX_FILES = int(os.getenv("RALLY_CHART_ARCHIVE_MAX_FILES", "2000"))
+MAX_AGE = float(os.getenv("RALLY_CHART_ARCHIVE_MAX_DAYS", "7")) * 86400
+SWEEP_EVERY = 600  # s
+
+_lock = threading.Lock()
+_metrics: Dict[str, int] = {
+    "charts": 0,           # gráficas servidas (en memoria)
+    "bytes_served": 0,
+    "files_written": 0,    # archivadas en disco
+    "bytes_written": 0,
+    "files_evicted": 0,    # borradas por edad/tamaño/cantidad
+    "bytes_evicted": 0,
+    "sweeps": 0,
+}
+
+def _count(**inc):
+    with _lock:
+        for k, v in inc.items():
+            _metrics[k] = _metrics.get(k, 0) + int(v)
+
+def metrics() -> Dict[str, int]:
+    with _lock:
+        return dict(_metrics)
+
+def record(filename: str, data: bytes) -> None:
+    """Cuenta la gráfica servida y, si el archivo está activo, guarda una copia."""
+    _count(charts=1, bytes_served=len(data))
+    if not ENABLED:
+        return
+    try:
+        DIR.mkdir(parents=True, exist_ok=True)
+        p = DIR / filename
+        tmp = p.with_name(p.name + ".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(p)
+        _count(files_written=1, bytes_written=len(data))
+    except Exception as e:
+        print(f"⚠️ rally_watch: no pude archivar {filename}: {e}")
+
+def _scan() -> List[Tuple[float, int, Path]]:
+    out = []
+    if not DIR.exists():
+        return out
+    with os.scandir(DIR) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            out.append((st.st_mtime, st.st_size, Path(entry.path)))
+    out.sort()  # más viejo primero
+    return out
+
+def cleanup() -> Tuple[int, int]:
+    """Borra por edad y luego los más viejos hasta entrar en MAX_BYTES / MAX_FILES. (archivos, bytes)."""
+    files = _scan()
+    now = time.time()
+    total = sum(size for _, size, _ in files)
+    # sin archivo activo, todo lo que quede en disco es legado: se aplica solo la edad
+    max_files = MAX_FILES if ENABLED else len(files)
+    max_bytes = MAX_BYTES if ENABLED else total
+    evicted = freed = 0
+    remaining = len(files)
+    for mtime, size, path in files:
+        too_old = now - mtime > MAX_AGE
+        over = remaining > max_files or total > max_bytes
+        if not (too_old or over):
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        evicted += 1
+        freed += size
+        total -= size
+        remaining -= 1
+    _count(sweeps=1, files_evicted=evicted, bytes_evicted=freed)
+    return evicted, freed
+
+async def sweeper():
+    """Limpieza periódica en segundo plano (también purga los PNG acumulados de versiones viejas)."""
+    while True:
+        try:
+            n, b = await executors.run(executors.IO, cleanup)
+            if n:
+                m = metrics()
+                print(f"🧹 rally_watch _charts: -{n} archivos ({b / 1024 / 1024:.1f} MB) • "
+                      f"escritos {m['files_written']} ({m['bytes_written'] / 1024 / 1024:.1f} MB) • "
+                      f"desalojados {m['files_evicted']}")
+        except Exception as e:
+            print(f"⚠️ rally_watch: limpieza de _charts falló: {e}")
+        await asyncio.sleep(SWEEP_EVERY)
@@ -1,4 +1,5 @@
-import os
+import io
+import time
 import asyncio
 import discord
 from discord.ext import commands
@@ -6,6 +7,7 @@ from .storage import get_channel_cfg, set_channel_cfg, iter_channels, DEFAULT_TF
 from .detect import detect_rally_aggressive
 from .data_provider import get_ohlcv
 from .plotter import make_chart
+from . import chart_archive
 
 try:
     from .alerts_store import seen
@@ -29,8 +31,8 @@ except Exception:
         return False
 
 from data_store import load_db, get_cfg
+import executors
 
-CHART_DIR = os.path.join(os.path.dirname(__file__), "_charts")
 
 def _inject_into_command_meta():
     try:
@@ -87,6 +89,7 @@ class RallyWatchView(discord.ui.View):
 
     @discord.ui.button(label="SCAN NOW", style=discord.ButtonStyle.primary, custom_id="rallywatch_scan_now")
     async def scan_now(self, interaction: discord.Interaction, button: discord.ui.Button):
+        executors.mark_interactive()
         if not interaction.response.is_done():
             await interaction.response.defer(thinking=True)
 
@@ -102,26 +105,26 @@ class RallyWatchView(discord.ui.View):
         embeds, files, lines = [], [], []
         for tf in tfs:
             try:
-                df = await asyncio.to_thread(get_ohlcv, symbol, tf, 600, source)
+                df = await executors.run(executors.IO, get_ohlcv, symbol, tf, 600, source)
                 if df is None or df.empty:
                     lines.append(f"• {tf.upper()}: sin datos")
                     continue
-                sig = detect_rally_aggressive(df, keltner_mult=mult)
-                path = None
+                sig = await executors.run(executors.CPU, detect_rally_aggressive, df, keltner_mult=mult)
+                chart = None
                 if sig["ignition"] or sig["killswitch_exit"]:
-                    path = await asyncio.to_thread(make_chart, df, symbol, tf, CHART_DIR)
+                    chart = await executors.run(executors.RENDER, make_chart, df, symbol, tf)
                 if sig["ignition"]:
                     e = _embed_ignition(symbol, tf, sig)
-                    if path:
-                        fn = os.path.basename(path); e.set_image(url=f"attachment://{fn}")
-                        files.append(discord.File(path, filename=fn))
+                    if chart:
+                        fn, data = chart; e.set_image(url=f"attachment://{fn}")
+                        files.append(discord.File(io.BytesIO(data), filename=fn))
                     embeds.append(e)
                     lines.append(f"• {tf.upper()}: 🔥 IGNITION")
                 elif sig["killswitch_exit"]:
                     e = _embed_kill(symbol, tf)
-                    if path:
-                        fn = os.path.basename(path); e.set_image(url=f"attachment://{fn}")
-                        files.append(discord.File(path, filename=fn))
+                    if chart:
+                        fn, data = chart; e.set_image(url=f"attachment://{fn}")
+                        files.append(discord.File(io.BytesIO(data), filename=fn))
                     embeds.append(e)
                     lines.append(f"• {tf.upper()}: ⚠️ Killswitch")
                 else:
@@ -135,16 +138,37 @@ class RallyWatchView(discord.ui.View):
         else:
             await interaction.followup.send(content)
 
+# Gráficas de alertas: van al pool "render" (carril de fondo), así una ráfaga de
+# renders no frena el envío de otras alertas ni los fetch del pool "io".
+_chart_tasks: set = set()
+
+async def _attach_chart(msg: discord.Message, emb: discord.Embed, df, symbol: str, tf: str):
+    """Renderiza en el pool "render" y edita la alerta ya publicada para añadir la gráfica."""
+    t0 = time.perf_counter()
+    try:
+        fn, data = await executors.run(executors.RENDER, make_chart, df, symbol, tf, interactive=False)
+        emb.set_image(url=f"attachment://{fn}")
+        await msg.edit(embed=emb, attachments=[discord.File(io.BytesIO(data), filename=fn)])
+        print(f"📎 rally_watch: gráfica {symbol} {tf} adjuntada en {(time.perf_counter() - t0) * 1000:.0f} ms")
+    except Exception as e:
+        print(f"⚠️ rally_watch: no pude adjuntar la gráfica {symbol} {tf}: {e}")
+
 class RallyWatchCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.bg_task = self.bot.loop.create_task(self.worker())
+        self.archive_task = self.bot.loop.create_task(chart_archive.sweeper())
         _inject_into_command_meta()
 
     @commands.Cog.listener()
     async def on_ready(self):
         _inject_into_command_meta()
 
+    def _attach_chart_later(self, msg: discord.Message, emb: discord.Embed, df, symbol: str, tf: str):
+        t = asyncio.create_task(_attach_chart(msg, emb, df, symbol, tf))
+        _chart_tasks.add(t)
+        t.add_done_callback(_chart_tasks.discard)
+
     async def worker(self):
         await self.bot.wait_until_ready()
         while not self.bot.is_closed():
@@ -163,27 +187,21 @@ class RallyWatchCog(commands.Cog):
                     source = ch_cfg.get("data_source", "auto")
                     for tf in tfs:
                         try:
-                            df = await asyncio.to_thread(get_ohlcv, channel_symbol, tf, 600, source)
+                            df = await executors.run(executors.IO, get_ohlcv, channel_symbol, tf, 600, source)
                             if df is None or df.empty:
                                 await channel.send(f"❗{channel_symbol} {tf}: sin datos")
                                 continue
-                            sig = detect_rally_aggressive(df, keltner_mult=mult)
+                            sig = await executors.run(executors.CPU, detect_rally_aggressive, df, keltner_mult=mult)
                             bar_ts = sig.get("bar_ts", "")
                             key_base = f"{channel.id}:{channel_symbol}:{tf}"
                             if sig["ignition"] and not seen(key_base + ":IGN", bar_ts):
-                                path = await asyncio.to_thread(make_chart, df, channel_symbol, tf, CHART_DIR)
-                                fn = os.path.basename(path)
-                                file = discord.File(path, filename=fn)
                                 emb = _embed_ignition(channel_symbol, tf, sig)
-                                emb.set_image(url=f"attachment://{fn}")
-                                await channel.send(embed=emb, file=file)
+                                msg = await channel.send(embed=emb)  # la señal sale ya; la gráfica llega después
+                                self._attach_chart_later(msg, emb, df, channel_symbol, tf)
                             elif sig["killswitch_exit"] and not seen(key_base + ":KILL", bar_ts):
-                                path = await asyncio.to_thread(make_chart, df, channel_symbol, tf, CHART_DIR)
-                                fn = os.path.basename(path)
-                                file = discord.File(path, filename=fn)
                                 emb = _embed_kill(channel_symbol, tf)
-                                emb.set_image(url=f"attachment://{fn}")
-                                await channel.send(embed=emb, file=file)
+                                msg = await channel.send(embed=emb)
+                                self._attach_chart_later(msg, emb, df, channel_symbol, tf)
                         except Exception as e:
                             try:
                                 await channel.send(f"❗{channel_symbol} {tf}: error: {e}")
@@ -1,5 +1,4 @@
 import os
-import time
 from typing import Optional
 import pandas as pd
 
@@ -12,12 +11,13 @@ except Exception:
 
 import requests
 
+import coingecko
+
 _EXCH_ORDER = ["binance", "bybit", "okx", "kraken", "coinbase"]
 _TF_MAP = {"15m":"15m","30m":"30m","1h":"1h","4h":"4h","1d":"1d"}
 
 # Hard timeouts (ms) to prevent blocking the event loop too long
 _CCXT_TIMEOUT_MS = int(os.getenv("RALLY_CCXT_TIMEOUT_MS", "7000"))  # 7s
-_REQ_TIMEOUT = float(os.getenv("RALLY_HTTP_TIMEOUT_S", "8"))        # 8s
 
 def _to_ccxt_symbol(symbol_dash: str) -> str:
     return symbol_dash.replace("-", "/").upper()
@@ -89,69 +89,52 @@ def _get_from_ccxt(symbol: str, tf: str, limit: int) -> Optional[pd.DataFrame]:
 
 # ---------------- CoinGecko fallback ----------------
 
-def _normalize_days(requested_points: int, tf: str):
-    per_day = {"15m":96,"30m":48,"1h":24,"4h":6,"1d":1}.get(tf,24)
-    approx_days = max(1, int(requested_points / per_day))
-    for v in [1,7,14,30,90,180,365]:
-        if approx_days <= v:
-            return v
-    return "max"
-
-def _cg_request(url: str, params: dict, retries: int = 1, timeout: float = _REQ_TIMEOUT):
-    headers = {"accept":"application/json","User-Agent":"Mozilla/5.0 RallyWatch/1.0"}
-    api_key = os.getenv("COINGECKO_API_KEY") or os.getenv("CG_API_KEY")
-    if api_key:
-        headers["x-cg-pro-api-key"] = api_key
-    last_exc = None
-    for i in range(retries + 1):
-        try:
-            r = requests.get(url, params=params, headers=headers, timeout=timeout)
-            if r.status_code in (401, 403):
-                r.raise_for_status()
-            if r.status_code == 429 and i < retries:
-                time.sleep(2.0 + i)
-                continue
-            r.raise_for_status()
-            return r.json()
-        except Exception as e:
-            last_exc = e
-            time.sleep(0.2)
-            continue
-    if last_exc:
-        raise last_exc
-
-def _tf_floor_rule(tf: str) -> str:
-    if tf in ("15m","30m","1h"):
-        return "h"
-    if tf == "4h":
-        return "4h"
-    return "d"
+# /coins/{id}/ohlc elige la granularidad por `days`: 1-2 -> velas de 30m, 3-30 -> 4h,
+# >30 -> 4 días. Por timeframe: (days, regla de reagrupado o None si es nativa).
+# 15m es más fino que cualquier vela de la fuente: no se sirve.
+_CG_OHLC = {
+    "30m": (2, None),
+    "1h":  (2, "1h"),
+    "4h":  (30, None),
+    "1d":  (30, "1D"),
+}
 
 def _from_coingecko(symbol_dash: str, tf: str, limit: int = 600) -> Optional[pd.DataFrame]:
+    # Velas reales de /ohlc vía el cliente compartido; market_chart solo aporta
+    # el volumen (total_volumes 24h, último valor conocido al cierre de cada vela).
+    spec = _CG_OHLC.get(tf)
+    if spec is None:
+        return None
+    days, rule = spec
     base, quote = symbol_dash.split("-")
-    coin_id = base.lower()
-    vs = quote.lower()
-    days = _normalize_days(limit, tf)
-    interval = "hourly" if (isinstance(days, int) and days <= 30) else "daily"
+    coin_id = coingecko.coin_id(base)
+    if not coin_id:
+        return None
+    vs = "usd" if quote.upper() in ("USD", "USDT", "USDC") else quote.lower()
 
-    ohlc_url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/ohlc"
-    ohlc = _cg_request(ohlc_url, {"vs_currency": vs, "days": days})
+    ohlc = coingecko.ohlc(coin_id, vs, days, ttl=60)
     if not isinstance(ohlc, list) or len(ohlc) == 0:
         return None
     df = pd.DataFrame(ohlc, columns=["timestamp","open","high","low","close"])
     df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-
-    mc_url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart"
-    mc = _cg_request(mc_url, {"vs_currency": vs, "days": days, "interval": interval})
-    if isinstance(mc, dict) and "total_volumes" in mc:
-        vol = pd.DataFrame(mc["total_volumes"], columns=["ts","volume"])
+    if rule:
+        g = df.set_index("timestamp").resample(rule, label="right", closed="right")
+        df = pd.DataFrame({
+            "open": g["open"].first(),
+            "high": g["high"].max(),
+            "low": g["low"].min(),
+            "close": g["close"].last(),
+        }).dropna().reset_index()
+    df = df.sort_values("timestamp").reset_index(drop=True)
+
+    mc = coingecko.market_chart(coin_id, vs, days, ttl=60)
+    vols = mc.get("total_volumes") if isinstance(mc, dict) else None
+    if vols:
+        vol = pd.DataFrame(vols, columns=["ts","volume"])
         vol["timestamp"] = pd.to_datetime(vol["ts"], unit="ms")
-        floor_rule = "h" if interval == "hourly" else "d"
-        vol["bucket"] = vol["timestamp"].dt.floor(floor_rule)
-        vol = vol.groupby("bucket", as_index=False)["volume"].last()
-        df["bucket"] = df["timestamp"].dt.floor(_tf_floor_rule(tf))
-        df = df.merge(vol.rename(columns={"bucket":"bucket","volume":"volume"}), on="bucket", how="left").drop(columns=["bucket"])
-        df["volume"] = df["volume"].ffill()
+        vol = vol[["timestamp","volume"]].sort_values("timestamp")
+        df = pd.merge_asof(df, vol, on="timestamp", direction="backward")
+        df["volume"] = df["volume"].bfill()
     else:
         df["volume"] = pd.NA
 
@@ -172,6 +155,9 @@ def get_ohlcv(symbol: str, tf: str, limit: int = 600, source: str = "auto") -> O
     except requests.HTTPError as e:  # type: ignore[name-defined]
         print(f"CoinGecko HTTP {e.response.status_code}: {e}")
         return None
+    except coingecko.RateBudgetExceeded as e:
+        print(f"CoinGecko: {e}")
+        return None
     except Exception as e:
         print(f"CoinGecko provider error for {symbol} {tf}: {e}")
         return None
@@ -1,10 +1,12 @@
-from pathlib import Path
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import pandas as pd
 from datetime import datetime
 
+import image_encode
+import chart_cache
+import fastchart
+
+from . import chart_archive
+
 # ========= Technicals (pro-grade) =========
 def rma(series: pd.Series, period: int) -> pd.Series:
     """Wilder's RMA (TradingView's 'rma')."""
@@ -21,43 +23,48 @@ def rsi_wilder(close: pd.Series, period: int = 5) -> pd.Series:
     return rsi.bfill().fillna(50)
 
 # ========= Plot =========
-def make_chart(df: pd.DataFrame, symbol: str, tf: str, out_dir: str | Path) -> str:
-    out_dir = Path(out_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
-
+def _prepare(df: pd.DataFrame) -> pd.DataFrame:
     data = df.copy().tail(200).reset_index(drop=True)
     data["ema9"] = data["close"].ewm(span=9, adjust=False).mean()
     data["ema21"] = data["close"].ewm(span=21, adjust=False).mean()
     data["rsi5"] = rsi_wilder(data["close"], period=5)
+    return data
+
+def _render(df: pd.DataFrame, symbol: str, tf: str) -> image_encode.Encoded:
+    data = _prepare(df)
+    if not fastchart.use_fast():
+        return _render_mpl(data, symbol, tf)
+    S = fastchart.Series
+    img = fastchart.render(
+        [
+            fastchart.Pane([S(data["close"].to_numpy(), "Close"), S(data["ema9"].to_numpy(), "EMA9"),
+                            S(data["ema21"].to_numpy(), "EMA21")], weight=3, ylabel="Precio", legend=True),
+            fastchart.Pane([S(data["rsi5"].to_numpy(), "RSI5 (Wilder)")], weight=1.2, ylim=(0, 100),
+                           hlines=(70, 50, 30), ylabel="RSI5"),
+        ],
+        n=len(data), title=f"{symbol} • {tf.upper()}",
+        xticks=fastchart.time_ticks(list(data["timestamp"]), "%m-%d %H:%M"), size=(1190, 800),
+    )
+    return image_encode.encode(img, "chart")
+
+def _render_mpl(data: pd.DataFrame, symbol: str, tf: str) -> image_encode.Encoded:
+    import mpl_templates
 
-    x = range(len(data))
     xticks_idx = list(range(0, len(data), max(1, len(data)//6)))
     xtick_labels = [data["timestamp"].iloc[i].strftime("%m-%d %H:%M") for i in xticks_idx]
+    with mpl_templates.checkout("rally") as t:
+        mpl_templates.update_rally(t, data, title=f"{symbol} • {tf.upper()}",
+                                   xticks_idx=xticks_idx, xtick_labels=xtick_labels)
+        return image_encode.encode_figure(t.fig, "chart")
+
+def render_chart(df: pd.DataFrame, symbol: str, tf: str) -> image_encode.Encoded:
+    """Gráfica codificada; servida de chart_cache si la serie no cambió (SCAN NOW repetido, alertas)."""
+    key = chart_cache.make_key("rally", symbol, None, tf, df, style=f"close_ema_rsi:{fastchart.CHART_RENDERER}")
+    return chart_cache.get_or_render(key, lambda: _render(df, symbol, tf))
 
-    fig = plt.figure(figsize=(9, 6), dpi=140)
-    gs = fig.add_gridspec(2, 1, height_ratios=[3, 1.2], hspace=0.25)
-
-    ax1 = fig.add_subplot(gs[0, 0])
-    ax1.plot(x, data["close"], linewidth=1.2, label="Close")
-    ax1.plot(x, data["ema9"], linewidth=1.2, label="EMA9")
-    ax1.plot(x, data["ema21"], linewidth=1.2, label="EMA21")
-    ax1.set_title(f"{symbol} • {tf.upper()}")
-    ax1.set_ylabel("Precio")
-    ax1.set_xticks(xticks_idx, labels=xtick_labels, rotation=0, fontsize=8)
-    ax1.legend(loc="upper left", fontsize=8)
-    ax1.grid(alpha=0.2)
-
-    ax2 = fig.add_subplot(gs[1, 0])
-    ax2.plot(x, data["rsi5"], linewidth=1.2, label="RSI5 (Wilder)")
-    for lvl in (70, 50, 30):
-        ax2.axhline(lvl, linestyle="--", linewidth=0.8)
-    ax2.set_ylabel("RSI5")
-    ax2.set_xticks(xticks_idx, labels=xtick_labels, rotation=0, fontsize=8)
-    ax2.set_ylim(0, 100)
-    ax2.grid(alpha=0.2)
-
-    fname = f"{symbol.replace('/', '-').replace(' ', '')}_{tf}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.png"
-    out_path = out_dir / fname
-    fig.savefig(out_path, bbox_inches="tight")
-    plt.close(fig)
-    return str(out_path)
+def make_chart(df: pd.DataFrame, symbol: str, tf: str) -> tuple[str, bytes]:
+    """(nombre de archivo, bytes) en memoria; para discord.File(io.BytesIO(data), filename=...)."""
+    enc = render_chart(df, symbol, tf)
+    fname = enc.filename(f"{symbol.replace('/', '-').replace(' ', '')}_{tf}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}")
+    chart_archive.record(fname, enc.data)
+    return fname, enc.data
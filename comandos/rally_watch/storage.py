@@ -1,23 +1,47 @@
 
 from __future__ import annotations
+import copy
 import json
+import threading
 from pathlib import Path
-from typing import Dict, Iterator, Tuple
+from typing import Dict, Iterator, Optional, Tuple
 
 FILE = Path(__file__).with_name("rally_watch_state.json")
 
 DEFAULT_TFS = ["15m","30m","1h","4h","1d"]
 
+# Cache en memoria; se relee solo si cambia el mtime y no se reescribe si no hay cambios
+_lock = threading.RLock()
+_cache: Optional[Dict] = None
+_cache_mtime: Optional[int] = None
+
+def _file_mtime() -> Optional[int]:
+    try:
+        return FILE.stat().st_mtime_ns
+    except OSError:
+        return None
+
 def load_state() -> Dict:
-    if FILE.exists():
-        try:
-            return json.loads(FILE.read_text(encoding="utf-8"))
-        except Exception:
-            return {}
-    return {}
+    global _cache, _cache_mtime
+    with _lock:
+        mtime = _file_mtime()
+        if _cache is None or mtime != _cache_mtime:
+            data: Dict = {}
+            if mtime is not None:
+                try:
+                    data = json.loads(FILE.read_text(encoding="utf-8"))
+                except Exception:
+                    data = {}
+            _cache, _cache_mtime = data, mtime
+        return copy.deepcopy(_cache)
 
 def save_state(data: Dict) -> None:
-    FILE.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    global _cache, _cache_mtime
+    with _lock:
+        if _cache is not None and data == _cache and _file_mtime() == _cache_mtime:
+            return
+        FILE.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+        _cache, _cache_mtime = copy.deepcopy(data), _file_mtime()
 
 def _default_cfg() -> Dict:
     return {
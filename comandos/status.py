@@ -1,27 +1,44 @@
+import asyncio
 from discord import app_commands, Interaction
 from data_store import load_db, get_cfg
-import ccxt
 from ui import make_status_embed  # 👈 usamos el helper nuevo
+from comandos.grafica.render import TICKERS, last_price_swr, pending_refreshes
+import snapshots
+import executors
 
-def _is_geoblocked(exc: Exception) -> bool:
-    s = str(exc).lower()
-    return "403" in s or "forbidden" in s or "cloudfront" in s
+STATUS_WAIT_S = 2.0  # margen dentro de los 3 s de Discord si no hay nada cacheado
 
 def setup(bot):
     @bot.tree.command(name="status", description="Muestra la configuración de ESTE canal.")
     async def status(interaction: Interaction):
+        executors.mark_interactive()
         db = load_db()
         cfg = get_cfg(db, interaction.guild_id, interaction.channel_id)
+        exchange, symbol = cfg['exchange'], cfg['symbol']
 
-        last_price = None
-        try:
-            ex = getattr(ccxt, cfg['exchange'])()
-            ex.load_markets()
-            if cfg['symbol'] in ex.markets:
-                last_price = ex.fetch_ticker(cfg['symbol']).get("last")
-        except Exception as e:
-            # precio se queda en None; el embed ya mostrará N/A
-            pass
+        # 1) snapshot del scanner; 2) cache SWR: responde ya con el último valor
+        snap = snapshots.latest_price(exchange, symbol)
+        if snap is not None:
+            last_price, age = snap
+        else:
+            try:
+                last_price, age = await last_price_swr(exchange, symbol, wait_timeout=STATUS_WAIT_S)
+            except Exception:
+                # precio se queda en None; el embed ya mostrará N/A
+                last_price, age = None, None
 
-        emb = make_status_embed(cfg, last_price)
+        emb = make_status_embed(cfg, last_price, price_age=age)
         await interaction.response.send_message(embed=emb)
+
+        # 3) si quedó un refresco en segundo plano, actualizamos el mensaje al terminar
+        pending = pending_refreshes(exchange, symbol)
+        if not pending:
+            return
+        await asyncio.gather(*pending, return_exceptions=True)
+        hit = TICKERS.peek(("last", exchange, symbol))
+        if hit is None:
+            return
+        try:
+            await interaction.edit_original_response(embed=make_status_embed(cfg, hit[0], price_age=hit[1]))
+        except Exception:
+            pass
@@ -5,6 +5,7 @@ from comandos.grafica.render import fetch_ohlcv_df
 from indicadores.core import compute_all_indicators
 from indicadores.fib_pivots import intelligent_fib, classic_pivots_from_df_daily, build_zones_confluence
 from comandos.grafica.utils import fmt_price
+import snapshots
 from datetime import datetime, timezone
 
 MAX_TFS = 4
@@ -31,15 +32,20 @@ def setup(bot):
 
         embeds = []
         # Prepara pivots (día previo) una sola vez
-        try:
-            df1d = fetch_ohlcv_df(exchange, symbol, "1d", limit=30)
-        except Exception as e:
-            df1d = None
+        df1d = snapshots.frame(exchange, symbol, "1d", min_rows=2)
+        if df1d is None:
+            try:
+                df1d = fetch_ohlcv_df(exchange, symbol, "1d", limit=30)
+            except Exception as e:
+                df1d = None
 
         for tf in tfs:
             try:
-                df = fetch_ohlcv_df(exchange, symbol, tf, limit=300)
-                df = compute_all_indicators(df)
+                # Historial del scanner (OHLCV + indicadores) si está fresco
+                df = snapshots.frame(exchange, symbol, tf, min_rows=200)
+                if df is None:
+                    df = fetch_ohlcv_df(exchange, symbol, tf, limit=300)
+                    df = compute_all_indicators(df)
 
                 piv = None
                 if df1d is not None:
@@ -1,6 +1,6 @@
-import json, os
+import json, os, threading
 from pathlib import Path
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional, Set
 
 DB_PATH = Path("state.json")
 
@@ -16,17 +16,122 @@ DEFAULTS = {
     "enabled": False
 }
 
+# --------------------------------------------------------------------
+# Cache de proceso: state.json se lee una sola vez y se mantiene en memoria.
+# Se recarga solo si cambia el mtime del archivo (ediciones externas).
+# --------------------------------------------------------------------
+_lock = threading.RLock()
+_cache: Optional[Dict[str, Any]] = None
+_cache_mtime: Optional[int] = None
+_version = 0
+
+# listener(channel_key, cfg_nuevo, claves_cambiadas)
+Listener = Callable[[str, Dict[str, Any], Set[str]], None]
+_listeners: List[Listener] = []
+
+def _file_mtime() -> Optional[int]:
+    try:
+        return DB_PATH.stat().st_mtime_ns
+    except OSError:
+        return None
+
+def _copy_db(db: Dict[str, Any]) -> Dict[str, Any]:
+    # Copia por canal: los callers mutan el cfg y luego llaman a save_db
+    return {k: (dict(v) if isinstance(v, dict) else v) for k, v in db.items()}
+
+def _diff(old: Dict[str, Any], new: Dict[str, Any]) -> List[tuple]:
+    events = []
+    for key in set(old) | set(new):
+        a = old.get(key) if isinstance(old.get(key), dict) else {}
+        b = new.get(key) if isinstance(new.get(key), dict) else {}
+        changed = {k for k in set(a) | set(b) if a.get(k) != b.get(k)}
+        if changed:
+            events.append((key, dict(b), changed))
+    return events
+
+def _notify(events: List[tuple]):
+    for key, cfg, changed in events:
+        for fn in list(_listeners):
+            try:
+                fn(key, cfg, changed)
+            except Exception as e:
+                print(f"⚠️ data_store listener falló para {key}: {e}")
+
+def _refresh_locked() -> List[tuple]:
+    """Recarga desde disco si el mtime cambió. Devuelve eventos pendientes."""
+    global _cache, _cache_mtime, _version
+    mtime = _file_mtime()
+    if _cache is not None and mtime == _cache_mtime:
+        return []
+    try:
+        fresh = json.loads(DB_PATH.read_text(encoding="utf-8")) if mtime is not None else {}
+    except Exception:
+        # Archivo a medio escribir por otro proceso: seguimos con lo que hay
+        return []
+    first_load = _cache is None
+    events = [] if first_load else _diff(_cache, fresh)  # type: ignore[arg-type]
+    _cache, _cache_mtime = fresh, mtime
+    if events:
+        _version += 1
+    return events
+
+def refresh() -> int:
+    """Fuerza la comprobación del mtime (útil para detectar ediciones externas)."""
+    with _lock:
+        events = _refresh_locked()
+    _notify(events)
+    return len(events)
+
+def subscribe(listener: Listener) -> Callable[[], None]:
+    """Registra un listener de cambios de config. Devuelve la función para desuscribirse."""
+    _listeners.append(listener)
+    def _unsubscribe():
+        try:
+            _listeners.remove(listener)
+        except ValueError:
+            pass
+    return _unsubscribe
+
+def db_version() -> int:
+    """Contador que sube con cada cambio efectivo del store (propio o externo)."""
+    with _lock:
+        return _version
+
 def load_db() -> Dict[str, Any]:
-    if DB_PATH.exists():
-        return json.loads(DB_PATH.read_text(encoding="utf-8"))
-    return {}
+    with _lock:
+        events = _refresh_locked()
+        db = _copy_db(_cache or {})
+    _notify(events)
+    return db
 
 def save_db(db: Dict[str, Any]):
-    DB_PATH.write_text(json.dumps(db, indent=2, ensure_ascii=False), encoding="utf-8")
+    global _cache, _cache_mtime, _version
+    with _lock:
+        DB_PATH.write_text(json.dumps(db, indent=2, ensure_ascii=False), encoding="utf-8")
+        events = _diff(_cache or {}, db)
+        _cache, _cache_mtime = _copy_db(db), _file_mtime()
+        if events:
+            _version += 1
+    _notify(events)
 
 def channel_key(guild_id: int, channel_id: int) -> str:
     return f"{guild_id}:{channel_id}"
 
+def read_cfg(guild_id: int, channel_id: int) -> Dict[str, Any]:
+    """
+    Lectura rápida de un canal desde la cache (sin copiar el store completo).
+    Si el canal no existe, se comporta como get_cfg (crea defaults).
+    """
+    key = channel_key(guild_id, channel_id)
+    with _lock:
+        events = _refresh_locked()
+        cfg = (_cache or {}).get(key)
+        cfg = dict(cfg) if isinstance(cfg, dict) else None
+    _notify(events)
+    if cfg:
+        return cfg
+    return get_cfg(load_db(), guild_id, channel_id)
+
 def get_cfg(db, guild_id: int, channel_id: int) -> Dict[str, Any]:
     key = channel_key(guild_id, channel_id)
     cfg = db.get(key, {}).copy()
@@ -0,0 +1,109 @@
+# downsample.py
+"""
+Reducción de puntos antes de dibujar series largas (1000-5000 velas).
+
+Dibujar más puntos que píxeles solo cuesta tiempo: cada renderer (fastchart y
+mpl_templates) pasa cada serie — precio e indicadores — por `indices()` con un
+tope ≈ ancho del área de dibujo en píxeles.
+
+- "lttb": Largest-Triangle-Three-Buckets (conserva la forma) + mínimo y máximo
+  globales, para que los extremos visibles no desaparezcan.
+- "minmax": envolvente por bucket (primero, mínimo, máximo, último): exacta en
+  extremos a resolución de píxel.
+- "off": sin reducción.
+
+Método por entorno: CHART_DOWNSAMPLE (def. "lttb").
+Los indicadores se calculan antes sobre la serie completa; aquí solo se elige
+qué puntos se dibujan (se devuelven índices, no valores). Para velas,
+`ohlc_buckets` agrupa velas contiguas (no se pueden saltar).
+"""
+from __future__ import annotations
+import math, os
+from typing import Optional, Sequence
+
+import numpy as np
+
+CHART_DOWNSAMPLE = os.getenv("CHART_DOWNSAMPLE", "lttb").strip().lower()  # lttb | minmax | off
+
+
+def lttb(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Índices elegidos por LTTB (x = 0..n-1). Incluye siempre el primero y el último."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float)
+    every = (n - 2) / (n_out - 2)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    a = 0
+    for i in range(n_out - 2):
+        start = int(math.floor(i * every)) + 1
+        end = int(math.floor((i + 1) * every)) + 1
+        nstart, nend = end, min(int(math.floor((i + 2) * every)) + 1, n)
+        if nstart >= nend:
+            nstart, nend = n - 1, n
+        avg_x = x[nstart:nend].mean()
+        avg_y = y[nstart:nend].mean()
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - avg_x) * (y[start:end] - ay) - (ax - x[start:end]) * (avg_y - ay))
+        a = start + int(np.argmax(area))
+        out[i + 1] = a
+    out[-1] = n - 1
+    return out
+
+
+def minmax(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Envolvente: por bucket se guardan primero, mínimo, máximo y último (≤ n_out puntos)."""
+    n = len(y)
+    buckets = max(1, n_out // 4)
+    if n <= n_out or buckets >= n:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    picks = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi <= lo:
+            continue
+        seg = y[lo:hi]
+        picks.extend((lo, hi - 1, lo + int(np.argmin(seg)), lo + int(np.argmax(seg))))
+    return np.unique(np.asarray(picks, dtype=np.int64))
+
+
+def indices(values: Sequence[float], max_points: int, method: Optional[str] = None) -> np.ndarray:
+    """
+    Índices (ordenados) de los puntos a dibujar, como mucho ≈ max_points.
+    Los NaN se ignoran al elegir (los cortes de línea del renderer se pierden
+    solo si la serie se reduce).
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    method = (method or CHART_DOWNSAMPLE)
+    max_points = int(max_points)
+    if method == "off" or n <= max_points or max_points < 3:
+        return np.arange(n)
+
+    finite = np.flatnonzero(np.isfinite(y))
+    if finite.size <= max_points:
+        return finite
+    yf = y[finite]
+    if method == "minmax":
+        return finite[minmax(yf, max_points)]
+    sel = lttb(yf, max_points)
+    # Extremos globales siempre presentes
+    sel = np.union1d(sel, [int(np.argmin(yf)), int(np.argmax(yf))])
+    return finite[sel]
+
+
+def ohlc_buckets(o, h, l, c, v, max_bars: int):
+    """
+    Velas agrupadas en ≤ max_bars buckets contiguos (open primero, high máx,
+    low mín, close último, volumen suma). Devuelve (o, h, l, c, v, idx_inicio).
+    """
+    o, h, l, c, v = (np.asarray(a, dtype=float) for a in (o, h, l, c, v))
+    n = len(c)
+    if n <= max_bars or max_bars < 1:
+        return o, h, l, c, v, np.arange(n)
+    starts = np.linspace(0, n, max_bars + 1).astype(np.int64)[:-1]
+    starts = np.unique(starts)
+    ends = np.append(starts[1:], n) - 1
+    return (o[starts], np.maximum.reduceat(h, starts), np.minimum.reduceat(l, starts),
+            c[ends], np.add.reduceat(np.nan_to_num(v), starts), starts)
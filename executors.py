@@ -0,0 +1,188 @@
+# executors.py
+"""
+Executors dedicados por tipo de trabajo, con carril prioritario para lo interactivo.
+
+Antes todo iba por el executor por defecto de asyncio (`asyncio.to_thread`): un
+barrido en segundo plano (rally_watch, prerender de paneles, prefetch de
+/grafica) podía ocupar todos los hilos mientras un usuario esperaba su /panel.
+
+Pools (tamaño por entorno):
+    io      EXEC_IO_WORKERS      (def. 16)   red: ccxt, CoinGecko, disco
+    cpu     EXEC_CPU_WORKERS     (def. nº CPUs) indicadores, paneles de grids
+    render  EXEC_RENDER_WORKERS  (def. 3)    panel, gráficas, codificación
+
+Prioridad: cada pool tiene dos colas. Los trabajos interactivos se toman
+siempre primero y EXEC_RESERVED hilos por pool (def. 1) solo atienden la cola
+interactiva, así siempre hay un hilo libre para un usuario aunque el fondo
+esté saturado.
+
+El carril se elige con `run(..., interactive=True/False)` o, por defecto, con
+el contexto de la tarea: los handlers de comandos/botones llaman a
+`mark_interactive()` y todo lo que awaiten (SWR, prefetch del panel…) hereda
+la prioridad. Las tareas de fondo lanzadas desde ahí usan `mark_background()`.
+
+Métricas por pool y carril: profundidad de cola, espera y duración
+(`stats()` / `summary()`).
+"""
+from __future__ import annotations
+import asyncio, contextvars, os, threading, time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+IO, CPU, RENDER = "io", "cpu", "render"
+SIZES = {
+    IO: int(os.getenv("EXEC_IO_WORKERS", "16")),
+    CPU: int(os.getenv("EXEC_CPU_WORKERS", str(os.cpu_count() or 2))),
+    RENDER: int(os.getenv("EXEC_RENDER_WORKERS", "3")),
+}
+RESERVED = int(os.getenv("EXEC_RESERVED", "1"))
+
+_interactive: contextvars.ContextVar[bool] = contextvars.ContextVar("exec_interactive", default=False)
+
+
+def mark_interactive():
+    """La tarea actual (y lo que cree) va por el carril prioritario."""
+    _interactive.set(True)
+
+
+def mark_background():
+    _interactive.set(False)
+
+
+def is_interactive() -> bool:
+    return _interactive.get()
+
+
+_Job = Tuple[Future, Callable[[], Any], float]
+
+
+class _LaneStats:
+    __slots__ = ("n", "wait_ms", "max_wait_ms", "run_ms", "max_depth")
+
+    def __init__(self):
+        self.n = 0
+        self.wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.run_ms = 0.0
+        self.max_depth = 0
+
+
+class PriorityExecutor:
+    """Pool de hilos con cola interactiva + cola de fondo y hilos reservados."""
+
+    def __init__(self, name: str, workers: int, reserved: int = RESERVED):
+        self.name = name
+        self.workers = max(1, workers)
+        self.reserved = min(max(0, reserved), self.workers - 1)
+        self._hi: Deque[_Job] = deque()
+        self._lo: Deque[_Job] = deque()
+        self._cond = threading.Condition()
+        self._threads: list = []
+        self._stats = {True: _LaneStats(), False: _LaneStats()}
+        self._busy = 0
+
+    def _start(self):
+        for i in range(self.workers):
+            only_hi = i < self.reserved
+            t = threading.Thread(target=self._loop, args=(only_hi,), daemon=True,
+                                 name=f"exec-{self.name}-{'hi' if only_hi else i}")
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, fn: Callable[..., Any], *args, interactive: bool = False, **kwargs) -> Future:
+        fut: Future = Future()
+        ctx = contextvars.copy_context()  # el carril y demás contextvars viajan al hilo
+        job: _Job = (fut, lambda: ctx.run(fn, *args, **kwargs), time.perf_counter())
+        with self._cond:
+            if not self._threads:
+                self._start()
+            q = self._hi if interactive else self._lo
+            q.append(job)
+            st = self._stats[interactive]
+            st.max_depth = max(st.max_depth, len(q))
+            self._cond.notify_all()
+        return fut
+
+    def _loop(self, only_hi: bool):
+        while True:
+            with self._cond:
+                while True:
+                    if self._hi:
+                        job, hi = self._hi.popleft(), True
+                        break
+                    if not only_hi and self._lo:
+                        job, hi = self._lo.popleft(), False
+                        break
+                    self._cond.wait()
+                self._busy += 1
+            fut, call, queued = job
+            started = time.perf_counter()
+            try:
+                if fut.set_running_or_notify_cancel():
+                    try:
+                        fut.set_result(call())
+                    except BaseException as e:
+                        fut.set_exception(e)
+            finally:
+                done = time.perf_counter()
+                with self._cond:
+                    self._busy -= 1
+                    st = self._stats[hi]
+                    st.n += 1
+                    w = (started - queued) * 1000.0
+                    st.wait_ms += w
+                    st.max_wait_ms = max(st.max_wait_ms, w)
+                    st.run_ms += (done - started) * 1000.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            out: Dict[str, Any] = {"workers": self.workers, "reserved": self.reserved, "busy": self._busy,
+                                   "queued_interactive": len(self._hi), "queued_background": len(self._lo)}
+            for hi, st in self._stats.items():
+                lane = "interactive" if hi else "background"
+                n = max(1, st.n)
+                out[lane] = {"n": st.n, "avg_wait_ms": st.wait_ms / n, "max_wait_ms": st.max_wait_ms,
+                             "avg_run_ms": st.run_ms / n, "max_depth": st.max_depth}
+            return out
+
+
+_pools: Dict[str, PriorityExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def pool(kind: str) -> PriorityExecutor:
+    with _pools_lock:
+        p = _pools.get(kind)
+        if p is None:
+            p = _pools[kind] = PriorityExecutor(kind, SIZES.get(kind, 4))
+        return p
+
+
+def submit(kind: str, fn: Callable[..., Any], *args, interactive: Optional[bool] = None, **kwargs) -> Future:
+    """Future de concurrent.futures (para usar desde hilos)."""
+    lane = is_interactive() if interactive is None else interactive
+    return pool(kind).submit(fn, *args, interactive=lane, **kwargs)
+
+
+async def run(kind: str, fn: Callable[..., Any], *args, interactive: Optional[bool] = None, **kwargs) -> Any:
+    """Como `asyncio.to_thread`, pero en el pool `kind` y con el carril del contexto."""
+    return await asyncio.wrap_future(submit(kind, fn, *args, interactive=interactive, **kwargs))
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    with _pools_lock:
+        pools = dict(_pools)
+    return {k: p.stats() for k, p in pools.items()}
+
+
+def summary() -> str:
+    lines = []
+    for name, st in sorted(stats().items()):
+        hi, lo = st["interactive"], st["background"]
+        lines.append(
+            f"{name}: {st['busy']}/{st['workers']} ocupados • cola {st['queued_interactive']}+{st['queued_background']} • "
+            f"interactivo {hi['n']} (espera {hi['avg_wait_ms']:.0f}/{hi['max_wait_ms']:.0f} ms) • "
+            f"fondo {lo['n']} (espera {lo['avg_wait_ms']:.0f}/{lo['max_wait_ms']:.0f} ms)"
+        )
+    return "\n".join(lines) or "sin datos"
@@ -0,0 +1,308 @@
+# fastchart.py
+"""
+Renderer liviano de gráficas de líneas (NumPy + PIL), camino rápido por defecto
+para /grafica (close) y rally_watch (close + EMAs + panel RSI).
+
+- Los valores se mapean a píxeles con NumPy y se dibujan con polilíneas PIL
+  (un `draw.line` por serie; los NaN cortan la línea). Series más largas que
+  el ancho en píxeles pasan antes por downsample.indices.
+- Supersampling x2 + reducción LANCZOS para líneas suavizadas.
+- Ejes con ticks "redondos", grid, etiquetas de precio/tiempo, leyenda y
+  niveles horizontales discontinuos (RSI 70/50/30).
+
+CHART_RENDERER=mpl vuelve a matplotlib (para gráficas "ricas" o comparar).
+Comparación: `python benchmarks/bench_charts.py`.
+"""
+from __future__ import annotations
+import math, os, threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+import downsample
+
+CHART_RENDERER = os.getenv("CHART_RENDERER", "fast").strip().lower()  # fast | mpl
+SUPERSAMPLE = 2
+
+# Colores por defecto de matplotlib (tab10) para que ambos caminos se parezcan
+COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b"]
+STYLE = {
+    "bg": (255, 255, 255),
+    "fg": (30, 30, 30),
+    "axis": (60, 60, 60),
+    "grid": (225, 225, 225),
+    "muted": (110, 110, 110),
+    "level": (120, 120, 120),
+    "up": (38, 166, 154),
+    "down": (239, 83, 80),
+}
+_FONT_PATHS = (
+    "DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+    "arial.ttf",
+)
+
+
+class Series(NamedTuple):
+    values: Sequence[float]
+    label: str = ""
+    color: Optional[str] = None
+    width: float = 1.2
+
+
+class Pane(NamedTuple):
+    series: Sequence[Series]
+    weight: float = 1.0                          # alto relativo
+    ylim: Optional[Tuple[float, float]] = None   # None = auto con margen
+    hlines: Sequence[float] = ()
+    ylabel: str = ""
+    legend: bool = False
+    ohlc: Optional[Tuple[Sequence[float], Sequence[float], Sequence[float], Sequence[float]]] = None  # velas
+    bars: Optional[Sequence[float]] = None       # histograma desde 0 (volumen)
+    bar_up: Optional[Sequence[bool]] = None      # color por barra (vela alcista/bajista)
+
+
+def use_fast() -> bool:
+    return CHART_RENDERER != "mpl"
+
+
+# ---------- fuentes ----------
+_font_lock = threading.Lock()
+_fonts: Dict[int, ImageFont.ImageFont] = {}
+
+
+def _font(size: int) -> ImageFont.ImageFont:
+    with _font_lock:
+        f = _fonts.get(size)
+        if f is None:
+            for p in _FONT_PATHS:
+                try:
+                    f = ImageFont.truetype(p, size)
+                    break
+                except Exception:
+                    continue
+            if f is None:
+                f = ImageFont.load_default()
+            _fonts[size] = f
+        return f
+
+
+def _text_w(draw: ImageDraw.ImageDraw, text: str, f) -> int:
+    l, _, r, _ = draw.textbbox((0, 0), text, font=f)
+    return r - l
+
+
+# ---------- escalas ----------
+def nice_ticks(lo: float, hi: float, n: int = 5) -> List[float]:
+    """Ticks en múltiplos de 1/2/5·10^k dentro de [lo, hi]."""
+    if not (math.isfinite(lo) and math.isfinite(hi)) or hi <= lo:
+        return [lo] if math.isfinite(lo) else []
+    raw = (hi - lo) / max(1, n)
+    mag = 10 ** math.floor(math.log10(raw))
+    step = next(m * mag for m in (1, 2, 5, 10) if m * mag >= raw)
+    start = math.ceil(lo / step) * step
+    return [start + i * step for i in range(int((hi - start) / step + 1e-9) + 1)]
+
+
+def fmt_tick(v: float, step: float, compact: bool = False) -> str:
+    if compact and abs(v) >= 1000:
+        for div, suf in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+            if abs(v) >= div:
+                return f"{v / div:.3g}{suf}"
+    if step >= 1:
+        return f"{v:,.0f}"
+    decimals = min(10, max(0, -int(math.floor(math.log10(step)))))
+    return f"{v:.{decimals}f}"
+
+
+def _limits(p: Pane) -> Tuple[float, float]:
+    if p.ylim is not None:
+        return float(p.ylim[0]), float(p.ylim[1])
+    if p.bars is not None:
+        b = np.asarray(p.bars, dtype=float)
+        top = float(np.nanmax(b)) if b.size and np.isfinite(b).any() else 1.0
+        return 0.0, (top * 1.05) or 1.0
+    vals = [np.asarray(s.values, dtype=float) for s in p.series if len(s.values)]
+    if p.ohlc is not None:
+        vals += [np.asarray(p.ohlc[1], dtype=float), np.asarray(p.ohlc[2], dtype=float)]
+    if not vals:
+        return 0.0, 1.0
+    allv = np.concatenate(vals)
+    allv = allv[np.isfinite(allv)]
+    if allv.size == 0:
+        return 0.0, 1.0
+    lo, hi = float(allv.min()), float(allv.max())
+    if hi == lo:
+        pad = abs(hi) * 0.01 or 1.0
+    else:
+        pad = (hi - lo) * 0.05
+    return lo - pad, hi + pad
+
+
+def _segments(xs: np.ndarray, ys: np.ndarray) -> List[List[Tuple[float, float]]]:
+    """Polilíneas contiguas (los NaN cortan)."""
+    ok = np.isfinite(ys)
+    if ok.all():
+        return [list(zip(xs.tolist(), ys.tolist()))]
+    out, cur = [], []
+    for x, y, good in zip(xs.tolist(), ys.tolist(), ok.tolist()):
+        if good:
+            cur.append((x, y))
+        elif cur:
+            out.append(cur)
+            cur = []
+    if cur:
+        out.append(cur)
+    return out
+
+
+def _dashed_hline(draw: ImageDraw.ImageDraw, x0: int, x1: int, y: int, color, width: int, dash: int):
+    for x in range(x0, x1, dash * 2):
+        draw.line([(x, y), (min(x + dash, x1), y)], fill=color, width=width)
+
+
+# ---------- render ----------
+def render(panes: Sequence[Pane], *, n: int, xticks: Sequence[Tuple[int, str]] = (), title: str = "",
+           xlabel: str = "", size: Tuple[int, int] = (1100, 620)) -> Image.Image:
+    """
+    Dibuja `panes` apilados (eje x compartido: índice 0..n-1) y devuelve la imagen RGB.
+    xticks: [(índice, etiqueta)] para el eje x (se rotulan bajo el último panel).
+    """
+    s = SUPERSAMPLE
+    W, H = size[0] * s, size[1] * s
+    img = Image.new("RGB", (W, H), STYLE["bg"])
+    d = ImageDraw.Draw(img)
+    f_title, f_tick, f_label = _font(15 * s), _font(11 * s), _font(12 * s)
+
+    # Margen izquierdo según la etiqueta de precio más ancha
+    pane_ticks = []
+    for p in panes:
+        lo, hi = _limits(p)
+        ticks = nice_ticks(lo, hi, 5)
+        step = (ticks[1] - ticks[0]) if len(ticks) > 1 else max(abs(hi - lo), 1e-9)
+        pane_ticks.append((lo, hi, ticks, [fmt_tick(t, step, p.bars is not None) for t in ticks]))
+    label_w = max([_text_w(d, t, f_tick) for _, _, _, lbls in pane_ticks for t in lbls] or [0])
+    left = label_w + 22 * s + (18 * s if any(p.ylabel for p in panes) else 0)
+    right = 16 * s
+    top = (34 if title else 12) * s
+    bottom = (30 + (16 if xlabel else 0)) * s
+    gap = 14 * s
+
+    if title:
+        tw = _text_w(d, title, f_title)
+        d.text(((W - tw) // 2, 8 * s), title, fill=STYLE["fg"], font=f_title)
+
+    total_h = H - top - bottom - gap * (len(panes) - 1)
+    weights = sum(p.weight for p in panes) or 1.0
+    x0, x1 = left, W - right
+    xs = x0 + np.arange(n, dtype=float) * ((x1 - x0) / max(1, n - 1))
+    max_points = max(3, (x1 - x0) // s)  # ≈ 1 punto por píxel de salida
+
+    y = top
+    for i, (p, (lo, hi, ticks, labels)) in enumerate(zip(panes, pane_ticks)):
+        h = int(total_h * p.weight / weights)
+        y0, y1 = y, y + h
+        span = (hi - lo) or 1.0
+
+        def to_py(v, _y0=y0, _y1=y1, _lo=lo, _span=span):
+            return _y1 - (np.asarray(v, dtype=float) - _lo) / _span * (_y1 - _y0)
+
+        # grid + etiquetas de precio
+        for t, lbl in zip(ticks, labels):
+            py = float(to_py(t))
+            if y0 <= py <= y1:
+                d.line([(x0, py), (x1, py)], fill=STYLE["grid"], width=s)
+                tw = _text_w(d, lbl, f_tick)
+                d.text((int(x0 - 6 * s - tw), int(py - 7 * s)), lbl, fill=STYLE["muted"], font=f_tick)
+        for idx, _ in xticks:
+            if 0 <= idx < n:
+                d.line([(xs[idx], y0), (xs[idx], y1)], fill=STYLE["grid"], width=s)
+        for lvl in p.hlines:
+            py = int(to_py(lvl))
+            if y0 <= py <= y1:
+                _dashed_hline(d, x0, x1, py, STYLE["level"], s, 6 * s)
+
+        # velas / barras: coordenadas de todas a la vez con NumPy, luego primitivas PIL
+        slot = (x1 - x0) / max(1, n)
+        half = max(s / 2, slot * 0.35)
+        if p.ohlc is not None:
+            o, hi_, lo_, c = (np.asarray(a, dtype=float)[-n:] for a in p.ohlc)
+            bx = xs[n - len(o):]
+            po, ph, pl, pc = to_py(o), to_py(hi_), to_py(lo_), to_py(c)
+            btop, bbot = np.minimum(po, pc), np.maximum(np.maximum(po, pc), np.minimum(po, pc) + s)
+            up = c >= o
+            for x, wh, wl, bt, bb, u in zip(bx.tolist(), ph.tolist(), pl.tolist(), btop.tolist(), bbot.tolist(), up.tolist()):
+                if not (math.isfinite(wh) and math.isfinite(wl) and math.isfinite(bt)):
+                    continue
+                col = STYLE["up"] if u else STYLE["down"]
+                d.line([(x, wh), (x, wl)], fill=col, width=s)
+                d.rectangle([x - half, bt, x + half, bb], fill=col)
+        if p.bars is not None:
+            b = np.asarray(p.bars, dtype=float)[-n:]
+            bx = xs[n - len(b):]
+            pb = to_py(np.nan_to_num(b))
+            ups = list(p.bar_up)[-len(b):] if p.bar_up is not None else [True] * len(b)
+            for x, py, u in zip(bx.tolist(), pb.tolist(), ups):
+                if py < y1:
+                    d.rectangle([x - half, py, x + half, y1], fill=STYLE["up"] if u else STYLE["down"])
+
+        # series
+        for k, ser in enumerate(p.series):
+            vals = np.asarray(ser.values, dtype=float)[-n:]
+            idx = downsample.indices(vals, max_points)
+            ys = to_py(vals[idx])
+            color = ser.color or COLORS[k % len(COLORS)]
+            for seg in _segments(xs[n - len(vals):][idx], ys):
+                if len(seg) > 1:
+                    d.line(seg, fill=color, width=max(1, int(round(ser.width * s))), joint="curve")
+
+        d.rectangle([x0, y0, x1, y1], outline=STYLE["axis"], width=s)
+
+        if p.ylabel:
+            lbl = Image.new("RGBA", (_text_w(d, p.ylabel, f_label) + 4, 16 * s), (0, 0, 0, 0))
+            ImageDraw.Draw(lbl).text((2, 0), p.ylabel, fill=STYLE["fg"], font=f_label)
+            lbl = lbl.rotate(90, expand=True)
+            img.paste(lbl, (4 * s, int((y0 + y1) / 2 - lbl.height / 2)), lbl)
+
+        if p.legend:
+            lx, ly = x0 + 8 * s, y0 + 6 * s
+            for k, ser in enumerate(p.series):
+                if not ser.label:
+                    continue
+                color = ser.color or COLORS[k % len(COLORS)]
+                d.line([(lx, ly + 7 * s), (lx + 18 * s, ly + 7 * s)], fill=color, width=2 * s)
+                d.text((lx + 24 * s, ly), ser.label, fill=STYLE["fg"], font=f_tick)
+                ly += 16 * s
+
+        last = i == len(panes) - 1
+        if last:
+            for idx, lbl in xticks:
+                if 0 <= idx < n:
+                    tw = _text_w(d, lbl, f_tick)
+                    tx = min(max(xs[idx] - tw / 2, x0), x1 - tw)
+                    d.text((int(tx), y1 + 6 * s), lbl, fill=STYLE["muted"], font=f_tick)
+            if xlabel:
+                tw = _text_w(d, xlabel, f_label)
+                d.text(((x0 + x1 - tw) // 2, y1 + 24 * s), xlabel, fill=STYLE["fg"], font=f_label)
+        y = y1 + gap
+
+    if s > 1:
+        img = img.resize(size, Image.LANCZOS)
+    return img
+
+
+def time_ticks(stamps: Sequence, fmt: str, count: int = 6) -> List[Tuple[int, str]]:
+    """[(índice, etiqueta)] equiespaciados para un eje de fechas."""
+    n = len(stamps)
+    if n == 0:
+        return []
+    step = max(1, n // count)
+    out = []
+    for i in range(0, n, step):
+        try:
+            out.append((i, stamps[i].strftime(fmt)))
+        except Exception:
+            continue
+    return out
@@ -0,0 +1,195 @@
+# image_encode.py
+"""
+Etapa de codificación de imágenes compartida por panel, /grafica y rally_watch.
+
+Perfiles (configurables por variable de entorno IMG_ENCODE_<PERFIL>):
+    IMG_ENCODE_PANEL="png,quantize=256,level=6"
+    IMG_ENCODE_CHART="webp,quality=90"
+Claves: formato (png|webp), quantize=<colores, 0=off>, level=<zlib 0-9>,
+quality=<0-100, webp>, lossless=<0|1, webp>, method=<0-6, webp>.
+
+- quantize: paleta (modo "P") ideal para imágenes planas de UI: PNG mucho más
+  pequeño y rápido de comprimir que RGB + optimize=True.
+- webp: opcional; si Pillow no tiene soporte cae a PNG.
+
+Cada codificación registra ms y bytes por perfil (ver `stats()` / `summary()`);
+con IMG_ENCODE_LOG=1 además se imprime una línea por imagen.
+"""
+from __future__ import annotations
+import io, os, threading, time
+from typing import Any, Dict, NamedTuple, Optional
+
+from PIL import Image
+
+try:
+    from PIL import features as _features
+    WEBP_OK = bool(_features.check("webp"))
+except Exception:
+    WEBP_OK = False
+
+DEFAULT_PROFILES: Dict[str, Dict[str, Any]] = {
+    # UI plana (pocos colores): paleta + zlib medio
+    "panel": {"format": "png", "quantize": 256, "level": 6},
+    # Gráficas con antialiasing: RGB, zlib medio (sin optimize: es lento y gana poco)
+    "chart": {"format": "png", "quantize": 0, "level": 6},
+}
+LOG = os.getenv("IMG_ENCODE_LOG", "0") == "1"
+
+
+class Encoded(NamedTuple):
+    data: bytes
+    ext: str       # "png" | "webp"
+    ms: float      # tiempo de codificación
+    profile: str
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    def filename(self, stem: str) -> str:
+        return f"{stem}.{self.ext}"
+
+
+# ---------- perfiles ----------
+def _parse_spec(spec: str) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for part in (p.strip() for p in spec.split(",")):
+        if not part:
+            continue
+        if "=" not in part:
+            out["format"] = part.lower()
+            continue
+        k, v = (x.strip().lower() for x in part.split("=", 1))
+        if k in ("quantize", "level", "quality", "method"):
+            try:
+                out[k] = int(v)
+            except ValueError:
+                continue
+        elif k == "lossless":
+            out[k] = v in ("1", "true", "yes", "si", "sí")
+        elif k == "format":
+            out[k] = v
+    return out
+
+
+_profiles_lock = threading.Lock()
+_profiles: Dict[str, Dict[str, Any]] = {}
+
+
+def profile(name: str) -> Dict[str, Any]:
+    """Perfil efectivo: defaults + override del entorno (leído una vez por perfil)."""
+    with _profiles_lock:
+        p = _profiles.get(name)
+        if p is None:
+            p = dict(DEFAULT_PROFILES.get(name, DEFAULT_PROFILES["chart"]))
+            env = os.getenv(f"IMG_ENCODE_{name.upper()}")
+            if env:
+                p.update(_parse_spec(env))
+            if p.get("format") not in ("png", "webp") or (p.get("format") == "webp" and not WEBP_OK):
+                p["format"] = "png"
+            _profiles[name] = p
+        return p
+
+
+def set_profile(name: str, **opts):
+    """Override en caliente (p. ej. desde un benchmark)."""
+    with _profiles_lock:
+        p = dict(DEFAULT_PROFILES.get(name, DEFAULT_PROFILES["chart"]))
+        p.update(opts)
+        if p.get("format") == "webp" and not WEBP_OK:
+            p["format"] = "png"
+        _profiles[name] = p
+
+
+def ext_for(name: str) -> str:
+    return profile(name)["format"]
+
+
+# ---------- estadísticas ----------
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _record(enc: Encoded):
+    with _stats_lock:
+        st = _stats.setdefault(enc.profile, {"n": 0, "bytes": 0, "ms": 0.0, "last_bytes": 0, "last_ms": 0.0})
+        st["n"] += 1
+        st["bytes"] += enc.size
+        st["ms"] += enc.ms
+        st["last_bytes"] = enc.size
+        st["last_ms"] = enc.ms
+    if LOG:
+        print(f"🗜️ encode[{enc.profile}] {enc.ext} {enc.size / 1024:.0f} KB en {enc.ms:.0f} ms")
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    with _stats_lock:
+        return {k: dict(v) for k, v in _stats.items()}
+
+
+def summary() -> str:
+    lines = []
+    for name, st in sorted(stats().items()):
+        n = max(1, int(st["n"]))
+        lines.append(f"{name}: {int(st['n'])} imgs • {st['bytes'] / n / 1024:.0f} KB prom • {st['ms'] / n:.0f} ms prom")
+    return "\n".join(lines) or "sin datos"
+
+
+# ---------- codificación ----------
+def _encode_pil(img: Image.Image, p: Dict[str, Any]) -> bytes:
+    buf = io.BytesIO()
+    if p["format"] == "webp":
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+        img.save(
+            buf, format="WEBP",
+            quality=int(p.get("quality", 90)),
+            lossless=bool(p.get("lossless", False)),
+            method=int(p.get("method", 4)),
+        )
+        return buf.getvalue()
+
+    colors = int(p.get("quantize", 0) or 0)
+    if colors and img.mode in ("RGB", "RGBA"):
+        if img.mode == "RGBA":
+            img = img.convert("RGB")
+        # FASTOCTREE (2) sin dithering (0): colores planos exactos, muy rápido
+        img = img.quantize(colors=min(256, colors), method=2, dither=0)
+    img.save(buf, format="PNG", compress_level=int(p.get("level", 6)))
+    return buf.getvalue()
+
+
+def encode(img: Image.Image, profile_name: str = "panel") -> Encoded:
+    p = profile(profile_name)
+    t0 = time.perf_counter()
+    data = _encode_pil(img, p)
+    enc = Encoded(data, p["format"], (time.perf_counter() - t0) * 1000.0, profile_name)
+    _record(enc)
+    return enc
+
+
+def encode_figure(fig, profile_name: str = "chart", *, dpi: Optional[float] = None, bbox_inches: Optional[str] = "tight") -> Encoded:
+    """
+    Codifica una figura de matplotlib con el perfil dado (no cierra la figura).
+    El tiempo registrado incluye el raster de matplotlib (savefig).
+    """
+    p = profile(profile_name)
+    t0 = time.perf_counter()
+    kw: Dict[str, Any] = {"bbox_inches": bbox_inches}
+    if dpi is not None:
+        kw["dpi"] = dpi
+    buf = io.BytesIO()
+    if p["format"] == "png" and not p.get("quantize"):
+        # Camino directo: matplotlib escribe el PNG con el nivel zlib del perfil
+        fig.savefig(buf, format="png", pil_kwargs={"compress_level": int(p.get("level", 6))}, **kw)
+        data = buf.getvalue()
+    else:
+        # Raster sin comprimir y luego la etapa PIL (paleta / webp)
+        fig.savefig(buf, format="png", pil_kwargs={"compress_level": 0}, **kw)
+        buf.seek(0)
+        with Image.open(buf) as im:
+            im.load()
+            data = _encode_pil(im, p)
+    enc = Encoded(data, p["format"], (time.perf_counter() - t0) * 1000.0, profile_name)
+    _record(enc)
+    return enc
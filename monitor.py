@@ -1,17 +1,41 @@
 import asyncio
 from datetime import datetime, timezone
-from typing import Dict, Tuple
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
 
 import ccxt
 import pandas as pd
 
-from data_store import channel_key, get_cfg, load_db
+import executors
+import snapshots
+from alert_log import AlertLog
+from data_store import channel_key, read_cfg, refresh as refresh_store, subscribe
 from signals import compute_indicators, exit_signals, rally_signals
 from ui import make_correction_embed, make_rally_embed  # UI embeds
 
 _bot = None
 scan_tasks: Dict[str, asyncio.Task] = {}
-last_alert_ts: Dict[Tuple[str, str], float] = {}
+
+# Cooldowns persistidos (sobreviven reinicios y se comparten entre procesos):
+# key "<guild:channel>:<tf>:<RALLY|EXIT>" -> timestamp de la vela alertada,
+# con la hora wall-clock de la alerta guardada por el propio log.
+ALERT_INDEX = AlertLog(Path("alert_index.log"), max_entries=20000, max_age_s=30 * 86400)
+
+
+def _alert_key(ch_key: str, tf: str, kind: str) -> str:
+    return f"{ch_key}:{tf}:{kind}"
+
+
+def claim_alert(ch_key: str, tf: str, kind: str, bar_ts: str, cooloff_s: float) -> bool:
+    """True si este proceso debe enviar la alerta (vela nueva y fuera de cooldown)."""
+    return ALERT_INDEX.claim(_alert_key(ch_key, tf, kind), bar_ts, cooldown_s=cooloff_s)
+
+# Despertadores por canal: un cambio de config (/settimeframes, /setthresholds…)
+# corta la espera del loop y fuerza un nuevo ciclo sin re-leer el archivo.
+_wakeups: Dict[str, asyncio.Event] = {}
+_loop: asyncio.AbstractEventLoop | None = None
+_watch_task: asyncio.Task | None = None
+STORE_WATCH_SECONDS = 5
 
 
 def init(bot):
@@ -19,6 +43,75 @@ def init(bot):
     _bot = bot
 
 
+# Listeners de "vela nueva": async fn(guild_id, channel_id, cfg, timeframes)
+# Se llaman una vez por ciclo del scanner si algún timeframe cerró vela
+# (p. ej. el panel pre-renderiza su imagen).
+CandleListener = Callable[[int, int, dict, List[str]], Awaitable[None]]
+_candle_listeners: List[CandleListener] = []
+
+
+def on_new_candle(listener: CandleListener):
+    if listener not in _candle_listeners:
+        _candle_listeners.append(listener)
+
+
+async def _run_candle_listener(fn: CandleListener, guild_id: int, channel_id: int, cfg: dict, tfs: List[str]):
+    try:
+        await fn(guild_id, channel_id, cfg, tfs)
+    except Exception as e:
+        print(f"⚠️ listener de vela nueva falló ({getattr(fn, '__name__', fn)}): {e}")
+
+
+def _fire_new_candle(guild_id: int, channel_id: int, cfg: dict, tfs: List[str]):
+    for fn in list(_candle_listeners):
+        asyncio.create_task(_run_candle_listener(fn, guild_id, channel_id, cfg, list(tfs)))
+
+
+# Claves de config que usa scan_loop: el resto (panel_theme, panel_borders…)
+# son de UI y no justifican un re-escaneo con llamadas al exchange
+SCAN_KEYS = frozenset({
+    "enabled", "symbol", "exchange", "timeframes", "rally_score_needed", "cooloff_minutes",
+    "rsi_rally_min", "rsi_exit_overbought", "vol_spike_mult", "zigzag_pct", "price_tolerance",
+})
+
+
+def _on_cfg_change(ch_key: str, cfg: dict, changed: set):
+    if not (changed & SCAN_KEYS):
+        return
+    ev = _wakeups.get(ch_key)
+    if ev is None or _loop is None:
+        return
+    try:
+        _loop.call_soon_threadsafe(ev.set)
+    except RuntimeError:
+        pass  # loop cerrado
+
+
+subscribe(_on_cfg_change)
+
+
+async def _watch_store():
+    # Detecta ediciones externas de state.json (mtime) y publica sus eventos
+    while True:
+        try:
+            refresh_store()
+        except Exception:
+            pass
+        await asyncio.sleep(STORE_WATCH_SECONDS)
+
+
+async def _wait_for_change(ch_key: str, timeout: float) -> bool:
+    """Duerme hasta `timeout` s o hasta que cambie la config del canal."""
+    ev = _wakeups.setdefault(ch_key, asyncio.Event())
+    try:
+        await asyncio.wait_for(ev.wait(), timeout=timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        ev.clear()
+
+
 def utc_now_str():
     return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
 
@@ -42,13 +135,13 @@ async def scan_loop(guild_id: int, channel_id: int):
     if channel is None:
         return
     await channel.send(f"🛰️ Monitoreo iniciado para este canal. ({utc_now_str()})")
+    ch_key = channel_key(guild_id, channel_id)
 
     while True:
         try:
-            db = load_db()
-            cfg = get_cfg(db, guild_id, channel_id)
+            cfg = read_cfg(guild_id, channel_id)
             if not cfg.get("enabled", False):
-                await asyncio.sleep(5)
+                await _wait_for_change(ch_key, 5)
                 continue
 
             symbol = cfg["symbol"]
@@ -64,27 +157,28 @@ async def scan_loop(guild_id: int, channel_id: int):
             zigzag_pct = float(cfg.get("zigzag_pct", 0.03))
             price_tol = float(cfg.get("price_tolerance", 0.002))
 
-            ex = get_exchange(exchange_name)
+            ex = await executors.run(executors.IO, get_exchange, exchange_name)
+            new_candles: List[str] = []
 
             for tf in timeframes:
                 try:
-                    df = fetch_ohlcv_df(ex, symbol, timeframe=tf)
-                    df = compute_indicators(df)
+                    df = await executors.run(executors.IO, fetch_ohlcv_df, ex, symbol, timeframe=tf)
+                    try:
+                        if await executors.run(executors.CPU, snapshots.record, exchange_name, symbol, tf, df):
+                            new_candles.append(tf)
+                    except Exception as e:
+                        print(f"⚠️ snapshot {symbol} {tf}: {e}")
+                    df = await executors.run(executors.CPU, compute_indicators, df)
                     score, why = rally_signals(
                         df, rsi_min=rsi_rally_min, vol_mult=vol_mult
                     )
                     exits = exit_signals(df, rsi_over=rsi_exit)
 
-                    ch_key = channel_key(guild_id, channel_id)
-                    key_tf = (ch_key, tf)
-                    now_mono = asyncio.get_event_loop().time()
-                    cooldown_ok = (now_mono - last_alert_ts.get(key_tf, 0)) > cooloff
-
                     # Última vela para datos de precio/RSI
                     c = df.iloc[-1]
+                    bar_ts = df.index[-1].isoformat()
 
-                    if score >= score_need and cooldown_ok:
-                        last_alert_ts[key_tf] = now_mono
+                    if score >= score_need and claim_alert(ch_key, tf, "RALLY", bar_ts, cooloff):
                         emb = make_rally_embed(
                             symbol=symbol,
                             exchange=exchange_name,
@@ -102,8 +196,7 @@ async def scan_loop(guild_id: int, channel_id: int):
                             emb.set_footer(text=footer_extra)
                         await channel.send(embed=emb)
 
-                    if len(exits) >= 2 and cooldown_ok:
-                        last_alert_ts[key_tf] = now_mono
+                    if len(exits) >= 2 and claim_alert(ch_key, tf, "EXIT", bar_ts, cooloff):
                         reason = " | ".join(exits) if exits else None
                         emb = make_correction_embed(
                             symbol=symbol,
@@ -123,7 +216,10 @@ async def scan_loop(guild_id: int, channel_id: int):
                 except Exception as e:
                     await channel.send(f"⚠️ Error `{symbol}` `{tf}`: `{e}`")
 
-            await asyncio.sleep(300)
+            if new_candles:
+                _fire_new_candle(guild_id, channel_id, cfg, new_candles)
+
+            await _wait_for_change(ch_key, 300)
         except Exception as e:
             try:
                 await channel.send(f"⚠️ Loop error: `{e}`")
@@ -133,9 +229,14 @@ async def scan_loop(guild_id: int, channel_id: int):
 
 
 def start_channel(guild_id: int, channel_id: int):
+    global _loop, _watch_task
     ch_key = channel_key(guild_id, channel_id)
     if ch_key in scan_tasks and not scan_tasks[ch_key].done():
         return False
+    _loop = asyncio.get_running_loop()
+    _wakeups.setdefault(ch_key, asyncio.Event())
+    if _watch_task is None or _watch_task.done():
+        _watch_task = asyncio.create_task(_watch_store())
     task = asyncio.create_task(scan_loop(guild_id, channel_id))
     scan_tasks[ch_key] = task
     return True
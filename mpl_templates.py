@@ -0,0 +1,168 @@
+# mpl_templates.py
+"""
+Plantillas reutilizables de matplotlib para las gráficas que siguen en ese
+camino (CHART_RENDERER=mpl o gráficas "ricas").
+
+Construir figura + gridspec + ejes + leyendas cuesta más que dibujar: aquí cada
+tipo de gráfica tiene un pool de figuras ya armadas y cada render solo hace
+`set_data` en las Line2D existentes (con los puntos ya reducidos por
+downsample.indices), ajusta límites/ticks/título y guarda.
+
+- Se usa `matplotlib.figure.Figure` + FigureCanvasAgg (sin pyplot, que no es
+  thread-safe): cada plantilla se usa desde un solo hilo a la vez
+  (`checkout`), así varias pueden renderizar en paralelo desde executors.
+- Pool acotado por tipo (MPL_TEMPLATE_POOL); si todas están en uso se espera.
+"""
+from __future__ import annotations
+import os, queue, threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+import downsample
+
+MPL_TEMPLATE_POOL = int(os.getenv("MPL_TEMPLATE_POOL", "3"))
+
+
+class Template:
+    __slots__ = ("kind", "fig", "axes", "lines", "renders")
+
+    def __init__(self, kind: str, fig, axes: List[Any], lines: Dict[str, Any]):
+        self.kind = kind
+        self.fig = fig
+        self.axes = axes
+        self.lines = lines
+        self.renders = 0
+
+
+# ---------- constructores por tipo ----------
+def _new_figure(figsize: Tuple[float, float], dpi: int):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _build_line() -> Template:
+    """/grafica: una línea de close con eje de fechas."""
+    fig = _new_figure((8.5, 4.8), 130)
+    ax = fig.add_subplot(111)
+    (close,) = ax.plot([], [])
+    ax.xaxis_date()
+    ax.set_xlabel("Tiempo (UTC)")
+    ax.set_ylabel("Precio")
+    fig.autofmt_xdate()
+    return Template("line", fig, [ax], {"close": close})
+
+
+def _build_rally() -> Template:
+    """rally_watch: close + EMA9 + EMA21 arriba, RSI5 con niveles abajo."""
+    fig = _new_figure((9, 6), 140)
+    gs = fig.add_gridspec(2, 1, height_ratios=[3, 1.2], hspace=0.25)
+
+    ax1 = fig.add_subplot(gs[0, 0])
+    lines = {
+        "close": ax1.plot([], [], linewidth=1.2, label="Close")[0],
+        "ema9": ax1.plot([], [], linewidth=1.2, label="EMA9")[0],
+        "ema21": ax1.plot([], [], linewidth=1.2, label="EMA21")[0],
+    }
+    ax1.set_ylabel("Precio")
+    ax1.legend(loc="upper left", fontsize=8)
+    ax1.grid(alpha=0.2)
+
+    ax2 = fig.add_subplot(gs[1, 0])
+    lines["rsi5"] = ax2.plot([], [], linewidth=1.2, label="RSI5 (Wilder)")[0]
+    for lvl in (70, 50, 30):
+        ax2.axhline(lvl, linestyle="--", linewidth=0.8)
+    ax2.set_ylabel("RSI5")
+    ax2.set_ylim(0, 100)
+    ax2.grid(alpha=0.2)
+    return Template("rally", fig, [ax1, ax2], lines)
+
+
+BUILDERS: Dict[str, Callable[[], Template]] = {
+    "line": _build_line,
+    "rally": _build_rally,
+}
+
+
+# ---------- pool ----------
+_lock = threading.Lock()
+_pools: Dict[str, "queue.Queue[Template]"] = {}
+_built: Dict[str, int] = {}
+
+
+@contextmanager
+def checkout(kind: str) -> Iterator[Template]:
+    """Plantilla exclusiva para este hilo mientras dure el `with`."""
+    with _lock:
+        q = _pools.setdefault(kind, queue.Queue())
+        try:
+            t = q.get_nowait()
+        except queue.Empty:
+            t = None
+            if _built.get(kind, 0) < MPL_TEMPLATE_POOL:
+                _built[kind] = _built.get(kind, 0) + 1
+                build = True
+            else:
+                build = False
+    if t is None:
+        if build:
+            try:
+                t = BUILDERS[kind]()
+            except Exception:
+                with _lock:
+                    _built[kind] -= 1
+                raise
+        else:
+            t = q.get()
+    try:
+        yield t
+        t.renders += 1
+    finally:
+        # Cada render reescribe datos, límites, ticks y título: la plantilla
+        # vuelve al pool aunque el render haya fallado.
+        q.put(t)
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    with _lock:
+        return {k: {"built": _built.get(k, 0), "idle": q.qsize()} for k, q in _pools.items()}
+
+
+# ---------- actualización ----------
+def _plot_width(t: Template, ax) -> int:
+    """Ancho del eje en píxeles: tope de puntos a dibujar por serie."""
+    return max(3, int(ax.get_position().width * t.fig.get_figwidth() * t.fig.dpi))
+
+
+def _autoscale(ax):
+    ax.relim()
+    ax.autoscale_view()
+
+
+def update_line(t: Template, stamps, close: Sequence[float], *, title: str):
+    """stamps: índice de fechas (DatetimeIndex / datetimes)."""
+    from matplotlib import dates as mdates
+    ax = t.axes[0]
+    xs = mdates.date2num(list(stamps.to_pydatetime()) if hasattr(stamps, "to_pydatetime") else list(stamps))
+    ys = np.asarray(close, dtype=float)
+    idx = downsample.indices(ys, _plot_width(t, ax))
+    t.lines["close"].set_data(np.asarray(xs)[idx], ys[idx])
+    ax.set_title(title)
+    _autoscale(ax)
+
+
+def update_rally(t: Template, data, *, title: str, xticks_idx: Sequence[int], xtick_labels: Sequence[str]):
+    ax1, ax2 = t.axes
+    for name, ax in (("close", ax1), ("ema9", ax1), ("ema21", ax1), ("rsi5", ax2)):
+        ys = np.asarray(data[name], dtype=float)
+        idx = downsample.indices(ys, _plot_width(t, ax))
+        t.lines[name].set_data(idx, ys[idx])
+    ax1.set_title(title)
+    for ax in (ax1, ax2):
+        ax.set_xticks(list(xticks_idx), labels=list(xtick_labels), rotation=0, fontsize=8)
+    _autoscale(ax1)
+    ax2.set_xlim(ax1.get_xlim())
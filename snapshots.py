@@ -0,0 +1,275 @@
+# snapshots.py
+"""
+Snapshots de indicadores por serie (exchange, símbolo, timeframe).
+
+El scanner (monitor.scan_loop) escribe aquí cada vez que baja velas:
+  - historial columnar acotado (HISTORY filas) de velas CERRADAS + indicadores
+  - vector "live" de la vela en curso (se sobrescribe en cada ciclo)
+
+Los comandos interactivos (/indicadores, /zonas, /status, /info, /panel) leen de
+aquí y solo van al exchange si la serie no existe o está vieja.
+
+E/S de disco fuera del lock: SNAP_DIR se lista una sola vez (índice en memoria
+de los archivos existentes) y las series se leen/escriben sin bloquear a los
+demás lectores. `record` corre en el pool CPU y la escritura va al pool IO.
+"""
+from __future__ import annotations
+import json, re, threading, time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+import executors
+from indicadores.core import compute_all_indicators
+
+SNAP_DIR = Path("snapshots")
+HISTORY = 500            # velas cerradas por serie
+SNAPSHOT_MAX_AGE = 600   # s; el scanner pasa cada 300 s
+
+COLUMNS = (
+    "open", "high", "low", "close", "volume",
+    "ema20", "ema50", "ema100", "ema200",
+    "rsi14", "macd", "macd_signal", "macd_hist",
+)
+
+SeriesKey = Tuple[str, str, str]
+
+
+def _key(exchange: str, symbol: str, tf: str) -> SeriesKey:
+    return (str(exchange).lower(), str(symbol).upper(), str(tf).lower())
+
+
+def _num(x) -> Optional[float]:
+    try:
+        return float(x) if pd.notna(x) else None
+    except Exception:
+        return None
+
+
+class _Series:
+    def __init__(self):
+        self.ts: Deque[int] = deque(maxlen=HISTORY)  # ms UTC
+        self.cols: Dict[str, Deque[Optional[float]]] = {c: deque(maxlen=HISTORY) for c in COLUMNS}
+        self.live: Dict[str, Optional[float]] = {}
+        self.live_ts: Optional[int] = None
+        self.updated_at = 0.0
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "ts": list(self.ts),
+            "cols": {c: list(v) for c, v in self.cols.items()},
+            "live": self.live,
+            "live_ts": self.live_ts,
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "_Series":
+        s = cls()
+        s.ts.extend(int(t) for t in data.get("ts", []))
+        cols = data.get("cols", {})
+        n = len(s.ts)
+        for c in COLUMNS:
+            vals = list(cols.get(c, []))
+            s.cols[c].extend((vals + [None] * n)[:n])
+        s.live = dict(data.get("live") or {})
+        s.live_ts = data.get("live_ts")
+        s.updated_at = float(data.get("updated_at") or 0.0)
+        return s
+
+
+_lock = threading.RLock()
+_series: Dict[SeriesKey, _Series] = {}
+_on_disk: Optional[Set[str]] = None     # stems de SNAP_DIR (se lista una sola vez)
+_persist_locks: Dict[SeriesKey, threading.Lock] = {}
+_persist_seq: Dict[SeriesKey, int] = {}  # última versión encolada / escrita por serie
+_written_seq: Dict[SeriesKey, int] = {}
+
+
+def _stem_for(key: SeriesKey) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", "_".join(key))
+
+
+def _path_for(key: SeriesKey) -> Path:
+    return SNAP_DIR / f"{_stem_for(key)}.json"
+
+
+def _disk_index() -> Set[str]:
+    global _on_disk
+    idx = _on_disk
+    if idx is not None:
+        return idx
+    found: Set[str] = set()
+    try:
+        if SNAP_DIR.exists():
+            found = {p.stem for p in SNAP_DIR.glob("*.json")}
+    except OSError:
+        pass
+    with _lock:
+        if _on_disk is None:
+            _on_disk = found
+        return _on_disk
+
+
+def _get_series(key: SeriesKey, create: bool = False) -> Optional[_Series]:
+    with _lock:
+        s = _series.get(key)
+    if s is not None:
+        return s
+    loaded = None
+    if _stem_for(key) in _disk_index():
+        try:
+            loaded = _Series.from_json(json.loads(_path_for(key).read_text(encoding="utf-8")))
+        except Exception:
+            loaded = None
+    with _lock:
+        s = _series.get(key)  # otro hilo pudo cargarla mientras se leía el disco
+        if s is None:
+            s = loaded if loaded is not None else (_Series() if create else None)
+            if s is not None:
+                _series[key] = s
+        return s
+
+
+def _persist(key: SeriesKey, seq: int, payload: Dict[str, Any]):
+    lk = _persist_locks.setdefault(key, threading.Lock())
+    with lk:
+        if _written_seq.get(key, 0) >= seq:
+            return  # ya se escribió una versión más nueva
+        try:
+            SNAP_DIR.mkdir(parents=True, exist_ok=True)
+            p = _path_for(key)
+            tmp = p.with_suffix(".tmp")
+            tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+            tmp.replace(p)
+            _written_seq[key] = seq
+            idx = _disk_index()
+            with _lock:
+                idx.add(p.stem)
+        except Exception as e:
+            print(f"⚠️ snapshots: no pude guardar {key}: {e}")
+
+
+# ---------- escritura (scanner) ----------
+def record(exchange: str, symbol: str, tf: str, ohlcv: pd.DataFrame) -> bool:
+    """
+    Calcula indicadores sobre `ohlcv` (index datetime UTC, última fila = vela en curso)
+    y guarda las velas cerradas nuevas + el vector live. Devuelve True si hubo
+    al menos una vela cerrada nueva. Trabajo de CPU: llamar desde el pool CPU;
+    la escritura a disco se encola en el pool IO.
+    """
+    if ohlcv is None or len(ohlcv) < 2:
+        return False
+    df = compute_all_indicators(ohlcv.copy())
+    ts_ms = [int(pd.Timestamp(t).value // 1_000_000) for t in df.index]
+    key = _key(exchange, symbol, tf)
+    s = _get_series(key, create=True)
+    assert s is not None
+
+    with _lock:
+        last_ts = s.ts[-1] if s.ts else None
+        n_closed = len(df) - 1
+        start = 0
+        if last_ts is not None:
+            start = next((i for i in range(n_closed) if ts_ms[i] > last_ts), n_closed)
+        new_rows = 0
+        for i in range(start, n_closed):
+            row = df.iloc[i]
+            s.ts.append(ts_ms[i])
+            for c in COLUMNS:
+                s.cols[c].append(_num(row.get(c)))
+            new_rows += 1
+
+        last = df.iloc[-1]
+        s.live = {c: _num(last.get(c)) for c in COLUMNS}
+        s.live_ts = ts_ms[-1]
+        s.updated_at = time.time()
+        if new_rows:
+            seq = _persist_seq[key] = _persist_seq.get(key, 0) + 1
+            payload = s.to_json()
+    if new_rows:
+        executors.submit(executors.IO, _persist, key, seq, payload, interactive=False)
+    return new_rows > 0
+
+
+# ---------- lectura (comandos) ----------
+def age(exchange: str, symbol: str, tf: str) -> Optional[float]:
+    s = _get_series(_key(exchange, symbol, tf))
+    with _lock:
+        return (time.time() - s.updated_at) if s and s.updated_at else None
+
+
+def _fresh(s: Optional[_Series], max_age: Optional[float]) -> bool:
+    if s is None or not s.live:
+        return False
+    return max_age is None or (time.time() - s.updated_at) <= max_age
+
+
+def latest(exchange: str, symbol: str, tf: str, max_age: Optional[float] = SNAPSHOT_MAX_AGE) -> Optional[Dict[str, Optional[float]]]:
+    """Vector de la vela en curso (mismas claves que indicadores.core.latest_values)."""
+    s = _get_series(_key(exchange, symbol, tf))
+    with _lock:
+        if not _fresh(s, max_age):
+            return None
+        return dict(s.live)  # type: ignore[union-attr]
+
+
+def latest_price(exchange: str, symbol: str, max_age: Optional[float] = SNAPSHOT_MAX_AGE) -> Optional[Tuple[float, float]]:
+    """(precio, edad_s) del snapshot más reciente de cualquier timeframe del par."""
+    ex, sym = str(exchange).lower(), str(symbol).upper()
+    best: Optional[Tuple[float, float]] = None
+    # incluye series en disco aún no cargadas (índice en memoria, sin listar SNAP_DIR)
+    prefix = _stem_for((ex, sym, ""))
+    with _lock:
+        pending = [st[len(prefix):] for st in _disk_index() if st.startswith(prefix)]
+        pending = [tf for tf in pending if (ex, sym, tf) not in _series]
+    for tf in pending:
+        _get_series((ex, sym, tf))
+    with _lock:
+        for (kex, ksym, _), s in _series.items():
+            if kex != ex or ksym != sym or not _fresh(s, max_age):
+                continue
+            px = s.live.get("close")
+            if px is None:
+                continue
+            a = time.time() - s.updated_at
+            if best is None or a < best[1]:
+                best = (px, a)
+    return best
+
+
+def frame(
+    exchange: str, symbol: str, tf: str, *,
+    min_rows: int = 1,
+    max_age: Optional[float] = SNAPSHOT_MAX_AGE,
+    include_live: bool = True,
+) -> Optional[pd.DataFrame]:
+    """DataFrame (index 'ts' UTC) con OHLCV + indicadores, o None si no alcanza/está viejo."""
+    s = _get_series(_key(exchange, symbol, tf))
+    with _lock:
+        if not _fresh(s, max_age):
+            return None
+        assert s is not None
+        ts = list(s.ts)
+        data = {c: list(s.cols[c]) for c in COLUMNS}
+        if include_live and s.live_ts is not None and (not ts or s.live_ts > ts[-1]):
+            ts.append(s.live_ts)
+            for c in COLUMNS:
+                data[c].append(s.live.get(c))
+    if len(ts) < min_rows:
+        return None
+    df = pd.DataFrame(data, index=pd.to_datetime(ts, unit="ms", utc=True))
+    df.index.name = "ts"
+    return df.astype(float)
+
+
+def history(exchange: str, symbol: str, tf: str, column: str, n: int = 50) -> List[float]:
+    """Últimos `n` valores cerrados de una columna (para sparklines RSI/MACD)."""
+    s = _get_series(_key(exchange, symbol, tf))
+    with _lock:
+        if s is None or column not in s.cols:
+            return []
+        vals = list(s.cols[column])[-n:]
+    return [v for v in vals if v is not None]
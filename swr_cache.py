@@ -0,0 +1,209 @@
+# swr_cache.py
+"""
+Cache stale-while-revalidate para datos de mercado (tickers, OHLCV, métricas).
+
+- Dentro de `fresh_ttl`: se sirve el valor tal cual.
+- Entre `fresh_ttl` y `max_stale`: se sirve el valor viejo (con su edad) y se
+  lanza un refresh en segundo plano (uno solo por clave).
+- Más allá de `max_stale` (límite duro por clave) o sin valor: se espera la carga,
+  como mucho `wait_timeout` segundos; si no llega, se devuelve (None, None) y la
+  carga sigue en segundo plano (ver `inflight`).
+
+`get_blocking` aplica lo mismo desde hilos: el refresco de un valor viejo se
+encola en el pool IO (carril de fondo) y se sirve el valor que hay. Las cargas
+async y las de hilos comparten la guarda "una carga por clave".
+
+Un loader que devuelve None (fallo: p. ej. get_last_price) no pisa un valor
+bueno; sin valor previo, el None se guarda solo `fresh_ttl` segundos.
+"""
+from __future__ import annotations
+import asyncio, threading, time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import executors
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "max_stale")
+
+    def __init__(self, value: Any, fetched_at: float, max_stale: float):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.max_stale = max_stale
+
+
+class SWRCache:
+    def __init__(self, name: str, *, fresh_ttl: float, max_stale: float, max_entries: int = 256):
+        self.name = name
+        self.fresh_ttl = fresh_ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._bg: Dict[Hashable, Future] = {}  # cargas lanzadas desde hilos (get_blocking)
+        self._lock = threading.Lock()
+
+    # ---------- lectura directa ----------
+    def peek(self, key: Hashable, *, max_stale: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        """(valor, edad_s) si existe y no supera el límite duro; no dispara refresh."""
+        with self._lock:
+            e = self._entries.get(key)
+            if e is None:
+                return None
+            age = time.time() - e.fetched_at
+            limit = e.max_stale if max_stale is None else min(max_stale, e.max_stale)
+            if age > limit:
+                return None
+            self._entries.move_to_end(key)
+            return e.value, age
+
+    def put(self, key: Hashable, value: Any, *, max_stale: Optional[float] = None):
+        with self._lock:
+            self._entries[key] = _Entry(value, time.time(), self.max_stale if max_stale is None else max_stale)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _store(self, key: Hashable, value: Any, max_stale: float):
+        """Guarda el resultado de un loader; None (fallo) no pisa un valor bueno."""
+        if value is None:
+            with self._lock:
+                e = self._entries.get(key)
+                if e is not None and e.value is not None and time.time() - e.fetched_at <= e.max_stale:
+                    return
+            max_stale = min(max_stale, self.fresh_ttl)  # negativo corto: se reintenta pronto
+        self.put(key, value, max_stale=max_stale)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def inflight(self, key: Hashable) -> Optional[asyncio.Task]:
+        t = self._inflight.get(key)
+        return t if t is not None and not t.done() else None
+
+    # ---------- carga ----------
+    def _refresh(self, key: Hashable, loader: Callable[[], Any], max_stale: float,
+                 interactive: Optional[bool] = None) -> "asyncio.Future":
+        async def _run():
+            try:
+                value = await executors.run(executors.IO, loader, interactive=interactive)
+                self._store(key, value, max_stale)
+                return value
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+        with self._lock:  # misma guarda que _refresh_in_thread / get_blocking
+            t = self.inflight(key)
+            if t is not None:
+                return t
+            f = self._bg.get(key)
+            if f is not None and not f.done():
+                t = asyncio.wrap_future(f)  # carga desde un hilo: se espera esa misma
+            else:
+                t = asyncio.create_task(_run())
+                self._inflight[key] = t
+        # Evita "Task exception was never retrieved" en refrescos de fondo
+        t.add_done_callback(lambda tk: tk.cancelled() or tk.exception())
+        return t
+
+    async def get(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        *,
+        fresh_ttl: Optional[float] = None,
+        max_stale: Optional[float] = None,
+        wait_timeout: Optional[float] = None,
+    ) -> Tuple[Any, Optional[float]]:
+        fresh_ttl = self.fresh_ttl if fresh_ttl is None else fresh_ttl
+        max_stale = self.max_stale if max_stale is None else max_stale
+
+        hit = self.peek(key, max_stale=max_stale)
+        if hit is not None:
+            value, age = hit
+            if age > fresh_ttl:
+                # nadie espera este refresco: va por el carril de fondo
+                self._refresh(key, loader, max_stale, interactive=False)
+            return value, age
+
+        task = self._refresh(key, loader, max_stale)
+        if wait_timeout is None:
+            return await task, 0.0
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=wait_timeout), 0.0
+        except asyncio.TimeoutError:
+            return None, None
+
+    def _claim_bg(self, key: Hashable) -> Tuple[Optional[Future], bool]:
+        """(future de la carga en curso o propia, True si la carga es nuestra)."""
+        with self._lock:
+            if self.inflight(key) is not None:
+                return None, False
+            f = self._bg.get(key)
+            if f is not None and not f.done():
+                return f, False
+            f = self._bg[key] = Future()
+            return f, True
+
+    def _load_claimed(self, key: Hashable, f: Future, loader: Callable[[], Any], max_stale: float) -> Any:
+        try:
+            value = loader()
+            self._store(key, value, max_stale)
+            f.set_result(value)
+            return value
+        except BaseException as e:
+            f.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                if self._bg.get(key) is f:
+                    self._bg.pop(key, None)
+
+    def _refresh_in_thread(self, key: Hashable, loader: Callable[[], Any], max_stale: float):
+        f, mine = self._claim_bg(key)
+        if not mine:
+            return
+        executors.submit(executors.IO, self._load_claimed, key, f, loader, max_stale, interactive=False)
+
+    def get_blocking(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        *,
+        fresh_ttl: Optional[float] = None,
+        max_stale: Optional[float] = None,
+    ) -> Any:
+        """Variante síncrona (hilos/executor): sirve el valor si no supera el límite duro
+        (revalidando en segundo plano pasado `fresh_ttl`); si no hay, carga."""
+        fresh_ttl = self.fresh_ttl if fresh_ttl is None else fresh_ttl
+        max_stale = self.max_stale if max_stale is None else max_stale
+        hit = self.peek(key, max_stale=max_stale)
+        if hit is not None:
+            value, age = hit
+            if age > fresh_ttl:
+                self._refresh_in_thread(key, loader, max_stale)
+            return value
+        f, mine = self._claim_bg(key)
+        if mine:
+            return self._load_claimed(key, f, loader, max_stale)  # type: ignore[arg-type]
+        if f is not None:
+            return f.result()  # otro hilo ya la está cargando
+        # carga async en curso (no se puede esperar desde un hilo): carga directa
+        value = loader()
+        self._store(key, value, max_stale)
+        return value
+
+
+def fmt_age(age: Optional[float]) -> str:
+    if age is None:
+        return "—"
+    a = int(age)
+    if a < 60:
+        return f"{a}s"
+    if a < 3600:
+        return f"{a // 60}m"
+    return f"{a // 3600}h"
@@ -1,5 +1,6 @@
 # ui.py
 from discord import Embed
+from swr_cache import fmt_age
 
 # ————— Utilidades —————
 def enabled_badge(enabled: bool) -> str:
@@ -52,7 +53,7 @@ def make_correction_embed(symbol: str, exchange: str, timeframe: str,
     return emb
 
 # ————— Embed de STATUS —————
-def make_status_embed(cfg: dict, last_price: float | None):
+def make_status_embed(cfg: dict, last_price: float | None, price_age: float | None = None):
     emb = Embed(
         title="📊 Estado del canal",
         description=enabled_badge(cfg.get("enabled", False)),
@@ -60,7 +61,10 @@ def make_status_embed(cfg: dict, last_price: float | None):
     )
     emb.add_field(name="🔗 Símbolo", value=cfg.get("symbol", "—"), inline=True)
     emb.add_field(name="🏦 Exchange", value=cfg.get("exchange", "—"), inline=True)
-    emb.add_field(name="💲 Precio", value=fmt_price(last_price), inline=True)
+    price_txt = fmt_price(last_price)
+    if last_price is not None and price_age is not None and price_age >= 1:
+        price_txt += f" (hace {fmt_age(price_age)})"
+    emb.add_field(name="💲 Precio", value=price_txt, inline=True)
 
     tfs = ", ".join(cfg.get("timeframes", [])) or "—"
     emb.add_field(name="⏱️ Timeframes", value=tfs, inline=True)